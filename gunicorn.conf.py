@@ -0,0 +1,119 @@
+"""Gunicorn configuration for the prediction API
+
+Run from the repository root:
+    gunicorn fraud_prediction:app
+
+gunicorn picks this file up automatically. The app (and with it
+model/model.pkl) is loaded once in the master before the workers are
+forked, and the loaded objects are moved out of the garbage collector's
+reach with gc.freeze(), so workers share the model pages copy-on-write
+instead of each holding a private copy. Every worker logs its memory
+(RSS, PSS and private pages) and how long it took to become ready.
+
+Prometheus metrics run in multiprocess mode: each process writes its
+counters and histograms to mmap files in PROMETHEUS_MULTIPROC_DIR (default
+$TMPDIR/fraud-prediction-metrics-<master pid>, removed at shutdown) and
+/metrics sums the files of all workers, so a scrape sees the whole instance
+whichever worker answers. The master empties the directory before forking,
+so counters of an earlier run are never added in; an exiting worker's live
+gauges are dropped. A directory set explicitly must not be shared with
+another instance.
+"""
+import gc
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+_started = time.monotonic()
+_fork_times = {}
+
+pythonpath = 'src'
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 8081)}"
+
+# one process per core, a few threads each for requests waiting on I/O
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+
+# finish in-flight requests on SIGTERM before workers are killed
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+
+def clear_metrics(path):
+    """Create the multiprocess metrics directory and remove the files of an earlier run."""
+    os.makedirs(path, exist_ok=True)
+    for filename in glob.glob(os.path.join(path, '*.db')):
+        os.remove(filename)
+
+
+# one directory per instance; must be set before the app, and with it prometheus_client, is loaded
+_default_metrics_dir = os.path.join(tempfile.gettempdir(), f'fraud-prediction-metrics-{os.getpid()}')
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', _default_metrics_dir)
+clear_metrics(metrics_dir)
+
+
+def memory_stats(pid='self'):
+    """
+    Memory of a process in bytes from /proc: rss, pss (shared pages split
+    between the processes sharing them) and private (pages only this process
+    has). Empty on systems without /proc.
+    """
+    stats = {}
+    fields = {'Rss:': 'rss', 'Pss:': 'pss', 'Private_Clean:': 'private', 'Private_Dirty:': 'private'}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', encoding='ascii') as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in fields:
+                    key = fields[parts[0]]
+                    stats[key] = stats.get(key, 0) + int(parts[1]) * 1024
+    except OSError:
+        pass
+    return stats
+
+
+def _format(stats):
+    return ' '.join(f"{key}={value / 2**20:.1f}MiB" for key, value in stats.items())
+
+
+def when_ready(server):
+    """Master is ready: the app is loaded, freeze it before any worker is forked."""
+    gc.collect()
+    gc.freeze()
+    server.log.info("app preloaded in %.2fs, %d objects frozen, master %s",
+                    time.monotonic() - _started, gc.get_freeze_count(), _format(memory_stats()))
+
+
+def pre_fork(server, worker):
+    """Remember when the fork started to report the worker's cold start."""
+    _fork_times[worker.age] = time.monotonic()
+
+
+def post_worker_init(worker):
+    """Worker is ready to serve: report its cold start time and memory."""
+    started = _fork_times.get(worker.age, _started)
+    worker.log.info("worker %d ready in %.3fs, %s",
+                    worker.pid, time.monotonic() - started, _format(memory_stats()))
+
+
+def worker_exit(server, worker):
+    """Report the worker's memory at shutdown to see how much of the shared model was copied."""
+    server.log.info("worker %d exiting, %s", worker.pid, _format(memory_stats()))
+
+
+def child_exit(server, worker):
+    """Worker has exited: drop its live gauges from the aggregated metrics."""
+    # imported here, so prometheus_client is first loaded after PROMETHEUS_MULTIPROC_DIR is set
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)
+
+
+def on_exit(server):
+    """Remove the instance's default metrics directory at shutdown."""
+    if metrics_dir == _default_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
@@ -0,0 +1,181 @@
+"""Offline bulk scoring of transaction files
+
+Scores a CSV shaped like data/fraud.csv.bz2 (plain, .gz or .bz2) with the
+model in model/model.pkl and writes one fraud probability per input row, in
+input order, to a CSV or Parquet file.
+
+The main process only decompresses and splits the input into blocks of
+lines; parsing, encoding and scoring run in a process pool in which every
+worker loads the model once. At most two blocks per worker are in flight,
+so memory stays bounded whatever the input size.
+
+    python src/bulk_score.py data/fraud.csv.bz2 scores.csv --workers 8
+"""
+import argparse
+import bz2
+import gzip
+import io
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV output only
+    pa = pq = None
+
+_worker = {}
+
+
+def open_input(path):
+    """Open a plain, gzip or bz2 file for binary reading based on its extension."""
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_blocks(f, chunk_size):
+    """Yield (header, block of up to chunk_size raw CSV lines)."""
+    header = f.readline()
+    lines = []
+    for line in f:
+        lines.append(line)
+        if len(lines) >= chunk_size:
+            yield header, b''.join(lines)
+            lines = []
+    if lines:
+        yield header, b''.join(lines)
+
+
+def _init_worker(model_path):
+    """Process pool initializer: load the model once per worker."""
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    _worker['model'] = model_data['model']
+    _worker['vectorizer'] = vectorizer
+    _worker['engine'] = compile_engine(model_data['model'], vectorizer, forest_lookup=False)
+
+
+def score_block(header, block):
+    """Parse, encode and score one block of CSV lines in a worker."""
+    df = pd.read_csv(io.BytesIO(header + block))
+    vectorizer = _worker['vectorizer']
+    X, valid = vectorizer.transform_frame(df)
+    probabilities = np.full(len(df), np.nan)
+    if valid.any():
+        engine = _worker['engine']
+        if engine is not None:
+            probabilities[valid] = engine.predict_batch(X[valid])
+        else:
+            probabilities[valid] = _worker['model'].predict_proba(
+                pd.DataFrame(X[valid], columns=vectorizer.columns))[:, 1]
+    return probabilities
+
+
+class ResultWriter:
+    """
+    Append probability chunks to a CSV or Parquet file. Raises ValueError
+    for Parquet output without pyarrow, before any work is done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        if self.parquet and pq is None:
+            raise ValueError(f"Parquet output {path} requires pyarrow (pip install pyarrow)")
+        self._writer = None
+        self._file = None
+
+    def write(self, probabilities):
+        """Write one chunk of probabilities."""
+        df = pd.DataFrame({'fraud_probability': probabilities})
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', encoding='utf-8', newline='')
+                df.to_csv(self._file, index=False)
+            else:
+                df.to_csv(self._file, index=False, header=False)
+
+    def close(self):
+        """Flush and close the output file; an input without rows still gets the header."""
+        if self._writer is None and self._file is None:
+            self.write(np.empty(0))
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def bulk_score(input_path, output_path, model_path='model/model.pkl', workers=None, chunk_size=100000,
+               progress=True):
+    """
+    Score input_path into output_path. Returns the number of rows scored.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = ResultWriter(output_path)
+    started = time.perf_counter()
+    n_rows = 0
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool, \
+            open_input(input_path) as f:
+
+        def drain_one():
+            nonlocal n_rows
+            probabilities = pending.popleft().result()
+            writer.write(probabilities)
+            n_rows += len(probabilities)
+            if progress:
+                elapsed = time.perf_counter() - started
+                print(f"{n_rows} rows, {n_rows / elapsed:,.0f} rows/s", file=sys.stderr)
+
+        try:
+            for header, block in read_blocks(f, chunk_size):
+                if len(pending) >= 2 * workers:
+                    drain_one()
+                pending.append(pool.submit(score_block, header, block))
+            while pending:
+                drain_one()
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Scored {n_rows} rows in {elapsed:.1f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"with {workers} workers", file=sys.stderr)
+    return n_rows
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Score a transactions CSV with the fraud model.")
+    parser.add_argument('input', help="input CSV, optionally .gz or .bz2 compressed")
+    parser.add_argument('output', help="output file, .csv or .parquet")
+    parser.add_argument('--model', default='model/model.pkl', help="model pickle (default: model/model.pkl)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="rows per work unit (default: 100000)")
+    parser.add_argument('--quiet', action='store_true', help="only print the final summary")
+    args = parser.parse_args(argv)
+    if args.output.endswith('.parquet') and pq is None:
+        parser.error("Parquet output requires pyarrow (pip install pyarrow)")
+    bulk_score(args.input, args.output, args.model, args.workers, args.chunk_size, progress=not args.quiet)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Columnar cache for the transactions dataset
+
+Decompressing data/fraud.csv.bz2 and parsing every timestamp dominates the
+time of training runs and the data tests. load_dataset does it once and
+stores the typed columns as .npy files next to a small manifest:
+
+    data/.cache/fraud.csv.bz2-<sha256 prefix>/
+        manifest.json       source file, row count, column dtypes and the
+                            categories of the categorical columns
+        <column>.npy        one array per column (category codes for
+                            categoricals, datetime64 for time)
+
+The directory name carries the hash of the source file, so a changed file
+is parsed again and stale caches are removed. Later loads memory-map the
+arrays. Text columns become category dtype, time is parsed once to
+datetime64 (unparseable values are NaT) and credit_score is downcast to the
+smallest integer type. Amounts stay float64: they are model inputs and must
+be the values the prediction API receives.
+
+Set DATASET_CACHE=0 to always read the CSV; if the cache directory cannot be
+written, or a new cache cannot be read back, the parsed CSV is used.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from feature_vectorizer import TIME_FORMAT
+from training_profiler import stage
+
+CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', os.path.join('data', '.cache'))
+CACHE_ENABLED = os.environ.get('DATASET_CACHE', '1') == '1'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+CATEGORICAL_COLUMNS = ('product_category', 'address_state', 'gender')
+
+
+def file_digest(path):
+    """sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_dataset(path):
+    """Read and type the CSV without the cache."""
+    # decompression streams into the parser, so it is part of read_csv
+    with stage('read_csv'):
+        df = pd.read_csv(path)
+    with stage('parse_time'):
+        df['time'] = pd.to_datetime(df['time'], format=TIME_FORMAT, errors='coerce')
+    with stage('convert_types'):
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
+        df['credit_score'] = pd.to_numeric(df['credit_score'], downcast='integer')
+    return df
+
+
+def write_cache(df, cache_path, source):
+    """
+    Write df as a cache directory at cache_path. The arrays are written to a
+    temporary directory that is renamed into place, so concurrent loaders
+    never see a partial cache.
+    """
+    parent = os.path.dirname(cache_path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        columns = []
+        for column in df.columns:
+            values = df[column]
+            entry = {'name': column}
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                entry['categories'] = values.cat.categories.tolist()
+                values = values.cat.codes
+            array = values.to_numpy()
+            entry['dtype'] = array.dtype.str
+            np.save(os.path.join(tmp, f'{column}.npy'), array)
+            columns.append(entry)
+        manifest = {'format_version': FORMAT_VERSION, 'source': os.path.basename(source),
+                    'rows': len(df), 'columns': columns}
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp, cache_path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # another process may have written the same cache first
+        if not os.path.isdir(cache_path):
+            raise
+
+
+def read_cache(cache_path):
+    """Open a cache directory as a DataFrame backed by memory-mapped arrays."""
+    with open(os.path.join(cache_path, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset cache format: {manifest.get('format_version')}")
+    data = {}
+    for entry in manifest['columns']:
+        # a plain ndarray view of the mapping, so results of pandas operations are not memmaps
+        array = np.load(os.path.join(cache_path, f"{entry['name']}.npy"), mmap_mode='r',
+                        allow_pickle=False).view(np.ndarray)
+        if 'categories' in entry:
+            data[entry['name']] = pd.Categorical.from_codes(array, categories=entry['categories'])
+        else:
+            data[entry['name']] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def _remove_stale(cache_dir, source, keep):
+    """Remove caches of earlier versions of source."""
+    prefix = os.path.basename(source) + '-'
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name != keep:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def load_dataset(path, cache_dir=None):
+    """
+    Load the transactions CSV at path with typed columns, from the columnar
+    cache when it matches the file's contents. The cache is built on the
+    first load; any problem with it falls back to reading the CSV.
+    """
+    if not CACHE_ENABLED:
+        return read_dataset(path)
+    cache_dir = cache_dir or CACHE_DIR
+    with stage('hash'):
+        name = f'{os.path.basename(path)}-{file_digest(path)[:16]}'
+    cache_path = os.path.join(cache_dir, name)
+    if os.path.isdir(cache_path):
+        try:
+            with stage('read_cache'):
+                return read_cache(cache_path)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(cache_path, ignore_errors=True)
+
+    df = read_dataset(path)
+    try:
+        with stage('write_cache'):
+            write_cache(df, cache_path, path)
+            _remove_stale(cache_dir, path, name)
+    except OSError:
+        return df
+    try:
+        with stage('read_cache'):
+            return read_cache(cache_path)
+    except (OSError, ValueError, KeyError) as e:
+        # e.g. an object column, which np.load does not read back without pickle
+        warnings.warn(f"Cannot read the dataset cache {cache_path} ({e}), using the parsed CSV")
+        shutil.rmtree(cache_path, ignore_errors=True)
+        return df
@@ -0,0 +1,224 @@
+"""Precompiled feature vectorizer for the prediction API
+
+Builds the same model input as create_input_dataframe in fraud_prediction.py,
+but without pandas: the encoders' categories are compiled once into
+dictionaries that map each raw value straight to its column index, and a
+request only costs a few dictionary lookups and one NumPy row.
+transform_frame encodes whole DataFrames the same way and is shared by the
+training scripts (through features.py), the model tests and bulk scoring.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Per-group category codes of one transaction; -1 marks a category the encoder ignores
+EncodedTransaction = namedtuple('EncodedTransaction', ['hour', 'product', 'gender', 'amount'])
+
+
+def _compile_encoder(encoder, cols, name):
+    """
+    Map each category of a fitted OneHotEncoder to its position in cols.
+    """
+    if getattr(encoder, 'drop_idx_', None) is not None:
+        raise ValueError(f"{name} encoder uses drop, which the vectorizer does not support")
+    if getattr(encoder, 'infrequent_categories_', None) and any(
+            c is not None for c in encoder.infrequent_categories_):
+        raise ValueError(f"{name} encoder groups infrequent categories, which the vectorizer does not support")
+    categories = encoder.categories_[0].tolist()
+    if len(categories) != len(cols):
+        raise ValueError(f"{name} encoder has {len(categories)} categories but {len(cols)} columns")
+    return {category: i for i, category in enumerate(categories)}
+
+
+def _lookup(index, encoder, value):
+    """
+    Return the category code of value, or -1 if the encoder ignores it.
+    Values missing from the index are passed to the encoder itself, so
+    unknown or malformed values raise exactly what the encoder raises.
+    """
+    try:
+        return index[value]
+    except (KeyError, TypeError):
+        pass
+    encoded = encoder.transform(np.array([value]).reshape(1, -1))[0]
+    hits = np.flatnonzero(encoded)
+    return int(hits[0]) if hits.size else -1
+
+
+class FeatureVectorizer:
+    """
+    Encode transactions into model input rows with the column layout
+    hour_cols + product_cols + gender_cols + amount used in training.
+    """
+
+    def __init__(self, enc_product, enc_hour, enc_gender, enc_state,
+                 product_cols, hour_cols, gender_cols, state_cols):
+        self.enc_product = enc_product
+        self.enc_hour = enc_hour
+        self.enc_gender = enc_gender
+        self.enc_state = enc_state
+
+        self.hour_index = _compile_encoder(enc_hour, hour_cols, 'hour')
+        self.product_index = _compile_encoder(enc_product, product_cols, 'product')
+        self.gender_index = _compile_encoder(enc_gender, gender_cols, 'gender')
+        self.state_index = _compile_encoder(enc_state, state_cols, 'state')
+
+        self.columns = [*hour_cols, *product_cols, *gender_cols, 'amount']
+        self.n_features = len(self.columns)
+        self.hour_offset = 0
+        self.product_offset = len(hour_cols)
+        self.gender_offset = self.product_offset + len(product_cols)
+        self.amount_col = self.gender_offset + len(gender_cols)
+
+    @classmethod
+    def from_model_data(cls, model_data):
+        """
+        Compile a vectorizer from the dict stored in model.pkl.
+        """
+        return cls(model_data['enc_product'], model_data['enc_hour'],
+                   model_data['enc_gender'], model_data['enc_state'],
+                   model_data['product_cols'], model_data['hour_cols'],
+                   model_data['gender_cols'], model_data['state_cols'])
+
+    def encode(self, amount, product_category, time_str, address_state, gender, credit_score):
+        """
+        Validate a transaction and return its EncodedTransaction.
+        Raises the same ValueErrors as create_input_dataframe.
+        """
+        try:
+            product_code = _lookup(self.product_index, self.enc_product, product_category)
+        except ValueError as e:
+            raise ValueError(f"Unknown product category: {product_category}: {str(e)}") from e
+
+        try:
+            gender_code = _lookup(self.gender_index, self.enc_gender, gender)
+        except ValueError as e:
+            raise ValueError(f"Unknown gender: {gender}: {str(e)}") from e
+
+        # the state is validated like in create_input_dataframe but is not a model input
+        try:
+            _lookup(self.state_index, self.enc_state, address_state)
+        except ValueError as e:
+            raise ValueError(f"Unknown state: {address_state}: {str(e)}") from e
+
+        try:
+            hour = datetime.fromisoformat(time_str).hour
+            hour_code = _lookup(self.hour_index, self.enc_hour, hour)
+        except Exception as e:
+            raise ValueError(f"Invalid time format: {time_str}: {str(e)}") from e
+
+        try:
+            amount = float(amount)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid amount: {amount}: {str(e)}") from e
+
+        return EncodedTransaction(hour_code, product_code, gender_code, amount)
+
+    def fill(self, encoded, out):
+        """
+        Write an EncodedTransaction into the 1-D row out and return it.
+        """
+        out[:] = 0.0
+        if encoded.hour >= 0:
+            out[self.hour_offset + encoded.hour] = 1.0
+        if encoded.product >= 0:
+            out[self.product_offset + encoded.product] = 1.0
+        if encoded.gender >= 0:
+            out[self.gender_offset + encoded.gender] = 1.0
+        out[self.amount_col] = encoded.amount
+        return out
+
+    def transform(self, amount, product_category, time_str, address_state, gender, credit_score, out=None):
+        """
+        Encode one transaction into a (1, n_features) float64 row.
+        Pass a preallocated row as out to avoid the allocation.
+        """
+        encoded = self.encode(amount, product_category, time_str, address_state, gender, credit_score)
+        if out is None:
+            out = np.zeros((1, self.n_features))
+        self.fill(encoded, out.reshape(-1))
+        return out
+
+    def transform_encoded(self, encoded_rows):
+        """
+        Scatter a list of EncodedTransactions into one (n, n_features) matrix.
+        """
+        n = len(encoded_rows)
+        X = np.zeros((n, self.n_features))
+        if n == 0:
+            return X
+        codes = np.array([(e.hour, e.product, e.gender) for e in encoded_rows], dtype=np.intp).reshape(n, 3)
+        rows = np.arange(n)
+        for j, offset in enumerate((self.hour_offset, self.product_offset, self.gender_offset)):
+            known = codes[:, j] >= 0
+            X[rows[known], offset + codes[known, j]] = 1.0
+        X[:, self.amount_col] = [e.amount for e in encoded_rows]
+        return X
+
+    def encode_frame(self, df):
+        """
+        Look up the category codes of a DataFrame of raw transactions (the
+        columns of data/fraud.csv.bz2, time as string or datetime), one hash
+        lookup per one-hot group.
+
+        Returns (codes, amount, valid): an (n, 4) array with the hour, product,
+        gender and state code of every row (-1 for categories the encoder
+        ignores), the amounts, and a boolean mask of the rows that could be
+        encoded: no missing field, a parseable time and no category rejected
+        by a handle_unknown='error' encoder. Rows outside the mask must not be
+        scored.
+        """
+        if pd.api.types.is_datetime64_any_dtype(df['time']):
+            time_parsed = df['time']
+        else:
+            time_parsed = pd.to_datetime(df['time'], format=TIME_FORMAT, errors='coerce')
+        amount = df['amount'].to_numpy(dtype=float)
+        valid = (time_parsed.notna().to_numpy() & ~np.isnan(amount)
+                 & df['credit_score'].notna().to_numpy())
+
+        codes = np.empty((len(df), 4), dtype=np.intp)
+        groups = ((time_parsed.dt.hour, self.enc_hour),
+                  (df['product_category'], self.enc_product),
+                  (df['gender'], self.enc_gender),
+                  (df['address_state'], self.enc_state))
+        for j, (values, encoder) in enumerate(groups):
+            categories = pd.Index(encoder.categories_[0])
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # translate the column's own category codes; code -1 (missing) maps to the appended -1
+                lookup = np.append(categories.get_indexer(values.cat.categories), -1)
+                codes[:, j] = lookup[values.cat.codes.to_numpy()]
+            else:
+                codes[:, j] = categories.get_indexer(values)
+            unmatched = np.flatnonzero(codes[:, j] < 0)
+            if unmatched.size:
+                # only the few unmatched rows are checked for missing values
+                missing = values.iloc[unmatched].isna().to_numpy()
+                valid[unmatched[missing]] = False
+                if encoder.handle_unknown == 'error':
+                    valid[unmatched] = False
+        return codes, amount, valid
+
+    def transform_frame(self, df, out=None):
+        """
+        Encode a DataFrame of raw transactions into an (n, n_features) matrix
+        with one scatter of the encode_frame codes per one-hot group.
+        Returns the matrix and the valid mask of encode_frame.
+        Pass a preallocated float64 matrix as out to avoid the allocation.
+        """
+        codes, amount, valid = self.encode_frame(df)
+        n = len(df)
+        if out is None:
+            out = np.zeros((n, self.n_features))
+        else:
+            out[:] = 0.0
+        flat = out.reshape(-1)
+        row_starts = np.arange(n) * self.n_features
+        for j, offset in enumerate((self.hour_offset, self.product_offset, self.gender_offset)):
+            known = codes[:, j] >= 0
+            flat[row_starts[known] + offset + codes[known, j]] = 1.0
+        out[:, self.amount_col] = amount
+        return out, valid
@@ -0,0 +1,194 @@
+"""Shared feature pipeline for training and evaluation
+
+Loads data/fraud.csv.bz2, fits the one-hot encoders and builds the model
+input with FeatureVectorizer.transform_frame, the same encoding the
+prediction API and bulk scoring use. The matrix is filled in place from
+pandas categorical codes, so no per-encoder dense arrays or DataFrames are
+built and concatenated, and the column order is defined in one place.
+
+build_sparse_features emits the same encoding as a scipy.sparse CSR matrix
+(a handful of stored values per row instead of one float64 per column),
+optionally with the full feature set (state one-hot and credit_score) and
+standardized numeric columns. LogisticRegression and MLPClassifier train on
+it directly; fold_scaling then moves the standardization into the model's
+first layer so it takes raw input like a model trained on build_features.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import OneHotEncoder
+
+from dataset_cache import load_dataset
+from feature_vectorizer import FeatureVectorizer
+from training_profiler import stage
+
+DATA_PATH = 'data/fraud.csv.bz2'
+
+# model_data key, source column, feature name prefix
+ENCODED_COLUMNS = (('product', 'product_category', 'product_category'),
+                   ('hour', 'hour', 'hour'),
+                   ('gender', 'gender', 'gender'),
+                   ('state', 'address_state', 'address_state'))
+
+
+def load_transactions(path=DATA_PATH):
+    """
+    Load the transactions dataset (through the columnar cache of
+    dataset_cache.py) with the time column parsed; rows with missing values
+    or an unparseable time are dropped.
+    """
+    with stage('load'):
+        df = load_dataset(path)
+    with stage('dropna'):
+        return df.dropna()
+
+
+def category_values(df):
+    """
+    Distinct values of the one-hot encoded columns of a transactions
+    DataFrame (time parsed), as {column: array}.
+    """
+    values = df.assign(hour=df['time'].dt.hour)
+    return {column: values[column].drop_duplicates().to_numpy() for _, column, _ in ENCODED_COLUMNS}
+
+
+def encoders_from_categories(categories):
+    """
+    Fit the OneHotEncoders on the distinct values of each encoded column
+    ({column: values}, e.g. from category_values). Returns the encoder and
+    column entries of the dict saved as model.pkl (enc_product, product_cols, ...).
+    """
+    model_data = {}
+    for key, column, prefix in ENCODED_COLUMNS:
+        # the categories only depend on the distinct values
+        encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+        encoder.fit(pd.DataFrame({column: categories[column]}))
+        model_data[f'enc_{key}'] = encoder
+        model_data[f'{key}_cols'] = encoder.get_feature_names_out([prefix])
+    return model_data
+
+
+def fit_encoders(df):
+    """
+    Fit the OneHotEncoders on a transactions DataFrame, see encoders_from_categories.
+    """
+    return encoders_from_categories(category_values(df))
+
+
+def build_features(df, model_data):
+    """
+    Encode a transactions DataFrame into the model input DataFrame
+    (hour_cols + product_cols + gender_cols + amount) with the encoders in
+    model_data. Raises ValueError if a row cannot be encoded.
+    """
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    X, valid = vectorizer.transform_frame(df)
+    if not valid.all():
+        raise ValueError(f"{(~valid).sum()} rows cannot be encoded")
+    return pd.DataFrame(X, columns=vectorizer.columns, index=df.index, copy=False)
+
+
+def feature_columns(model_data, full=False):
+    """
+    Column names of the model input: the served layout (hour_cols +
+    product_cols + gender_cols + amount), with full also state_cols and
+    credit_score. Models trained on the full set are for evaluation only;
+    the prediction API serves the default layout.
+    """
+    columns = FeatureVectorizer.from_model_data(model_data).columns
+    if full:
+        columns = [*columns, *model_data['state_cols'], 'credit_score']
+    return columns
+
+
+def numeric_scaling(df, columns=('amount', 'credit_score')):
+    """
+    Mean and standard deviation of the numeric columns, as {column: (mean, std)}.
+    """
+    scaling = {}
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        std = values.std()
+        scaling[column] = (values.mean(), std if std > 0 else 1.0)
+    return scaling
+
+
+def build_sparse_features(df, model_data, full=False, scaling=None):
+    """
+    Encode a transactions DataFrame into a CSR matrix with the columns of
+    feature_columns(model_data, full). Numeric columns listed in scaling
+    (from numeric_scaling) are standardized; every row stores its numeric
+    values explicitly, so centering does not densify the matrix.
+    Raises ValueError if a row cannot be encoded.
+    """
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    codes, amount, valid = vectorizer.encode_frame(df)
+    if not valid.all():
+        raise ValueError(f"{(~valid).sum()} rows cannot be encoded")
+    scaling = scaling or {}
+
+    n = len(df)
+    offsets = [vectorizer.hour_offset, vectorizer.product_offset, vectorizer.gender_offset]
+    numeric = [(vectorizer.amount_col, 'amount', amount)]
+    n_features = vectorizer.n_features
+    if full:
+        offsets.append(n_features)
+        n_features += len(model_data['state_cols'])
+        numeric.append((n_features, 'credit_score', df['credit_score'].to_numpy(dtype=float)))
+        n_features += 1
+
+    row_index = np.arange(n)
+    rows, cols, data = [], [], []
+    for j, offset in enumerate(offsets):
+        known = codes[:, j] >= 0
+        rows.append(row_index[known])
+        cols.append(offset + codes[known, j])
+        data.append(np.ones(known.sum()))
+    for col, name, values in numeric:
+        mean, std = scaling.get(name, (0.0, 1.0))
+        rows.append(row_index)
+        cols.append(np.full(n, col))
+        data.append((values - mean) / std)
+
+    return sparse.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(n, n_features))
+
+
+def fold_scaling(model, columns, scaling):
+    """
+    Fold the standardization applied by build_sparse_features into a fitted
+    LogisticRegression or MLPClassifier, so it scores raw (unscaled) input,
+    and record the column names. Both models are linear in their input, so
+    w * (x - mean) / std + b == (w / std) * x + (b - w * mean / std) exactly.
+    """
+    if hasattr(model, 'coefs_'):
+        weights, bias = model.coefs_[0], model.intercepts_[0]
+    else:
+        weights, bias = model.coef_.T, model.intercept_
+    for name, (mean, std) in scaling.items():
+        if name not in columns:
+            continue
+        j = columns.index(name)
+        weights[j] /= std
+        bias -= weights[j] * mean
+    model.feature_names_in_ = np.array(columns, dtype=object)
+    return model
+
+
+def unfold_scaling(model, columns, scaling):
+    """
+    Inverse of fold_scaling: turn a model that scores raw input back into one
+    that takes the standardized input of build_sparse_features, e.g. to warm
+    start sparse training from a deployed model.
+    """
+    if hasattr(model, 'coefs_'):
+        weights, bias = model.coefs_[0], model.intercepts_[0]
+    else:
+        weights, bias = model.coef_.T, model.intercept_
+    for name, (mean, std) in scaling.items():
+        if name not in columns:
+            continue
+        j = columns.index(name)
+        bias += weights[j] * mean
+        weights[j] *= std
+    return model
@@ -1,16 +1,25 @@
 """Fraud Detection Prediction API Module"""
+import json
 import os
 import pickle
+import time
+import warnings
 from datetime import datetime
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flasgger import Swagger
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, REGISTRY
+from prometheus_client import Counter, Histogram, Gauge, generate_latest, REGISTRY, CollectorRegistry, multiprocess
 
 import pandas as pd
 import numpy as np
 
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine
+from micro_batcher import MicroBatcher, QueueFullError
+from prediction_cache import PredictionCache
+from model_bundle import load_bundle
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins":
                                  ["localhost", "127.0.0.1",
@@ -19,32 +28,157 @@ CORS(app, resources={r"/api/*": {"origins":
 
 swagger = Swagger(app)
 
+
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does), every process keeps its metrics in mmap
+# files in that directory and /metrics aggregates the files of all workers
+METRICS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def metrics_registry():
+    """
+    Registry served by /metrics: the process's own, or in multiprocess mode a
+    collector summing counters and histograms over all workers.
+    """
+    if not METRICS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def histogram_buckets(variable, default):
+    """
+    Histogram bucket boundaries in seconds from a comma-separated environment
+    variable (e.g. "0.0001,0.0005,0.001"), or default if it is not set.
+    """
+    value = os.environ.get(variable)
+    if not value:
+        return tuple(default)
+    return tuple(sorted(float(bound) for bound in value.split(',')))
+
+
+# Stages of an /api/v1/predict request timed by fraud_prediction_stage_duration_seconds
+STAGES = ('request_decode', 'validation', 'feature_encoding', 'model_inference', 'response_encode')
+# compiled engines score in microseconds, so the stage buckets start far below a millisecond
+STAGE_BUCKETS = (.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, 1.0)
+
 # Prometheus metrics
 prediction_counter = Counter('fraud_predictions_total', 'Total number of fraud predictions', ['status'])
-prediction_latency = Histogram('fraud_prediction_duration_seconds', 'Duration of fraud predictions in seconds')
+prediction_latency = Histogram('fraud_prediction_duration_seconds', 'Duration of fraud predictions in seconds',
+                               buckets=histogram_buckets('PREDICTION_LATENCY_BUCKETS', Histogram.DEFAULT_BUCKETS))
+stream_chunk_latency = Histogram('fraud_prediction_stream_chunk_duration_seconds',
+                                 'Duration of scoring one chunk of /api/v1/predict_stream in seconds')
+stage_latency = Histogram('fraud_prediction_stage_duration_seconds',
+                          'Duration of the stages of /api/v1/predict requests in seconds',
+                          ['stage', 'model_family', 'model_version'],
+                          buckets=histogram_buckets('STAGE_LATENCY_BUCKETS', STAGE_BUCKETS))
 prediction_errors = Counter('fraud_prediction_errors_total', 'Total number of prediction errors', ['error_type'])
-model_version_gauge = Gauge('model_version_info', 'Model version information', ['version'])
-
-# Load the model and encoders
-with open('model/model.pkl', 'rb') as f:
-    model_data = pickle.load(f)
-    model = model_data['model']
-    enc_product = model_data['enc_product']
-    enc_hour = model_data['enc_hour']
-    enc_gender = model_data['enc_gender']
-    enc_state = model_data['enc_state']
-    product_cols = model_data['product_cols']
-    hour_cols = model_data['hour_cols']
-    gender_cols = model_data['gender_cols']
-    state_cols = model_data['state_cols']
-    model_version = model_data.get('model_version', 'unknown')
-    train_date = model_data.get('train_date', 'unknown')
+model_version_gauge = Gauge('model_version_info', 'Model version information', ['version'],
+                            multiprocess_mode='livemax')
+cache_hits = Counter('fraud_prediction_cache_hits_total', 'Predictions served from the prediction cache')
+cache_misses = Counter('fraud_prediction_cache_misses_total', 'Prediction cache lookups that missed')
+cache_evictions = Counter('fraud_prediction_cache_evictions_total', 'Entries dropped from the prediction cache')
+micro_batch_size = Histogram('fraud_micro_batch_size', 'Number of requests scored per micro-batch',
+                             buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+micro_batch_queue_delay = Histogram('fraud_micro_batch_queue_delay_seconds',
+                                    'Time requests wait in the micro-batch queue',
+                                    buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1))
+
+# Load the model and encoders, from a memory-mapped bundle (see model_bundle.py) if MODEL_BUNDLE is set
+MODEL_BUNDLE = os.environ.get('MODEL_BUNDLE')
+bundle = None
+if MODEL_BUNDLE:
+    bundle = load_bundle(MODEL_BUNDLE, verify=os.environ.get('MODEL_BUNDLE_VERIFY', '1') == '1')
+    model_data = bundle.model_data()
+else:
+    with open('model/model.pkl', 'rb') as f:
+        model_data = pickle.load(f)
+
+model = model_data['model']
+enc_product = model_data['enc_product']
+enc_hour = model_data['enc_hour']
+enc_gender = model_data['enc_gender']
+enc_state = model_data['enc_state']
+product_cols = model_data['product_cols']
+hour_cols = model_data['hour_cols']
+gender_cols = model_data['gender_cols']
+state_cols = model_data['state_cols']
+model_version = model_data.get('model_version', 'unknown')
+train_date = model_data.get('train_date', 'unknown')
+# hash of the data, feature pipeline, hyperparameters and library versions the model was trained from
+fingerprint = model_data.get('fingerprint', 'unknown')
 
 # Set model version metric
 model_version_gauge.labels(version=model_version).set(1)
 
+# model family label of the stage metrics, named like the training artifacts (lreg-model.pkl, ...)
+MODEL_FAMILIES = {'LogisticRegression': 'lreg', 'logistic_regression': 'lreg', 'SGDClassifier': 'sgd',
+                  'RandomForestClassifier': 'randomforest', 'random_forest': 'randomforest',
+                  'MLPClassifier': 'nn', 'mlp': 'nn'}
+model_kind = bundle.manifest['engine'] if bundle is not None else type(model).__name__
+model_family = MODEL_FAMILIES.get(model_kind, model_kind)
+stage_timers = {stage: stage_latency.labels(stage=stage, model_family=model_family, model_version=model_version)
+                for stage in STAGES}
+
 git_commit = os.environ.get('GIT_COMMIT', 'unknown')
 
+# Fields every transaction must carry, and the largest batch accepted by /api/v1/predict_batch
+REQUIRED_FIELDS = ('amount', 'product_category', 'time', 'address_state', 'gender', 'credit_score')
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+
+# /api/v1/predict_stream scores NDJSON bodies STREAM_CHUNK_SIZE lines at a time
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+MAX_LINE_BYTES = int(os.environ.get('MAX_LINE_BYTES', 64 * 1024))
+
+# Feature encoding: 'dataframe' (create_input_dataframe) or 'numpy' (precompiled FeatureVectorizer)
+FEATURE_VECTORIZER = os.environ.get('FEATURE_VECTORIZER', 'dataframe')
+# the model input column layout; batches are encoded with it in every mode
+feature_layout = FeatureVectorizer.from_model_data(model_data)
+if FEATURE_VECTORIZER == 'numpy':
+    vectorizer = feature_layout
+    # the model was fitted on a DataFrame; plain arrays in the same column order are expected here
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+elif FEATURE_VECTORIZER == 'dataframe':
+    vectorizer = None
+else:
+    raise ValueError(f"Unknown FEATURE_VECTORIZER: {FEATURE_VECTORIZER}")
+
+# Inference: 'sklearn' (run_model) or 'compiled' (inference_engines, falls back to run_model).
+# A bundle holds no sklearn model, so it is always served by its compiled engine.
+INFERENCE_ENGINE = 'compiled' if bundle is not None else os.environ.get('INFERENCE_ENGINE', 'sklearn')
+FOREST_LOOKUP = os.environ.get('FOREST_LOOKUP', '1') == '1'
+engine = None
+if INFERENCE_ENGINE == 'compiled':
+    if vectorizer is None:
+        vectorizer = feature_layout
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    if bundle is not None:
+        engine = bundle.engine(vectorizer, forest_lookup=FOREST_LOOKUP)
+    else:
+        engine = compile_engine(model, vectorizer, forest_lookup=FOREST_LOOKUP)
+    if engine is None:
+        print(f"No compiled engine for {type(model).__name__}, using run_model")
+    elif getattr(engine, 'lookup', False):
+        engine.precompile()
+elif INFERENCE_ENGINE != 'sklearn':
+    raise ValueError(f"Unknown INFERENCE_ENGINE: {INFERENCE_ENGINE}")
+
+# Micro-batching of concurrent /api/v1/predict requests (off by default)
+MICRO_BATCH = os.environ.get('MICRO_BATCH', '0') == '1'
+MICRO_BATCH_WINDOW_MS = float(os.environ.get('MICRO_BATCH_WINDOW_MS', 2))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+MICRO_BATCH_QUEUE_DEPTH = int(os.environ.get('MICRO_BATCH_QUEUE_DEPTH', 1024))
+
+# Prediction cache keyed on the encoded model input (PREDICTION_CACHE_SIZE=0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL,
+                                       hit_counter=cache_hits,
+                                       miss_counter=cache_misses,
+                                       eviction_counter=cache_evictions)
+
 def run_model(input_df):
     """
     Run the fraud prediction model on the input DataFrame.
@@ -53,6 +187,74 @@ def run_model(input_df):
     return prediction
 
 
+def run_model_batch(input_df):
+    """
+    Run the fraud prediction model on a multi-row input DataFrame.
+    Returns one fraud probability per row.
+    """
+    return model.predict_proba(input_df)[:, 1]
+
+
+def predict_probability(model_input):
+    """
+    Score one model input from create_model_input with the selected engine,
+    through the micro-batcher when it is enabled.
+    """
+    if batcher is not None:
+        return batcher.submit(model_input)
+    if engine is not None:
+        return engine.predict_one(model_input)
+    return run_model(model_input)
+
+
+def predict_probabilities(model_input):
+    """
+    Score a batch model input from create_batch_input with the selected engine.
+    """
+    if engine is not None:
+        return engine.predict_batch(model_input)
+    return run_model_batch(model_input)
+
+
+def combine_model_inputs(model_inputs):
+    """
+    Stack single model inputs from create_model_input into one batch input.
+    """
+    if engine is not None:
+        return vectorizer.transform_encoded(model_inputs)
+    if vectorizer is not None:
+        return np.vstack(model_inputs)
+    return pd.concat(model_inputs, ignore_index=True)
+
+
+def model_input_key(model_input):
+    """
+    Canonical, hashable form of a model input from create_model_input.
+    """
+    if engine is not None:
+        return model_input
+    if vectorizer is not None:
+        return model_input.tobytes()
+    return tuple(model_input.iloc[0].tolist())
+
+
+def model_token():
+    """
+    Identify the loaded model, so cached predictions are dropped when it changes.
+    """
+    return (model_version, id(model))
+
+
+batcher = None
+if MICRO_BATCH:
+    batcher = MicroBatcher(combine_model_inputs, predict_probabilities,
+                           window=MICRO_BATCH_WINDOW_MS / 1000,
+                           max_batch_size=MICRO_BATCH_MAX_SIZE,
+                           max_queue_depth=MICRO_BATCH_QUEUE_DEPTH,
+                           batch_size_histogram=micro_batch_size,
+                           queue_delay_histogram=micro_batch_queue_delay)
+
+
 def create_input_dataframe(amount, product_category, time_str, address_state, gender, credit_score):
     """
     Create input DataFrame for the model from the input data.
@@ -111,6 +313,290 @@ def create_input_dataframe(amount, product_category, time_str, address_state, ge
 
     return input_df
 
+
+def create_model_input(amount, product_category, time_str, address_state, gender, credit_score):
+    """
+    Create the model input with the feature encoding selected at startup.
+    Compiled engines score the EncodedTransaction directly.
+    """
+    if engine is not None:
+        return vectorizer.encode(amount, product_category, time_str, address_state, gender, credit_score)
+    if vectorizer is not None:
+        return vectorizer.transform(amount, product_category, time_str, address_state, gender, credit_score)
+    return create_input_dataframe(amount, product_category, time_str, address_state, gender, credit_score)
+
+
+def _check_fields(data):
+    """
+    Return an error message if a batch entry is not a complete transaction, None otherwise.
+    """
+    if not isinstance(data, dict):
+        return "Transaction must be a JSON object"
+    if any(data.get(field) is None for field in REQUIRED_FIELDS):
+        return "Missing required fields"
+    return None
+
+
+def _encode_batch(transactions):
+    """
+    Validate and encode every transaction of a batch on its own with
+    feature_layout. Rows that fail are reported in the returned errors dict
+    (batch position -> message) and left out.
+    Returns (EncodedTransactions, positions of the encoded rows, errors).
+    """
+    errors = {}
+    encoded_rows = []
+    positions = []
+    for i, data in enumerate(transactions):
+        error = _check_fields(data)
+        if error is None:
+            try:
+                encoded_rows.append(feature_layout.encode(*(data[field] for field in REQUIRED_FIELDS)))
+                positions.append(i)
+                continue
+            except Exception as e:
+                error = str(e)
+        errors[i] = error
+    return encoded_rows, positions, errors
+
+
+def create_batch_dataframe(transactions):
+    """
+    Create the model input DataFrame for a batch of transactions, with the
+    columns of feature_layout. Returns (input_df, positions of the encoded
+    rows, errors); input_df is None if no row could be encoded.
+    """
+    encoded_rows, positions, errors = _encode_batch(transactions)
+    if not encoded_rows:
+        return None, positions, errors
+    input_df = pd.DataFrame(feature_layout.transform_encoded(encoded_rows), columns=feature_layout.columns)
+    return input_df, positions, errors
+
+
+def create_batch_input(transactions):
+    """
+    Create the model input for a batch with the feature encoding selected at
+    startup. Returns (model input, positions of the encoded rows, errors).
+    """
+    if vectorizer is None:
+        return create_batch_dataframe(transactions)
+
+    encoded_rows, positions, errors = _encode_batch(transactions)
+    if not encoded_rows:
+        return None, positions, errors
+    return vectorizer.transform_encoded(encoded_rows), positions, errors
+
+
+def health_status():
+    """
+    Payload of the /health endpoint.
+    """
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "model_version": model_version
+    }
+
+
+def model_version_info():
+    """
+    Payload of the /api/v1/model_version endpoint.
+    """
+    return {"model_version": model_version,
+            "git_hash": git_commit,
+            "train_date": str(train_date),
+            "fingerprint": fingerprint
+            }
+
+
+def _validate_transaction(data):
+    """
+    The checks predict_transaction runs before encoding: model version,
+    empty body and required fields. Returns (fields, None) with the field
+    values in create_model_input's argument order, or (None, (payload,
+    status)) for a rejected request, whose error is counted.
+    """
+    if model_version != '0.1':
+        prediction_errors.labels(error_type='bad_model_version').inc()
+        return None, ({"error": f"Model version mismatch: expected 0.1, got {model_version}"}, 500)
+
+    if not data:
+        prediction_errors.labels(error_type='no_json').inc()
+        return None, ({"error": "No JSON data provided"}, 400)
+
+    # Extract fields
+    amount = data.get('amount')
+    product_category = data.get('product_category')
+    time_str = data.get('time')
+    address_state = data.get('address_state')
+    gender = data.get('gender')
+    credit_score = data.get('credit_score')
+
+    if (amount is None
+        or product_category is None
+        or gender is None
+        or credit_score is None
+        or time_str is None
+        or address_state is None):
+        prediction_errors.labels(error_type='missing_fields').inc()
+        return None, ({"error": "Missing required fields"}, 400)
+    return (amount, product_category, time_str, address_state, gender, credit_score), None
+
+
+def predict_transaction(data):
+    """
+    Validate, encode and score one transaction.
+    Returns the response payload and HTTP status of /api/v1/predict.
+    Records the validation, feature_encoding and model_inference stages.
+    """
+    started = time.perf_counter()
+    fields, error = _validate_transaction(data)
+    if error is not None:
+        return error
+    encoding = time.perf_counter()
+    stage_timers['validation'].observe(encoding - started)
+
+    try:
+        input_df = create_model_input(*fields)
+    except ValueError as e:
+        prediction_errors.labels(error_type='data_preparation').inc()
+        return {"error": f"Data preparation failed: {str(e)}"}, 400
+    inference = time.perf_counter()
+    stage_timers['feature_encoding'].observe(inference - encoding)
+
+    try:
+        prediction = None
+        if prediction_cache is not None:
+            cache_key = model_input_key(input_df)
+            prediction = prediction_cache.get(cache_key, model_token())
+        if prediction is None:
+            prediction = predict_probability(input_df)
+            if prediction_cache is not None:
+                prediction_cache.put(cache_key, prediction, model_token())
+    except QueueFullError as e:
+        prediction_errors.labels(error_type='queue_full').inc()
+        return {"error": f"prediction failed: {str(e)}"}, 503
+    except Exception as e:
+        prediction_errors.labels(error_type='model_inference').inc()
+        return {"error": f"prediction failed: {str(e)}"}, 500
+
+    stage_timers['model_inference'].observe(time.perf_counter() - inference)
+
+    prediction_counter.labels(status='success').inc()
+    return {"fraud_probability": min(1.0, max(0.0, float(prediction)))}, 200
+
+
+def predict_transaction_batch(data):
+    """
+    Validate, encode and score a batch request body {"transactions": [...]}.
+    Returns the response payload and HTTP status of /api/v1/predict_batch.
+    """
+    if model_version != '0.1':
+        prediction_errors.labels(error_type='bad_model_version').inc()
+        return {"error": f"Model version mismatch: expected 0.1, got {model_version}"}, 500
+
+    transactions = data.get('transactions') if isinstance(data, dict) else None
+    if not isinstance(transactions, list) or not transactions:
+        prediction_errors.labels(error_type='no_json').inc()
+        return {"error": "No transactions provided"}, 400
+    if len(transactions) > MAX_BATCH_SIZE:
+        prediction_errors.labels(error_type='batch_too_large').inc()
+        return {"error": f"Batch too large: {len(transactions)} > {MAX_BATCH_SIZE}"}, 413
+
+    try:
+        results, n_success, n_errors = score_transactions(transactions, 'batch_row')
+    except Exception as e:
+        prediction_errors.labels(error_type='model_inference').inc()
+        return {"error": f"prediction failed: {str(e)}"}, 500
+
+    return {"results": results,
+            "n_success": n_success,
+            "n_errors": n_errors}, 200
+
+
+def score_transactions(transactions, error_type):
+    """
+    Score a list of transactions with one model call.
+    Returns one result dict per transaction (fraud_probability or error) and
+    the success and error counts; raises if the model call itself fails.
+    """
+    input_df, positions, errors = create_batch_input(transactions)
+
+    results = [None] * len(transactions)
+    for i, error in errors.items():
+        prediction_errors.labels(error_type=error_type).inc()
+        results[i] = {"error": f"Data preparation failed: {error}"}
+
+    if positions:
+        predictions = predict_probabilities(input_df)
+        for i, prediction in zip(positions, predictions):
+            results[i] = {"fraud_probability": min(1.0, max(0.0, float(prediction)))}
+        prediction_counter.labels(status='success').inc(len(positions))
+
+    return results, len(positions), len(errors)
+
+
+def read_ndjson(stream):
+    """
+    Yield (line number, transaction or None, error or None) for each
+    non-empty line of an NDJSON stream, reading one line at a time.
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_LINE_BYTES and not line.endswith(b'\n'):
+            # skip the rest of the oversized line without buffering it
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(MAX_LINE_BYTES + 1)
+            yield line_number, None, f"Line longer than {MAX_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+
+
+def predict_ndjson(stream):
+    """
+    Score an NDJSON stream of transactions STREAM_CHUNK_SIZE lines at a time
+    and yield NDJSON result lines, each tagged with its input line number.
+    Only one chunk is held in memory, and the next chunk is read only after
+    the previous results were consumed, so a slow reader slows down the upload.
+    """
+    chunk = []
+
+    def flush():
+        transactions = [t for _, t, error in chunk if error is None]
+        try:
+            with stream_chunk_latency.time():
+                scored = iter(score_transactions(transactions, 'stream_row')[0])
+        except Exception as e:
+            prediction_errors.labels(error_type='model_inference').inc()
+            scored = iter([{"error": f"prediction failed: {str(e)}"}] * len(transactions))
+        lines = []
+        for line_number, _, error in chunk:
+            if error is not None:
+                prediction_errors.labels(error_type='stream_row').inc()
+                result = {"error": error}
+            else:
+                result = next(scored)
+            lines.append(json.dumps({"line": line_number, **result}))
+        return '\n'.join(lines) + '\n'
+
+    for record in read_ndjson(stream):
+        chunk.append(record)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield flush()
+            chunk = []
+    if chunk:
+        yield flush()
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """
@@ -129,11 +615,7 @@ def health():
               type: string
               description: Current timestamp
     """
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "model_version": model_version
-    }), 200
+    return jsonify(health_status()), 200
 
 
 @app.route('/metrics', methods=['GET'])
@@ -145,7 +627,7 @@ def metrics():
       200:
         description: Prometheus metrics
     """
-    return generate_latest(REGISTRY), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return generate_latest(metrics_registry()), 200, {'Content-Type': 'text/plain; charset=utf-8'}
 
 @app.route('/api/v1/model_version', methods=['GET'])
 def get_model_version():
@@ -166,11 +648,11 @@ def get_model_version():
             train_date:
               type: string
               description: Training date of the model
+            fingerprint:
+              type: string
+              description: Hash of the training inputs (data, features, hyperparameters, library versions)
     """
-    return {"model_version": model_version,
-            "git_hash": git_commit,
-            "train_date": str(train_date)
-            }, 200
+    return model_version_info(), 200
 
 
 @app.route('/api/v1/predict', methods=['POST'])
@@ -223,54 +705,107 @@ def predict():
         description: Missing or invalid JSON data
       500:
         description: Internal server error
+      503:
+        description: Micro-batch queue is full
     """
-    if model_version != '0.1':
-        prediction_errors.labels(error_type='bad_model_version').inc()
-        return jsonify({"error": f"Model version mismatch: expected 0.1, got {model_version}"}), 500
-
     try:
         with prediction_latency.time():
+            started = time.perf_counter()
             data = request.get_json()
-            if not data:
-                prediction_errors.labels(error_type='no_json').inc()
-                return jsonify({"error": "No JSON data provided"}), 400
-
-            # Extract fields
-            amount = data.get('amount')
-            product_category = data.get('product_category')
-            time_str = data.get('time')
-            address_state = data.get('address_state')
-            gender = data.get('gender')
-            credit_score = data.get('credit_score')
-
-            if (amount is None
-                or product_category is None
-                or gender is None
-                or credit_score is None
-                or time_str is None
-                or address_state is None):
-                prediction_errors.labels(error_type='missing_fields').inc()
-                return jsonify({"error": "Missing required fields"}), 400
+            stage_timers['request_decode'].observe(time.perf_counter() - started)
+            payload, status = predict_transaction(data)
+            started = time.perf_counter()
+            response = jsonify(payload)
+            stage_timers['response_encode'].observe(time.perf_counter() - started)
+            return response, status
 
-            try:
-                input_df = create_input_dataframe(amount, product_category, time_str, address_state, gender, credit_score)
-            except ValueError as e:
-                prediction_errors.labels(error_type='data_preparation').inc()
-                return jsonify({"error": f"Data preparation failed: {str(e)}"}), 400
+    except Exception as e:
+        prediction_errors.labels(error_type='unknown').inc()
+        return jsonify({"error": str(e)}), 500
 
-            try:
-                prediction = run_model(input_df)
-            except Exception as e:
-                prediction_errors.labels(error_type='model_inference').inc()
-                return jsonify({"error": f"prediction failed: {str(e)}"}), 500
 
-            prediction_counter.labels(status='success').inc()
-            return jsonify({"fraud_probability": min(1.0, max(0.0, prediction))}), 200
+@app.route('/api/v1/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict fraud probabilities for a batch of transactions.
+    Invalid transactions are reported per row and do not fail the batch.
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            transactions:
+              type: array
+              description: Transactions with the same fields as /api/v1/predict
+              items:
+                type: object
+          required:
+            - transactions
+    responses:
+      200:
+        description: Per-transaction results, in request order
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              description: Either fraud_probability or error for each transaction
+              items:
+                type: object
+            n_success:
+              type: integer
+              description: Number of scored transactions
+            n_errors:
+              type: integer
+              description: Number of rejected transactions
+      400:
+        description: Missing or invalid JSON data
+      413:
+        description: Batch larger than MAX_BATCH_SIZE
+      500:
+        description: Internal server error
+    """
+    try:
+        with prediction_latency.time():
+            payload, status = predict_transaction_batch(request.get_json(silent=True))
+            return jsonify(payload), status
 
     except Exception as e:
         prediction_errors.labels(error_type='unknown').inc()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/v1/predict_stream', methods=['POST'])
+def predict_stream():
+    """
+    Score a newline-delimited JSON stream of transactions.
+    Results are streamed back as NDJSON while the body is still uploading.
+    ---
+    consumes:
+      - application/x-ndjson
+    produces:
+      - application/x-ndjson
+    parameters:
+      - name: body
+        in: body
+        required: true
+        description: One transaction per line, with the same fields as /api/v1/predict
+        schema:
+          type: string
+    responses:
+      200:
+        description: One line per input line with line and either fraud_probability or error
+      500:
+        description: Internal server error
+    """
+    if model_version != '0.1':
+        prediction_errors.labels(error_type='bad_model_version').inc()
+        return jsonify({"error": f"Model version mismatch: expected 0.1, got {model_version}"}), 500
+
+    return Response(stream_with_context(predict_ndjson(request.stream)), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8081))
     host = os.environ.get('HOST', '127.0.0.1')
@@ -0,0 +1,257 @@
+"""Fraud Detection Prediction API - asyncio (ASGI) entry point
+
+Serves the same routes as fraud_prediction.py from a single event loop, so
+one process can keep thousands of keep-alive connections open. Scoring is
+CPU-bound and runs on a small, bounded thread pool; requests beyond the
+pool's capacity wait on the event loop without holding a thread.
+
+Run with:
+    python src/fraud_prediction_asgi.py
+or
+    uvicorn fraud_prediction_asgi:app --app-dir src --port 8081
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import generate_latest
+
+import fraud_prediction as service
+
+SCORING_THREADS = int(os.environ.get('SCORING_THREADS', min(4, os.cpu_count() or 1)))
+SCORING_QUEUE_DEPTH = int(os.environ.get('SCORING_QUEUE_DEPTH', 4 * SCORING_THREADS))
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 1024 * 1024))
+CORS_ORIGINS = ('http://localhost', 'http://127.0.0.1')
+
+executor = ThreadPoolExecutor(max_workers=SCORING_THREADS, thread_name_prefix='scoring')
+_scoring_slots = None
+
+
+class BodyTooLarge(Exception):
+    """Raised when a request body exceeds MAX_BODY_BYTES."""
+
+
+def _slots():
+    """Semaphore bounding the scoring jobs handed to the executor (created inside the running loop)."""
+    global _scoring_slots
+    if _scoring_slots is None:
+        _scoring_slots = asyncio.Semaphore(SCORING_QUEUE_DEPTH)
+    return _scoring_slots
+
+
+async def run_scoring(func, *args):
+    """Run a CPU-bound scoring function on the executor, at most SCORING_QUEUE_DEPTH at a time."""
+    async with _slots():
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def read_body(receive):
+    """Read the complete request body."""
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        chunks.append(chunk)
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+class RequestStream:
+    """
+    Blocking, file-like view of a request body for code running on the
+    executor: readline() receives body messages from the event loop only as
+    far as it needs them, so the body is never held in memory as a whole.
+    """
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.buffer = bytearray()
+        self.pos = 0
+        self.more_body = True
+
+    def _fill(self):
+        message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+        del self.buffer[:self.pos]
+        self.pos = 0
+        self.buffer += message.get('body', b'')
+        # an http.disconnect has no more_body and ends the body
+        self.more_body = message.get('more_body', False)
+
+    def readline(self, limit=-1):
+        """Read up to and including the next newline, at most limit bytes."""
+        while True:
+            end = self.buffer.find(b'\n', self.pos) + 1
+            if end or not self.more_body or 0 <= limit <= len(self.buffer) - self.pos:
+                break
+            self._fill()
+        stop = end or len(self.buffer)
+        if limit >= 0:
+            stop = min(stop, self.pos + limit)
+        line = bytes(self.buffer[self.pos:stop])
+        self.pos = stop
+        return line
+
+
+def cors_headers(scope):
+    """CORS headers for browser calls from localhost, matching the Flask app."""
+    if not scope['path'].startswith('/api/'):
+        return []
+    origin = dict(scope.get('headers', [])).get(b'origin', b'').decode('latin-1')
+    # strip the port of http://localhost:8080
+    if origin.rsplit(':', 1)[0] not in CORS_ORIGINS and origin not in CORS_ORIGINS:
+        return []
+    return [(b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-headers', b'content-type'),
+            (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+            (b'vary', b'Origin')]
+
+
+async def send_response(send, scope, status, body, content_type=b'application/json'):
+    """Send a complete response."""
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode('utf-8')
+    headers = [(b'content-type', content_type),
+               (b'content-length', str(len(body)).encode('ascii'))] + cors_headers(scope)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def score_request(func, body, timed=False):
+    """
+    Decode a JSON body and score it with one of the service's predict
+    functions. With timed, the decoding is recorded as the request_decode stage.
+    """
+    with service.prediction_latency.time():
+        started = time.perf_counter()
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            service.prediction_errors.labels(error_type='no_json').inc()
+            return {"error": "Invalid JSON data"}, 400
+        if timed:
+            service.stage_timers['request_decode'].observe(time.perf_counter() - started)
+        # like the Flask routes: the predict functions return their own 400s, anything raised is a 500
+        try:
+            return func(data)
+        except Exception as e:
+            service.prediction_errors.labels(error_type='unknown').inc()
+            return {"error": str(e)}, 500
+
+
+async def predict(scope, receive, send):
+    """POST /api/v1/predict"""
+    payload, status = await run_scoring(score_request, service.predict_transaction, await read_body(receive), True)
+    started = time.perf_counter()
+    body = json.dumps(payload).encode('utf-8')
+    service.stage_timers['response_encode'].observe(time.perf_counter() - started)
+    await send_response(send, scope, status, body)
+
+
+async def predict_batch(scope, receive, send):
+    """POST /api/v1/predict_batch"""
+    payload, status = await run_scoring(score_request, service.predict_transaction_batch, await read_body(receive))
+    await send_response(send, scope, status, payload)
+
+
+async def predict_stream(scope, receive, send):
+    """
+    POST /api/v1/predict_stream
+
+    Like the Flask route, results are sent as NDJSON while the body is still
+    uploading: each chunk of lines is read and scored on the executor, and
+    the next one only after its results were sent. MAX_BODY_BYTES does not
+    apply, only MAX_LINE_BYTES per line.
+    """
+    if service.model_version != '0.1':
+        service.prediction_errors.labels(error_type='bad_model_version').inc()
+        await send_response(send, scope, 500,
+                            {"error": f"Model version mismatch: expected 0.1, got {service.model_version}"})
+        return
+
+    results = service.predict_ndjson(RequestStream(receive, asyncio.get_running_loop()))
+    headers = [(b'content-type', b'application/x-ndjson')] + cors_headers(scope)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    while (lines := await run_scoring(next, results, None)) is not None:
+        await send({'type': 'http.response.body', 'body': lines.encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def health(scope, receive, send):
+    """GET /health"""
+    await send_response(send, scope, 200, service.health_status())
+
+
+async def model_version(scope, receive, send):
+    """GET /api/v1/model_version"""
+    await send_response(send, scope, 200, service.model_version_info())
+
+
+async def metrics(scope, receive, send):
+    """GET /metrics"""
+    await send_response(send, scope, 200, generate_latest(service.metrics_registry()), b'text/plain; charset=utf-8')
+
+
+ROUTES = {
+    ('POST', '/api/v1/predict'): predict,
+    ('POST', '/api/v1/predict_batch'): predict_batch,
+    ('POST', '/api/v1/predict_stream'): predict_stream,
+    ('GET', '/health'): health,
+    ('GET', '/api/v1/model_version'): model_version,
+    ('GET', '/metrics'): metrics,
+}
+
+
+async def lifespan(receive, send):
+    """Handle ASGI startup and shutdown; the executor is drained on shutdown."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path']
+    if method == 'OPTIONS' and path.startswith('/api/'):
+        await send_response(send, scope, 204, b'')
+        return
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        allowed = any(route_path == path for _, route_path in ROUTES)
+        await send_response(send, scope, 405 if allowed else 404,
+                            {"error": "Method not allowed" if allowed else "Not found"})
+        return
+    try:
+        await handler(scope, receive, send)
+    except BodyTooLarge as e:
+        service.prediction_errors.labels(error_type='body_too_large').inc()
+        await send_response(send, scope, 413, {"error": str(e)})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app,
+                host=os.environ.get('HOST', '127.0.0.1'),
+                port=int(os.environ.get('PORT', 8081)),
+                timeout_keep_alive=int(os.environ.get('KEEP_ALIVE_TIMEOUT', 75)),
+                lifespan='on')
@@ -0,0 +1,256 @@
+"""Microbenchmarks of the /api/v1/predict hot path
+
+Times the pieces a request is made of, against the real artifacts in
+model/, one stage at a time:
+
+    json_parse                    request body -> dict (Flask's JSON provider)
+    validate                      _validate_transaction, the checks of
+                                  predict_transaction before encoding
+    encode_product / _gender /    each encoder call of create_input_dataframe
+    encode_state / encode_hour
+    build_frames                  the per-group one-row DataFrames
+    concat                        the pd.concat into the model input
+    create_input_dataframe        all of the above together
+    vectorizer_encode             FeatureVectorizer.encode (numpy/compiled path)
+    run_model[<artifact>]         run_model with each model family in model/
+    engine[<artifact>]            the compiled engine of each family, if any
+    jsonify                       response payload -> Flask response
+    predict_transaction           validation, encoding and scoring together
+
+Every stage is warmed up, then timed over --repeat rounds of --number
+calls (by default as many as take 50ms); the median round gives ns/op. A separate pass under tracemalloc
+records the peak memory allocated by one call and the memory blocks a call
+leaves behind. Results are JSON, so a run can be committed and later runs
+compared against it:
+
+    python src/hot_path_benchmark.py --output benchmarks/hot_path.json
+    python src/hot_path_benchmark.py --compare benchmarks/hot_path.json --filter concat run_model
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine
+from model_evaluation import load_artifacts
+
+REPORT_VERSION = 1
+
+TRANSACTION = {
+    'amount': 120.5,
+    'product_category': 'category_03',
+    'time': '2024-05-03 06:51:00',
+    'address_state': 'state_31',
+    'gender': 'm',
+    'credit_score': 7,
+}
+
+
+def _calls_per_round(fn, target_ns):
+    """Smallest number of calls (1, 2, 5, 10, 20, ...) that takes at least target_ns, like timeit's autorange."""
+    number = 1
+    while True:
+        for factor in (1, 2, 5):
+            started = time.perf_counter_ns()
+            for _ in range(number * factor):
+                fn()
+            if time.perf_counter_ns() - started >= target_ns:
+                return number * factor
+        number *= 10
+
+
+def measure(fn, warmup=100, repeat=7, number=None, round_ns=50_000_000):
+    """
+    Time fn() after warmup calls: repeat rounds of number calls (by default
+    as many as take round_ns). Returns the median, minimum and maximum round
+    in ns per call and the calls per round.
+    """
+    for _ in range(warmup):
+        fn()
+    number = number or _calls_per_round(fn, round_ns)
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter_ns() - started) / number)
+    return {'ns_per_op': statistics.median(rounds), 'ns_min': min(rounds), 'ns_max': max(rounds), 'number': number}
+
+
+def measure_allocations(fn, calls=20):
+    """
+    Peak bytes allocated during one call (median over calls) and memory
+    blocks still allocated per call afterwards, under tracemalloc.
+    """
+    fn()
+    tracemalloc.start()
+    try:
+        peaks = []
+        blocks = sys.getallocatedblocks()
+        for _ in range(calls):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = (sys.getallocatedblocks() - blocks) / calls
+    finally:
+        tracemalloc.stop()
+    return {'alloc_peak_bytes': int(statistics.median(peaks)), 'alloc_blocks_retained': round(retained, 2)}
+
+
+@contextmanager
+def _serving(service, model_data):
+    """Make service score with model_data's model and encoders while the block runs."""
+    names = ('model', 'enc_product', 'enc_hour', 'enc_gender', 'enc_state',
+             'product_cols', 'hour_cols', 'gender_cols', 'state_cols')
+    saved = {name: getattr(service, name) for name in names}
+    for name in names:
+        setattr(service, name, model_data[name])
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(service, name, value)
+
+
+def hot_path_stages(service, artifacts, transaction=TRANSACTION):
+    """
+    The benchmarked stages as {name: zero-argument callable}. service is the
+    imported fraud_prediction module, artifacts maps artifact names to
+    model.pkl-style dicts.
+    """
+    t = transaction
+    args = (t['amount'], t['product_category'], t['time'], t['address_state'], t['gender'], t['credit_score'])
+    body = json.dumps(t).encode('utf-8')
+    s = service
+
+    def encode_hour():
+        return s.enc_hour.transform(np.array([datetime.fromisoformat(t['time']).hour]).reshape(1, -1))[0]
+
+    product = s.enc_product.transform(np.array([t['product_category']]).reshape(1, -1))[0]
+    gender = s.enc_gender.transform(np.array([t['gender']]).reshape(1, -1))[0]
+    state = s.enc_state.transform(np.array([t['address_state']]).reshape(1, -1))[0]
+    hour = encode_hour()
+
+    def build_frames():
+        return (pd.DataFrame(product.reshape(1, -1), columns=s.product_cols, index=[0]),
+                pd.DataFrame(gender.reshape(1, -1), columns=s.gender_cols, index=[0]),
+                pd.DataFrame(state.reshape(1, -1), columns=s.state_cols, index=[0]),
+                pd.DataFrame(hour.reshape(1, -1), columns=s.hour_cols, index=[0]))
+
+    product_df, gender_df, _, hour_df = build_frames()
+    vectorizer = FeatureVectorizer.from_model_data(s.model_data)
+
+    def jsonify():
+        with s.app.app_context():
+            return s.jsonify({'fraud_probability': 0.1})
+
+    stages = {
+        'json_parse': lambda: s.app.json.loads(body),
+        'validate': lambda: s._validate_transaction(t),
+        'encode_product': lambda: s.enc_product.transform(np.array([t['product_category']]).reshape(1, -1)),
+        'encode_gender': lambda: s.enc_gender.transform(np.array([t['gender']]).reshape(1, -1)),
+        'encode_state': lambda: s.enc_state.transform(np.array([t['address_state']]).reshape(1, -1)),
+        'encode_hour': encode_hour,
+        'build_frames': build_frames,
+        'concat': lambda: pd.concat([hour_df, product_df, gender_df, pd.DataFrame({'amount': [t['amount']]})],
+                                    axis=1),
+        'create_input_dataframe': lambda: s.create_input_dataframe(*args),
+        'vectorizer_encode': lambda: vectorizer.encode(*args),
+    }
+    for name, model_data in artifacts.items():
+        if 'error' in model_data:
+            continue
+        with _serving(s, model_data):
+            input_df = s.create_input_dataframe(*args)
+        stages[f'run_model[{name}]'] = _run_model_stage(s, model_data, input_df)
+        family_vectorizer = FeatureVectorizer.from_model_data(model_data)
+        engine = compile_engine(model_data['model'], family_vectorizer)
+        if engine is not None:
+            encoded = family_vectorizer.encode(*args)
+            stages[f'engine[{name}]'] = lambda engine=engine, encoded=encoded: engine.predict_one(encoded)
+    stages['jsonify'] = jsonify
+    stages['predict_transaction'] = lambda: s.predict_transaction(t)
+    return stages
+
+
+def _run_model_stage(service, model_data, input_df):
+    """run_model of service with model_data's model."""
+    def stage():
+        with _serving(service, model_data):
+            return service.run_model(input_df)
+    return stage
+
+
+def run(service, artifacts, warmup=100, repeat=7, number=None, only=None, log=print):
+    """Benchmark the hot path stages (those containing one of only, if given); returns the report dict."""
+    results = {}
+    for name, fn in hot_path_stages(service, artifacts).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        results[name] = {**measure(fn, warmup, repeat, number), **measure_allocations(fn)}
+        log(f"{name:<40} {results[name]['ns_per_op']:>12,.0f} ns/op {results[name]['alloc_peak_bytes']:>10,} B")
+    return {
+        'report_version': REPORT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__},
+        'config': {'warmup': warmup, 'repeat': repeat, 'number': number or 'auto',
+                   'feature_vectorizer': service.FEATURE_VECTORIZER, 'inference_engine': service.INFERENCE_ENGINE},
+        'stages': results,
+    }
+
+
+def compare(report, baseline):
+    """Before/after table of the stages in both reports, with the ns/op ratio."""
+    lines = [f"{'stage':<40} {'before ns':>12} {'after ns':>12} {'ratio':>7} {'before B':>10} {'after B':>10}"]
+    for name, after in report['stages'].items():
+        before = baseline.get('stages', {}).get(name)
+        if before is None:
+            continue
+        lines.append(f"{name:<40} {before['ns_per_op']:>12,.0f} {after['ns_per_op']:>12,.0f} "
+                     f"{after['ns_per_op'] / before['ns_per_op']:>7.2f} {before['alloc_peak_bytes']:>10,} "
+                     f"{after['alloc_peak_bytes']:>10,}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line entry point; run from the repository root."""
+    parser = argparse.ArgumentParser(description="Microbenchmark the /api/v1/predict hot path.")
+    parser.add_argument('--model-dir', default='model', help="artifacts for run_model (default: model)")
+    parser.add_argument('--warmup', type=int, default=100, help="untimed calls per stage (default: 100)")
+    parser.add_argument('--repeat', type=int, default=7, help="timed rounds per stage (default: 7)")
+    parser.add_argument('--number', type=int, help="calls per round (default: as many as take 50ms)")
+    parser.add_argument('--filter', nargs='*', help="only stages whose name contains one of these")
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--compare', help="report JSON to compare with")
+    args = parser.parse_args(argv)
+
+    # score every request; a cache hit would skip the stages being measured
+    os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+    import fraud_prediction
+
+    report = run(fraud_prediction, load_artifacts(args.model_dir), args.warmup, args.repeat, args.number,
+                 args.filter)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+"""Compiled inference engines for the prediction API
+
+An engine is compiled once from a fitted sklearn model and scores
+EncodedTransactions from feature_vectorizer.py directly, without going
+through sklearn's input validation and predict_proba machinery.
+compile_engine returns None for models it does not recognize, in which
+case the API keeps using run_model.
+
+scikit-learn is only imported by compile_engine: restoring an engine from
+a model bundle (restore_engine) does not load it, which keeps it out of
+the startup of a bundle-served API.
+"""
+import math
+import threading
+from bisect import bisect_left
+
+import numpy as np
+from scipy.special import expit
+
+from feature_vectorizer import EncodedTransaction
+
+
+def _sigmoid(z):
+    """Logistic function for a Python float, computed like scipy.special.expit."""
+    try:
+        return 1.0 / (1.0 + math.exp(-z))
+    except OverflowError:
+        return 0.0
+
+
+def _group_table(values, start, stop):
+    """
+    Slice the per-column values of one one-hot group into a lookup table.
+    A trailing 0.0 is appended so that the code -1 (ignored category) adds nothing.
+    """
+    return [float(v) for v in values[start:stop]] + [0.0]
+
+
+class LogisticScorer:
+    """
+    Closed-form scorer for a binary LogisticRegression.
+
+    The logit of a transaction is the intercept plus one table entry per
+    one-hot group plus coef_amount * amount, so a request is three list
+    lookups, a multiply-add and a sigmoid. Results agree with predict_proba
+    up to floating point summation order (about 1e-15).
+    """
+
+    name = 'logistic_regression'
+
+    def __init__(self, coef, intercept, vectorizer):
+        coef = np.asarray(coef, dtype=np.float64).reshape(-1)
+        v = vectorizer
+        self.vectorizer = vectorizer
+        self.coef = coef
+        self.intercept = float(np.asarray(intercept).reshape(-1)[0])
+        self.hour_table = _group_table(coef, v.hour_offset, v.product_offset)
+        self.product_table = _group_table(coef, v.product_offset, v.gender_offset)
+        self.gender_table = _group_table(coef, v.gender_offset, v.amount_col)
+        self.amount_coef = float(coef[v.amount_col])
+
+    @classmethod
+    def from_model(cls, model, vectorizer):
+        """Compile from a fitted LogisticRegression (or SGDClassifier with log loss)."""
+        return cls(model.coef_, model.intercept_, vectorizer)
+
+    @classmethod
+    def from_arrays(cls, arrays, params, vectorizer):
+        """Restore from the output of arrays() and params()."""
+        return cls(arrays['coef'], arrays['intercept'], vectorizer)
+
+    def arrays(self):
+        """Numeric parameters, for model_bundle."""
+        return {'coef': self.coef, 'intercept': np.array([self.intercept])}
+
+    def params(self):
+        """JSON-serializable parameters, for model_bundle."""
+        return {}
+
+    def predict_one(self, encoded):
+        """Fraud probability of one EncodedTransaction."""
+        z = (self.intercept
+             + self.hour_table[encoded.hour]
+             + self.product_table[encoded.product]
+             + self.gender_table[encoded.gender]
+             + self.amount_coef * encoded.amount)
+        return _sigmoid(z)
+
+    def predict_batch(self, X):
+        """Fraud probabilities of the rows of a vectorizer matrix."""
+        z = X @ self.coef + self.intercept
+        with np.errstate(over='ignore'):
+            return 1.0 / (1.0 + np.exp(-z))
+
+
+class ForestScorer:
+    """
+    Array-backed scorer for a binary RandomForestClassifier.
+
+    All trees are flattened into contiguous arrays (feature, threshold,
+    children, leaf probability); leaves point to themselves so that a batch
+    can be traversed with a fixed number of vectorized steps. Probabilities
+    are computed like sklearn (float32 features, leaf value normalized per
+    tree, trees accumulated in order and divided by the tree count), so they
+    are identical to predict_proba.
+
+    With lookup=True, single transactions are scored from per-combination
+    tables: for a fixed hour/product/gender the forest is a step function of
+    amount, so it is compiled (on first use of the combination, or all at
+    once with precompile) into sorted amount breakpoints and the forest
+    probability on each interval. Scoring is then one bisect.
+    """
+
+    name = 'random_forest'
+
+    def __init__(self, feature, threshold, left, right, value, missing_left, roots, max_depth,
+                 vectorizer, lookup=True):
+        self.vectorizer = vectorizer
+        self.lookup = lookup
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.n_trees = len(self.roots)
+        self.max_depth = int(max_depth)
+        self._roots = self.roots.tolist()
+        self._nodes = None
+        self._tables = {}
+
+    @property
+    def is_leaf(self):
+        """Leaf mask of the nodes; leaves point to themselves."""
+        return self.left == np.arange(len(self.left))
+
+    def _node_lists(self):
+        """
+        The node arrays as Python lists (feature, threshold, left, right,
+        value, is_leaf), which are faster than array indexing for single-row
+        traversal. Built on first use and dropped by precompile, so a forest
+        served from lookup tables only holds its (memory-mapped) arrays.
+        """
+        nodes = self._nodes
+        if nodes is None:
+            nodes = self._nodes = (self.feature.tolist(), self.threshold.tolist(), self.left.tolist(),
+                                   self.right.tolist(), self.value.tolist(), self.is_leaf.tolist())
+        return nodes
+
+    @classmethod
+    def from_model(cls, model, vectorizer, lookup=True):
+        """Flatten the trees of a fitted RandomForestClassifier."""
+        features, thresholds, lefts, rights, values, missing_left, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            ids = np.arange(offset, offset + n)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, ids, tree.children_left + offset))
+            rights.append(np.where(leaf, ids, tree.children_right + offset))
+            # normalized exactly like DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value[:, 1] / normalizer)
+            missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(n, dtype=np.uint8)).astype(bool))
+            roots.append(offset)
+            offset += n
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(values), np.concatenate(missing_left),
+                   roots, max(estimator.tree_.max_depth for estimator in model.estimators_),
+                   vectorizer, lookup=lookup)
+
+    @classmethod
+    def from_arrays(cls, arrays, params, vectorizer, lookup=True):
+        """Restore from the output of arrays() and params()."""
+        return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'], arrays['value'],
+                   arrays['missing_left'], arrays['roots'], params['max_depth'], vectorizer, lookup=lookup)
+
+    def arrays(self):
+        """
+        Numeric parameters, for model_bundle. Index arrays are stored as intp,
+        so a memory-mapped bundle is used in place instead of being converted.
+        """
+        return {'feature': self.feature, 'threshold': self.threshold, 'left': self.left, 'right': self.right,
+                'value': self.value, 'missing_left': self.missing_left, 'roots': self.roots}
+
+    def params(self):
+        """JSON-serializable parameters, for model_bundle."""
+        return {'max_depth': self.max_depth}
+
+    def _accumulate(self, per_tree):
+        """Average per-tree probabilities (n, n_trees) in sklearn's summation order."""
+        proba = np.zeros(per_tree.shape[0])
+        for t in range(self.n_trees):
+            proba += per_tree[:, t]
+        proba /= self.n_trees
+        return proba
+
+    def predict_batch(self, X):
+        """Fraud probabilities of the rows of a vectorizer matrix."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self._accumulate(self.value[node])
+
+    def _traverse(self, active, amount):
+        """Score one transaction by walking every tree in Python."""
+        amount_col = self.vectorizer.amount_col
+        feature, threshold, left, right, value, is_leaf = self._node_lists()
+        proba = 0.0
+        for node in self._roots:
+            while not is_leaf[node]:
+                f = feature[node]
+                x = amount if f == amount_col else (1.0 if f in active else 0.0)
+                node = left[node] if x <= threshold[node] else right[node]
+            proba += value[node]
+        return proba / self.n_trees
+
+    def _active_columns(self, encoded):
+        """Column indices of the one-hot features set by an EncodedTransaction."""
+        v = self.vectorizer
+        return frozenset(offset + code for offset, code in ((v.hour_offset, encoded.hour),
+                                                            (v.product_offset, encoded.product),
+                                                            (v.gender_offset, encoded.gender))
+                         if code >= 0)
+
+    def _tree_steps(self, root, active, nodes):
+        """
+        Step function of one tree over amount for fixed one-hot features
+        (nodes from _node_lists): returns (finite interval upper bounds,
+        probability per interval).
+        """
+        amount_col = self.vectorizer.amount_col
+        feature, threshold, left, right, value, is_leaf = nodes
+        uppers, probas = [], []
+        stack = [(root, -math.inf, math.inf)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if is_leaf[node]:
+                uppers.append(hi)
+                probas.append(value[node])
+                continue
+            f = feature[node]
+            t = threshold[node]
+            if f != amount_col:
+                x = 1.0 if f in active else 0.0
+                stack.append((left[node] if x <= t else right[node], lo, hi))
+                continue
+            # push right first so intervals come out in increasing amount order
+            if max(lo, t) < hi:
+                stack.append((right[node], max(lo, t), hi))
+            if lo < min(hi, t):
+                stack.append((left[node], lo, min(hi, t)))
+        return np.array(uppers[:-1]), np.array(probas)
+
+    def _compile_table(self, active):
+        """Merge the step functions of all trees into one (breakpoints, probabilities) table."""
+        nodes = self._node_lists()
+        steps = [self._tree_steps(root, active, nodes) for root in self._roots]
+        breaks = np.unique(np.concatenate([uppers for uppers, _ in steps]))
+        per_tree = np.empty((len(breaks) + 1, self.n_trees))
+        for t, (uppers, probas) in enumerate(steps):
+            # amount in (breaks[k-1], breaks[k]] falls into the same interval of every tree
+            per_tree[:, t] = probas[np.concatenate([np.searchsorted(uppers, breaks, side='left'),
+                                                    [len(uppers)]])]
+        proba = self._accumulate(per_tree)
+        keep = proba[1:] != proba[:-1]
+        return breaks[keep].tolist(), [float(proba[0])] + proba[1:][keep].tolist()
+
+    def precompile(self):
+        """Compile the lookup tables of every known category combination."""
+        v = self.vectorizer
+        for hour in range(-1, len(v.hour_index)):
+            for product in range(-1, len(v.product_index)):
+                for gender in range(-1, len(v.gender_index)):
+                    active = self._active_columns(EncodedTransaction(hour, product, gender, 0.0))
+                    if active not in self._tables:
+                        self._tables[active] = self._compile_table(active)
+        # every combination has its table now, the node lists are no longer needed
+        self._nodes = None
+
+    def predict_one(self, encoded):
+        """Fraud probability of one EncodedTransaction."""
+        active = self._active_columns(encoded)
+        # sklearn compares float32 features against the float64 thresholds
+        amount = float(np.float32(encoded.amount))
+        if amount != amount:
+            # missing values follow missing_go_to_left, which only the batch traversal handles
+            row = self.vectorizer.fill(encoded, np.zeros(self.vectorizer.n_features))
+            return float(self.predict_batch(row.reshape(1, -1))[0])
+        if not self.lookup:
+            return self._traverse(active, amount)
+        table = self._tables.get(active)
+        if table is None:
+            table = self._tables[active] = self._compile_table(active)
+        breaks, probas = table
+        return probas[bisect_left(breaks, amount)]
+
+
+def _activate(name, x):
+    """Apply an MLPClassifier hidden activation to x in place."""
+    if name == 'relu':
+        np.maximum(x, 0, out=x)
+    elif name == 'tanh':
+        np.tanh(x, out=x)
+    elif name == 'logistic':
+        expit(x, out=x)
+    elif name != 'identity':
+        raise ValueError(f"Unsupported activation: {name}")
+    return x
+
+
+class MLPScorer:
+    """
+    Pure-NumPy float32 forward pass for a binary MLPClassifier.
+
+    For a single transaction the first layer is a gather-and-sum of the
+    weight rows of the active one-hot columns plus amount times the amount
+    row, instead of a full matmul; hidden layers run in preallocated
+    per-thread buffers. Because the weights are float32, probabilities agree
+    with predict_proba to within 1e-5 absolute rather than exactly.
+    """
+
+    name = 'mlp'
+
+    def __init__(self, coefs, intercepts, activation, vectorizer, dtype=np.float32):
+        self.vectorizer = vectorizer
+        self.dtype = dtype
+        self.activation = activation
+        self.coefs = [np.ascontiguousarray(c, dtype=dtype) for c in coefs]
+        self.intercepts = [np.ascontiguousarray(b, dtype=dtype) for b in intercepts]
+        self.amount_row = self.coefs[0][vectorizer.amount_col]
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, vectorizer):
+        """Export the weights of a fitted MLPClassifier."""
+        return cls(model.coefs_, model.intercepts_, model.activation, vectorizer)
+
+    @classmethod
+    def from_arrays(cls, arrays, params, vectorizer):
+        """Restore from the output of arrays() and params()."""
+        n_layers = params['n_layers']
+        return cls([arrays[f'coef_{i}'] for i in range(n_layers)],
+                   [arrays[f'intercept_{i}'] for i in range(n_layers)],
+                   params['activation'], vectorizer)
+
+    def arrays(self):
+        """Numeric parameters, for model_bundle."""
+        arrays = {f'coef_{i}': c for i, c in enumerate(self.coefs)}
+        arrays.update({f'intercept_{i}': b for i, b in enumerate(self.intercepts)})
+        return arrays
+
+    def params(self):
+        """JSON-serializable parameters, for model_bundle."""
+        return {'n_layers': len(self.coefs), 'activation': self.activation}
+
+    def _buffers(self):
+        """Per-thread activation buffers, one per layer."""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = [np.empty(c.shape[1], dtype=self.dtype) for c in self.coefs]
+            self._local.scratch = np.empty(self.coefs[0].shape[1], dtype=self.dtype)
+        return buffers
+
+    def predict_one(self, encoded):
+        """Fraud probability of one EncodedTransaction."""
+        buffers = self._buffers()
+        scratch = self._local.scratch
+        v = self.vectorizer
+        W = self.coefs[0]
+
+        h = buffers[0]
+        np.copyto(h, self.intercepts[0])
+        for offset, code in ((v.hour_offset, encoded.hour),
+                             (v.product_offset, encoded.product),
+                             (v.gender_offset, encoded.gender)):
+            if code >= 0:
+                h += W[offset + code]
+        np.multiply(self.amount_row, self.dtype(encoded.amount), out=scratch)
+        h += scratch
+
+        for i in range(1, len(self.coefs)):
+            _activate(self.activation, h)
+            out = buffers[i]
+            np.dot(h, self.coefs[i], out=out)
+            out += self.intercepts[i]
+            h = out
+        return float(expit(h[0]))
+
+    def predict_batch(self, X):
+        """Fraud probabilities of the rows of a vectorizer matrix."""
+        h = np.asarray(X, dtype=self.dtype)
+        for i, (W, b) in enumerate(zip(self.coefs, self.intercepts)):
+            if i > 0:
+                _activate(self.activation, h)
+            h = h @ W
+            h += b
+        return expit(h[:, 0]).astype(np.float64)
+
+
+def _matches_layout(model, vectorizer):
+    """Check that the model was fitted on the vectorizer's column layout."""
+    if getattr(model, 'n_features_in_', None) != vectorizer.n_features:
+        return False
+    names = getattr(model, 'feature_names_in_', None)
+    return names is None or list(names) == vectorizer.columns
+
+
+def compile_engine(model, vectorizer, forest_lookup=True):
+    """
+    Compile a fast engine for model, or return None if the model type or
+    its input layout is not supported.
+    """
+    # a model to compile means sklearn is loaded already; bundles never get here
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.neural_network import MLPClassifier
+
+    if not _matches_layout(model, vectorizer) or len(getattr(model, 'classes_', ())) != 2:
+        return None
+    if isinstance(model, LogisticRegression) or (isinstance(model, SGDClassifier) and model.loss == 'log_loss'):
+        return LogisticScorer.from_model(model, vectorizer)
+    if isinstance(model, RandomForestClassifier) and model.n_outputs_ == 1:
+        return ForestScorer.from_model(model, vectorizer, lookup=forest_lookup)
+    if isinstance(model, MLPClassifier) and model.out_activation_ == 'logistic':
+        return MLPScorer.from_model(model, vectorizer)
+    return None
+
+
+ENGINES = {engine.name: engine for engine in (LogisticScorer, ForestScorer, MLPScorer)}
+
+
+def restore_engine(name, arrays, params, vectorizer, forest_lookup=True):
+    """
+    Rebuild an engine from its arrays() and params(), as stored by model_bundle.
+    """
+    if name == ForestScorer.name:
+        return ForestScorer.from_arrays(arrays, params, vectorizer, lookup=forest_lookup)
+    return ENGINES[name].from_arrays(arrays, params, vectorizer)
@@ -0,0 +1,360 @@
+"""HTTP load benchmark for the prediction API
+
+Starts the service locally (gunicorn with gunicorn.conf.py, or the ASGI
+entry point under uvicorn), or targets a running instance with --url, and
+replays transactions sampled from data/fraud.csv.bz2 against
+/api/v1/predict in two kinds of scenarios:
+
+* closed loop: N keep-alive clients each send the next request as soon as
+  the previous answer arrived (--concurrency 1 8 32), which measures the
+  throughput an instance sustains;
+* open loop: requests arrive at a fixed rate with Poisson spacing whether
+  or not earlier ones finished (--rate 100 400). Latency is measured from
+  the scheduled arrival, so queueing in an overloaded service is counted
+  instead of slowing the load down (no coordinated omission).
+
+The started service runs with the prediction cache off
+(--prediction-cache-size 0): the benchmark replays a limited set of
+payloads, so with the cache on it would measure cache hits instead of
+encoding and scoring.
+
+Each scenario reports throughput, error rate and p50/p95/p99/p99.9 latency.
+Results are written as JSON; --save-baseline stores them as the baseline
+and --baseline compares against one and exits with status 1 when a
+latency percentile or the throughput regressed by more than
+--max-regression, or the error rate exceeds --max-error-rate.
+
+    python src/load_benchmark.py --concurrency 1 8 --rate 200 --duration 20
+    python src/load_benchmark.py --baseline benchmarks/load-baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from features import DATA_PATH, load_transactions
+from feature_vectorizer import TIME_FORMAT
+
+REPORT_VERSION = 1
+PREDICT_PATH = '/api/v1/predict'
+PERCENTILES = {'p50': 50, 'p95': 95, 'p99': 99, 'p99_9': 99.9}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# command lines of the servers the benchmark can start, run from the repository root
+SERVERS = {
+    'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', 'fraud_prediction:app',
+                              '--bind', f'127.0.0.1:{port}'],
+    'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'fraud_prediction_asgi:app', '--app-dir', 'src',
+                          '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+}
+
+
+def sample_payloads(n, data_path=DATA_PATH, seed=0):
+    """n /api/v1/predict request bodies built from random rows of the dataset."""
+    df = load_transactions(data_path)
+    rows = df.sample(n=min(n, len(df)), random_state=seed)
+    payloads = []
+    for row in rows.itertuples(index=False):
+        payloads.append(json.dumps({
+            'amount': float(row.amount),
+            'product_category': str(row.product_category),
+            'time': row.time.strftime(TIME_FORMAT),
+            'address_state': str(row.address_state),
+            'gender': str(row.gender),
+            'credit_score': int(row.credit_score),
+        }).encode('utf-8'))
+    return payloads
+
+
+class Client:
+    """One keep-alive HTTP connection posting JSON bodies."""
+
+    def __init__(self, url, timeout=10):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = parts.path.rstrip('/') + PREDICT_PATH
+        self.timeout = timeout
+        self._connection = None
+
+    def post(self, body):
+        """Send one request; returns True for a 2xx answer."""
+        try:
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+            response = self._connection.getresponse()
+            response.read()
+            return 200 <= response.status < 300
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return False
+
+    def close(self):
+        """Drop the connection; the next request opens a new one."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class Recorder:
+    """Collects (arrival time, latency, success) of the requests of one scenario from many threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def add(self, arrival, latency, ok):
+        """Record one request."""
+        with self._lock:
+            self.samples.append((arrival, latency, ok))
+
+    def summary(self, measure_from, measure_until):
+        """Statistics of the requests that arrived within the measured window."""
+        samples = [s for s in self.samples if measure_from <= s[0] < measure_until]
+        latencies = np.array([latency for _, latency, ok in samples if ok]) * 1000
+        errors = sum(1 for _, _, ok in samples if not ok)
+        elapsed = measure_until - measure_from
+        summary = {
+            'requests': len(samples),
+            'errors': errors,
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'throughput_rps': (len(samples) - errors) / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {},
+        }
+        if len(latencies):
+            summary['latency_ms'] = {name: float(np.percentile(latencies, q)) for name, q in PERCENTILES.items()}
+            summary['latency_ms'].update(mean=float(latencies.mean()), max=float(latencies.max()))
+        return summary
+
+
+def run_closed_loop(url, payloads, concurrency, duration, warmup=0.0):
+    """concurrency clients sending back to back for warmup + duration seconds; returns the summary."""
+    recorder = Recorder()
+    start = time.perf_counter()
+    stop = start + warmup + duration
+
+    def client_loop(offset):
+        client = Client(url)
+        i = offset
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop:
+                break
+            ok = client.post(payloads[i % len(payloads)])
+            recorder.add(sent, time.perf_counter() - sent, ok)
+            i += concurrency
+        client.close()
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(start + warmup, stop)
+
+
+def run_open_loop(url, payloads, rate, duration, warmup=0.0, connections=64, seed=0):
+    """
+    Requests arriving at rate per second (Poisson) for warmup + duration
+    seconds, sent over up to connections keep-alive connections. Latency
+    counts from the scheduled arrival. Returns the summary.
+    """
+    recorder = Recorder()
+    arrivals = queue.Queue()
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    stop = start + warmup + duration
+
+    def sender():
+        client = Client(url)
+        while True:
+            job = arrivals.get()
+            if job is None:
+                break
+            arrival, body = job
+            ok = client.post(body)
+            recorder.add(arrival, time.perf_counter() - arrival, ok)
+        client.close()
+
+    threads = [threading.Thread(target=sender) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    arrival, i = start, 0
+    while True:
+        arrival += rng.exponential(1.0 / rate)
+        if arrival >= stop:
+            break
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        arrivals.put((arrival, payloads[i % len(payloads)]))
+        i += 1
+    for _ in threads:
+        arrivals.put(None)
+    for thread in threads:
+        thread.join()
+    summary = recorder.summary(start + warmup, stop)
+    summary['offered_rps'] = rate
+    return summary
+
+
+def wait_until_healthy(url, timeout=60.0, process=None):
+    """Poll /health until the service answers; raises RuntimeError on timeout or if process exits."""
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"service exited with status {process.returncode} before becoming healthy")
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=1)
+            connection.request('GET', parts.path.rstrip('/') + '/health')
+            if connection.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"service at {url} not healthy after {timeout:.0f}s")
+
+
+@contextmanager
+def start_service(server, port, timeout=60.0, cache_size=0):
+    """
+    Run the service from the repository root while the block executes,
+    with PREDICTION_CACHE_SIZE=cache_size; yields its URL.
+    """
+    env = {**os.environ, 'PREDICTION_CACHE_SIZE': str(cache_size)}
+    process = subprocess.Popen(SERVERS[server](port), cwd=REPO_ROOT, env=env)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_healthy(url, timeout, process)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(results, baseline, max_regression=0.25, max_error_rate=0.0):
+    """
+    Regressions of results against baseline, as messages: a latency
+    percentile more than max_regression above, or throughput more than
+    max_regression below the baseline, or an error rate above
+    max_error_rate. Scenarios missing from the baseline are not compared.
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        if current['error_rate'] > max_error_rate:
+            regressions.append(f"{name}: error rate {current['error_rate']:.2%} above {max_error_rate:.2%}")
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for metric in PERCENTILES:
+            was, now = previous['latency_ms'].get(metric), current['latency_ms'].get(metric)
+            if was and now and now > was * (1 + max_regression):
+                regressions.append(f"{name}: {metric} latency {now:.2f}ms, baseline {was:.2f}ms "
+                                   f"(+{now / was - 1:.0%})")
+        was, now = previous['throughput_rps'], current['throughput_rps']
+        if was and now < was * (1 - max_regression):
+            regressions.append(f"{name}: throughput {now:.1f}/s, baseline {was:.1f}/s (-{1 - now / was:.0%})")
+    return regressions
+
+
+def run_benchmark(url, concurrency=(1, 8), rates=(), duration=10.0, warmup=2.0, payloads=None,
+                  connections=64, cache_size=None, log=print):
+    """
+    Run every scenario against the service at url; returns the results dict.
+    cache_size is the service's PREDICTION_CACHE_SIZE (None if unknown), recorded in the config.
+    """
+    payloads = payloads or sample_payloads(1000)
+    scenarios = {}
+    for n in concurrency:
+        scenarios[f'closed-c{n}'] = run_closed_loop(url, payloads, n, duration, warmup)
+        log(_format(f'closed-c{n}', scenarios[f'closed-c{n}']))
+    for rate in rates:
+        scenarios[f'open-r{rate:g}'] = run_open_loop(url, payloads, rate, duration, warmup, connections)
+        log(_format(f'open-r{rate:g}', scenarios[f'open-r{rate:g}']))
+    return {
+        'report_version': REPORT_VERSION,
+        'started_at': datetime.now().isoformat(),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {'duration_s': duration, 'warmup_s': warmup, 'payloads': len(payloads),
+                   'prediction_cache_size': cache_size},
+        'scenarios': scenarios,
+    }
+
+
+def _format(name, summary):
+    latency = ' '.join(f"{key} {value:.2f}ms" for key, value in summary['latency_ms'].items()
+                       if key in PERCENTILES)
+    return (f"{name}: {summary['throughput_rps']:.1f} req/s, {summary['error_rate']:.2%} errors, "
+            f"{latency}")
+
+
+def main(argv=None):
+    """Command line entry point; returns the exit status."""
+    parser = argparse.ArgumentParser(description="Load test /api/v1/predict and compare with a baseline.")
+    parser.add_argument('--server', choices=list(SERVERS), default='gunicorn',
+                        help="server to start from the repository root (default: gunicorn)")
+    parser.add_argument('--url', help="benchmark a running service instead of starting one")
+    parser.add_argument('--port', type=int, default=8091, help="port of the started service (default: 8091)")
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 8],
+                        help="closed-loop client counts (default: 1 8)")
+    parser.add_argument('--rate', type=float, nargs='*', default=[], help="open-loop arrival rates per second")
+    parser.add_argument('--connections', type=int, default=64, help="connections of open-loop runs (default: 64)")
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds per scenario (default: 10)")
+    parser.add_argument('--warmup', type=float, default=2.0, help="unmeasured seconds first (default: 2)")
+    parser.add_argument('--payloads', type=int, default=1000, help="distinct transactions replayed (default: 1000)")
+    parser.add_argument('--prediction-cache-size', type=int, default=0,
+                        help="PREDICTION_CACHE_SIZE of the started service (default: 0, cache off)")
+    parser.add_argument('--output', default='load-benchmark.json', help="results JSON (default: load-benchmark.json)")
+    parser.add_argument('--baseline', help="baseline JSON to compare with")
+    parser.add_argument('--save-baseline', help="also write the results to this baseline file")
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="allowed relative latency increase / throughput decrease (default: 0.25)")
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help="allowed error rate (default: 0)")
+    args = parser.parse_args(argv)
+
+    payloads = sample_payloads(args.payloads)
+
+    def benchmark(url, cache_size):
+        return run_benchmark(url, args.concurrency, args.rate, args.duration, args.warmup, payloads,
+                             args.connections, cache_size)
+
+    if args.url:
+        # the cache of a running service is not known
+        results = benchmark(args.url, None)
+        results['server'] = args.url
+    else:
+        with start_service(args.server, args.port, cache_size=args.prediction_cache_size) as url:
+            results = benchmark(url, args.prediction_cache_size)
+        results['server'] = args.server
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.max_regression, args.max_error_rate)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    print(f"{len(regressions)} regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Request micro-batching for the prediction API
+
+Concurrent request threads hand their model input to a MicroBatcher, which
+collects inputs for a short window (or until the batch is full), scores
+them with a single batch call and returns each caller its own result.
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+
+class QueueFullError(Exception):
+    """Raised when the micro-batch queue already holds max_queue_depth requests."""
+
+
+_Request = namedtuple('_Request', ['model_input', 'future', 'enqueued'])
+
+
+class MicroBatcher:
+    """
+    Score single requests in micro-batches on a background thread.
+
+    combine turns a list of model inputs into one batch input and
+    score_batch returns one probability per row of it. A batch is scored
+    when max_batch_size requests are waiting or window seconds after its
+    first request arrived, whichever comes first. The optional Prometheus
+    histograms receive the realized batch size and each request's queueing
+    delay.
+    """
+
+    def __init__(self, combine, score_batch, window=0.002, max_batch_size=64, max_queue_depth=1024,
+                 timeout=5.0, batch_size_histogram=None, queue_delay_histogram=None):
+        self.combine = combine
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.batch_size_histogram = batch_size_histogram
+        self.queue_delay_histogram = queue_delay_histogram
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        """Start the worker thread, again in each forked worker process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name='micro-batcher', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, model_input):
+        """
+        Queue one model input and block until its probability is available.
+        Raises QueueFullError when the queue is full.
+        """
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait(_Request(model_input, future, time.perf_counter()))
+        except queue.Full as e:
+            raise QueueFullError(f"micro-batch queue is full ({self._queue.maxsize} requests)") from e
+        return future.result(timeout=self.timeout)
+
+    def _collect(self):
+        """Wait for the next request and gather the batch that starts with it."""
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # window is over, but take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, batch):
+        """Score one batch and resolve the futures of its requests."""
+        started = time.perf_counter()
+        if self.batch_size_histogram is not None:
+            self.batch_size_histogram.observe(len(batch))
+        if self.queue_delay_histogram is not None:
+            for request in batch:
+                self.queue_delay_histogram.observe(started - request.enqueued)
+        try:
+            probabilities = self.score_batch(self.combine([request.model_input for request in batch]))
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, probability in zip(batch, probabilities):
+            request.future.set_result(probability)
+
+    def _run(self):
+        """Worker loop."""
+        while True:
+            self._score(self._collect())
@@ -0,0 +1,175 @@
+"""Memory-mappable model bundle format
+
+A bundle is a directory holding the numeric model parameters as raw .npy
+arrays and a small JSON manifest:
+
+    model/model-bundle/
+        manifest.json   format version, engine name and parameters,
+                        model_version, train_date, training fingerprint,
+                        encoder categories, column order and a sha256
+                        checksum per array
+        coef.npy, ...   one file per array of the compiled engine
+
+Loading a bundle does not unpickle anything: the arrays are opened with
+np.load(mmap_mode='r'), so several workers on one host share the same
+physical pages, and the encoders are replaced by BundleEncoder stand-ins.
+The model itself is served by the matching engine from inference_engines.py.
+
+Convert an existing pickle with:
+    python src/model_bundle.py model/model.pkl model/model-bundle
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine, restore_engine
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+ENCODERS = ('enc_hour', 'enc_product', 'enc_gender', 'enc_state')
+COLUMNS = ('hour_cols', 'product_cols', 'gender_cols', 'state_cols')
+
+
+class BundleError(Exception):
+    """Raised when a bundle is missing, has an unknown format or fails checksum validation."""
+
+
+class BundleEncoder:
+    """
+    Stand-in for a fitted OneHotEncoder, restored from the bundle manifest.
+    transform behaves like OneHotEncoder.transform with sparse_output=False.
+    """
+
+    def __init__(self, categories, handle_unknown='ignore'):
+        self.categories_ = [np.array(categories)]
+        self.handle_unknown = handle_unknown
+        self.drop_idx_ = None
+        self.infrequent_categories_ = None
+        self._index = {category: i for i, category in enumerate(categories)}
+
+    def transform(self, X):
+        """One-hot encode a single-column 2-D array."""
+        values = np.asarray(X).reshape(-1)
+        codes = np.array([self._index.get(v, -1) for v in values.tolist()], dtype=np.intp)
+        unknown = codes < 0
+        if unknown.any() and self.handle_unknown == 'error':
+            raise ValueError(f"Found unknown categories {list(np.unique(values[unknown]))} "
+                             f"in column 0 during transform")
+        encoded = np.zeros((len(values), len(self._index)))
+        encoded[np.flatnonzero(~unknown), codes[~unknown]] = 1.0
+        return encoded
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encoder_manifest(encoder, cols):
+    return {'categories': encoder.categories_[0].tolist(),
+            'handle_unknown': encoder.handle_unknown,
+            'cols': [str(c) for c in cols]}
+
+
+def export_bundle(model_data, path, forest_lookup=False):
+    """
+    Write the dict saved by the training scripts (model, encoders, column
+    names, model_version, train_date) as a bundle directory at path.
+    Raises BundleError if the model has no compiled engine.
+    """
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    engine = compile_engine(model_data['model'], vectorizer, forest_lookup=forest_lookup)
+    if engine is None:
+        raise BundleError(f"No compiled engine for {type(model_data['model']).__name__}")
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {}
+    for name, array in engine.arrays().items():
+        filename = f'{name}.npy'
+        np.save(os.path.join(path, filename), np.ascontiguousarray(array))
+        arrays[name] = {'file': filename, 'sha256': _sha256(os.path.join(path, filename))}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'engine': engine.name,
+        'params': engine.params(),
+        'model_version': model_data.get('model_version', 'unknown'),
+        'train_date': str(model_data.get('train_date', 'unknown')),
+        'fingerprint': model_data.get('fingerprint', 'unknown'),
+        'columns': vectorizer.columns,
+        'encoders': {enc: _encoder_manifest(model_data[enc], model_data[cols])
+                     for enc, cols in zip(ENCODERS, COLUMNS)},
+        'arrays': arrays,
+    }
+    with open(os.path.join(path, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class ModelBundle:
+    """A loaded bundle: its manifest and memory-mapped arrays."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+
+    def model_data(self):
+        """
+        The bundle as the dict stored in model.pkl, with BundleEncoders and no sklearn model.
+        """
+        data = {'model': None,
+                'model_version': self.manifest['model_version'],
+                'train_date': self.manifest['train_date'],
+                'fingerprint': self.manifest.get('fingerprint', 'unknown')}
+        for enc, cols in zip(ENCODERS, COLUMNS):
+            entry = self.manifest['encoders'][enc]
+            data[enc] = BundleEncoder(entry['categories'], entry['handle_unknown'])
+            data[cols] = np.array(entry['cols'], dtype=object)
+        return data
+
+    def engine(self, vectorizer, forest_lookup=True):
+        """Build the compiled engine on top of the memory-mapped arrays."""
+        if vectorizer.columns != self.manifest['columns']:
+            raise BundleError("bundle column order does not match the vectorizer")
+        return restore_engine(self.manifest['engine'], self.arrays, self.manifest['params'], vectorizer,
+                              forest_lookup=forest_lookup)
+
+
+def load_bundle(path, verify=True):
+    """
+    Open a bundle directory. Arrays are memory-mapped read-only; with verify,
+    each array file is checked against the sha256 in the manifest first.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Cannot read bundle manifest in {path}: {str(e)}") from e
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format: {manifest.get('format_version')}")
+
+    arrays = {}
+    for name, entry in manifest['arrays'].items():
+        filename = os.path.join(path, entry['file'])
+        if verify and _sha256(filename) != entry['sha256']:
+            raise BundleError(f"Checksum mismatch for {filename}")
+        arrays[name] = np.load(filename, mmap_mode='r', allow_pickle=False)
+    return ModelBundle(path, manifest, arrays)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("usage: python src/model_bundle.py MODEL_PKL BUNDLE_DIR")
+        sys.exit(2)
+    with open(sys.argv[1], 'rb') as f:
+        exported = export_bundle(pickle.load(f), sys.argv[2])
+    print(f"Exported {exported['engine']} model {exported['model_version']} to {sys.argv[2]}")
@@ -0,0 +1,242 @@
+"""Evaluate every model artifact on the held-out split in one pass
+
+Loads data/fraud.csv.bz2 once, takes the held-out split used by the
+accuracy test, and encodes it once per distinct encoder set into the full
+feature layout (served columns + state one-hot + credit_score). Each
+artifact in the model directory is scored against that shared matrix with
+its own column selection:
+
+* <name>.pkl files holding a model dict (model.pkl, lreg-model.pkl, ...)
+* MLflow exports (directories with an MLmodel file), which take their
+  encoders from encoders.pkl like fraud_prediction_mlflow.py
+
+Bundle directories are skipped, they hold copies of the pickles.
+
+threshold_sweep turns the scores of a model into its full precision,
+recall and F1 curve over all thresholds with one sort, so the metrics at
+the default threshold, the best-F1 threshold, average precision and a fixed
+grid of thresholds all come from the same pass. The results are written as
+a JSON report:
+
+    python src/model_evaluation.py --model-dir model --output evaluation.json
+"""
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import file_digest
+from features import DATA_PATH, load_transactions, feature_columns, build_sparse_features
+
+try:
+    import mlflow.sklearn
+except ImportError:  # MLflow exports are skipped
+    mlflow = None
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 566571358
+DEFAULT_THRESHOLD = 0.5
+# thresholds reported in the sweep of every model
+SWEEP_THRESHOLDS = np.round(np.linspace(0.0, 1.0, 101), 2)
+REPORT_VERSION = 1
+
+
+def holdout_split(df, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """The held-out rows of a cleaned transactions DataFrame."""
+    _, test = train_test_split(df, test_size=test_size, random_state=random_state)
+    return test
+
+
+def load_artifacts(model_dir='model'):
+    """
+    The evaluable artifacts in model_dir as {name: model_data}, where
+    model_data has the layout of model.pkl. Files that cannot be loaded are
+    reported with an 'error' entry instead.
+    """
+    artifacts = {}
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        try:
+            if name.endswith('.pkl'):
+                with open(path, 'rb') as f:
+                    model_data = pickle.load(f)
+                # encoders.pkl and friends carry no model
+                if isinstance(model_data, dict) and 'model' in model_data:
+                    artifacts[name] = model_data
+            elif os.path.isfile(os.path.join(path, 'MLmodel')):
+                if mlflow is None:
+                    artifacts[name] = {'error': "mlflow is not installed"}
+                    continue
+                with open(os.path.join(model_dir, 'encoders.pkl'), 'rb') as f:
+                    encoders = pickle.load(f)
+                artifacts[name] = {'model': mlflow.sklearn.load_model(path), **encoders, 'model_version': 'mlflow'}
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            artifacts[name] = {'error': str(e)}
+    return artifacts
+
+
+def _encoder_key(model_data):
+    """Identifies the category sets of a model's encoders, to share one encoding between models."""
+    return tuple(tuple(map(str, model_data[f'{key}_cols'])) for key in ('hour', 'product', 'gender', 'state'))
+
+
+class EncodedHoldout:
+    """The held-out split, encoded once per encoder set into the full feature layout."""
+
+    def __init__(self, df):
+        self.df = df
+        self._matrices = {}
+
+    def features(self, model_data):
+        """
+        Input matrix for model_data's model: the columns it was fitted on
+        (feature_names_in_), or the served layout for models without names.
+        """
+        key = _encoder_key(model_data)
+        if key not in self._matrices:
+            columns = feature_columns(model_data, full=True)
+            matrix = build_sparse_features(self.df, model_data, full=True).toarray()
+            self._matrices[key] = (matrix, {name: j for j, name in enumerate(columns)})
+        matrix, index = self._matrices[key]
+        model = model_data['model']
+        columns = list(getattr(model, 'feature_names_in_', feature_columns(model_data)))
+        missing = [name for name in columns if name not in index]
+        if missing:
+            raise ValueError(f"unknown feature columns {missing}")
+        X = matrix[:, [index[name] for name in columns]]
+        if hasattr(model, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=columns, copy=False)
+        return X
+
+
+def threshold_sweep(y, scores):
+    """
+    Precision, recall and F1 for every distinct score used as threshold
+    (predicting fraud when score >= threshold), from a single sort.
+    Returns a dict of arrays ordered by decreasing threshold, plus the
+    number of positives.
+    """
+    y = np.asarray(y, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    sorted_scores, sorted_y = scores[order], y[order]
+    # last position of each run of equal scores
+    ends = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(scores) - 1] if len(scores) else np.zeros(0, int)
+    tp = np.cumsum(sorted_y)[ends]
+    fp = ends + 1 - tp
+    positives = int(y.sum())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {'thresholds': sorted_scores[ends], 'tp': tp, 'fp': fp, 'precision': precision,
+            'recall': recall, 'f1': f1, 'positives': positives, 'rows': len(y)}
+
+
+def confusion_at(sweep, thresholds, strict=False):
+    """
+    Confusion counts (tp, fp, tn, fn arrays) when predicting fraud for
+    score >= threshold (score > threshold with strict, as predict() does at
+    0.5), for an array of thresholds at once, read off the sweep.
+    """
+    # the curve's thresholds decrease; k counts the curve points that predict fraud
+    k = np.searchsorted(-sweep['thresholds'], -np.asarray(thresholds, dtype=np.float64),
+                        side='left' if strict else 'right')
+    tp = np.where(k > 0, np.r_[0, sweep['tp']][k], 0)
+    fp = np.where(k > 0, np.r_[0, sweep['fp']][k], 0)
+    negatives = sweep['rows'] - sweep['positives']
+    return tp, fp, negatives - fp, sweep['positives'] - tp
+
+
+def metrics_at(sweep, thresholds, strict=False):
+    """Precision, recall, F1 and confusion counts at each threshold, as a dict of lists."""
+    tp, fp, tn, fn = confusion_at(sweep, thresholds, strict)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = tp / sweep['positives'] if sweep['positives'] else np.zeros(len(tp))
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {'threshold': np.asarray(thresholds, dtype=np.float64).tolist(), 'precision': precision.tolist(),
+            'recall': recall.tolist(), 'f1': f1.tolist(), 'tp': tp.tolist(), 'fp': fp.tolist(),
+            'tn': tn.tolist(), 'fn': fn.tolist()}
+
+
+def _single(metrics):
+    """The only entry of a metrics_at result."""
+    return {key: values[0] for key, values in metrics.items()}
+
+
+def summarize(sweep):
+    """Report entry of one model: default and best-F1 metrics, average precision and the grid sweep."""
+    recall_steps = np.diff(np.r_[0.0, sweep['recall']])
+    entry = {
+        'default': _single(metrics_at(sweep, [DEFAULT_THRESHOLD], strict=True)),
+        'best_f1': None,
+        'average_precision': float((recall_steps * sweep['precision']).sum()),
+        'sweep': metrics_at(sweep, SWEEP_THRESHOLDS),
+    }
+    if len(sweep['f1']):
+        entry['best_f1'] = _single(metrics_at(sweep, sweep['thresholds'][[np.argmax(sweep['f1'])]]))
+    return entry
+
+
+def evaluate(model_dir='model', data_path=DATA_PATH, output=None):
+    """
+    Score every artifact in model_dir on the held-out split of data_path and
+    return the report dict, also written as JSON to output if given.
+    """
+    holdout = holdout_split(load_transactions(data_path))
+    y = holdout['fraud'].to_numpy(dtype=bool)
+    encoded = EncodedHoldout(holdout)
+    models = {}
+    for name, model_data in load_artifacts(model_dir).items():
+        if 'error' in model_data:
+            models[name] = {'error': model_data['error']}
+            continue
+        try:
+            scores = model_data['model'].predict_proba(encoded.features(model_data))[:, 1]
+        except ValueError as e:
+            models[name] = {'error': str(e)}
+            continue
+        models[name] = {
+            'model': type(model_data['model']).__name__,
+            'model_version': model_data.get('model_version', 'unknown'),
+            'fingerprint': model_data.get('fingerprint', 'unknown'),
+            **summarize(threshold_sweep(y, scores)),
+        }
+    report = {
+        'report_version': REPORT_VERSION,
+        'data': {'path': data_path, 'sha256': file_digest(data_path), 'test_size': TEST_SIZE,
+                 'random_state': RANDOM_STATE, 'rows': len(y), 'positives': int(y.sum())},
+        'models': models,
+    }
+    if output:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Evaluate all model artifacts on the held-out split.")
+    parser.add_argument('--model-dir', default='model', help="artifact directory (default: model)")
+    parser.add_argument('--data', default=DATA_PATH, help=f"transactions CSV (default: {DATA_PATH})")
+    parser.add_argument('--output', default='evaluation.json', help="JSON report (default: evaluation.json)")
+    args = parser.parse_args(argv)
+    report = evaluate(args.model_dir, args.data, args.output)
+    for name, entry in report['models'].items():
+        if 'error' in entry:
+            print(f"{name}: {entry['error']}")
+            continue
+        default, best = entry['default'], entry['best_f1']
+        print(f"{name}: precision {default['precision']:.4f} recall {default['recall']:.4f} "
+              f"f1 {default['f1']:.4f}; best f1 {best['f1']:.4f} at {best['threshold']:.4f}, "
+              f"average precision {entry['average_precision']:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""In-process prediction cache for the prediction API
+
+Maps canonicalized model inputs to fraud probabilities with size-bounded
+LRU eviction and a TTL. Entries belong to the model they were computed
+with: passing a different model token clears the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry time to live.
+
+    The optional Prometheus counters are incremented on hits, misses and
+    evictions (entries dropped for size, expiry or a model change).
+    """
+
+    def __init__(self, max_size=10000, ttl=300.0, clock=time.monotonic,
+                 hit_counter=None, miss_counter=None, eviction_counter=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hit_counter = hit_counter
+        self.miss_counter = miss_counter
+        self.eviction_counter = eviction_counter
+        self._entries = OrderedDict()
+        self._model_token = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, n=1):
+        if self.eviction_counter is not None and n:
+            self.eviction_counter.inc(n)
+
+    def _check_model(self, model_token):
+        """Drop all entries if they were computed with another model. Caller holds the lock."""
+        if model_token != self._model_token:
+            self._evict(len(self._entries))
+            self._entries.clear()
+            self._model_token = model_token
+
+    def get(self, key, model_token=None):
+        """Return the cached probability for key, or None."""
+        with self._lock:
+            self._check_model(model_token)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    if self.hit_counter is not None:
+                        self.hit_counter.inc()
+                    return value
+                del self._entries[key]
+                self._evict()
+        if self.miss_counter is not None:
+            self.miss_counter.inc()
+        return None
+
+    def put(self, key, value, model_token=None):
+        """Store the probability for key, evicting the least recently used entries if full."""
+        with self._lock:
+            self._check_model(model_token)
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evict()
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._evict(len(self._entries))
+            self._entries.clear()
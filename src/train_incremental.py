@@ -0,0 +1,201 @@
+"""Out-of-core training of a logistic model with partial_fit
+
+For transaction logs that do not fit in memory. The CSV (plain, .gz or .bz2)
+is streamed in chunks twice:
+
+1. a scan collects the distinct categories of the encoded columns, the
+   class counts and the mean and standard deviation of amount, and fits the
+   encoders and balanced class weights from them;
+2. an SGDClassifier with logistic loss is trained chunk by chunk with
+   partial_fit on the sparse features (see features.build_sparse_features),
+   for --epochs passes over the file.
+
+Memory is bounded by the chunk size. Every --checkpoint-every chunks the
+training state is written next to the output, and --resume continues from
+it. The artifact has the model.pkl layout, with the amount scaling folded
+into the model, so fraud_prediction.py and the bundle exporter load it like
+any other model.
+
+    python src/train_incremental.py data/fraud.csv.bz2 --chunk-size 100000 --epochs 3
+"""
+import argparse
+import os
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+from features import ENCODED_COLUMNS, encoders_from_categories, feature_columns
+from features import build_sparse_features, fold_scaling
+from feature_vectorizer import TIME_FORMAT
+from model_bundle import export_bundle
+from training_fingerprint import training_fingerprint, artifact_is_current
+from training_profiler import start_profiling, stage
+
+CLASSES = np.array([False, True])
+
+
+def read_chunks(path, chunk_size):
+    """Stream a transactions CSV as cleaned DataFrame chunks (time parsed, incomplete rows dropped)."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk['time'] = pd.to_datetime(chunk['time'], format=TIME_FORMAT, errors='coerce')
+        yield chunk.dropna()
+
+
+class DatasetScan:
+    """Statistics collected by the first pass over the data."""
+
+    def __init__(self):
+        self.categories = {column: set() for _, column, _ in ENCODED_COLUMNS}
+        self.class_counts = np.zeros(len(CLASSES), dtype=np.int64)
+        self.rows = 0
+        self.amount_mean = 0.0
+        self.amount_m2 = 0.0
+
+    def update(self, chunk):
+        """Add one cleaned chunk."""
+        values = chunk.assign(hour=chunk['time'].dt.hour)
+        for column, seen in self.categories.items():
+            seen.update(values[column].unique().tolist())
+        self.class_counts += [(chunk['fraud'] == c).sum() for c in CLASSES]
+
+        # merge the chunk's mean and sum of squared deviations (Chan et al.)
+        amount = chunk['amount'].to_numpy(dtype=float)
+        n, total = len(amount), self.rows + len(amount)
+        if n == 0:
+            return
+        mean = amount.mean()
+        delta = mean - self.amount_mean
+        self.amount_m2 += ((amount - mean) ** 2).sum() + delta ** 2 * self.rows * n / total
+        self.amount_mean += delta * n / total
+        self.rows = total
+
+    def encoders(self):
+        """Fit the encoders on the scanned categories."""
+        categories = {column: np.array(sorted(seen), dtype=np.int32 if column == 'hour' else object)
+                      for column, seen in self.categories.items()}
+        return encoders_from_categories(categories)
+
+    def scaling(self):
+        """Standardization of amount, in the format of features.numeric_scaling."""
+        std = np.sqrt(self.amount_m2 / self.rows) if self.rows else 0.0
+        return {'amount': (self.amount_mean, std if std > 0 else 1.0)}
+
+    def class_weight(self):
+        """Balanced class weights, like class_weight='balanced' on the whole dataset."""
+        if (self.class_counts == 0).any():
+            raise ValueError(f"Both classes are needed to train, found counts {self.class_counts.tolist()}")
+        return {c: self.rows / (len(CLASSES) * n) for c, n in zip(CLASSES.tolist(), self.class_counts)}
+
+
+def save_checkpoint(path, state):
+    """Write the training state atomically."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)
+
+
+def train_incremental(input_path, output_path='model/sgd-model.pkl', chunk_size=100000, epochs=1,
+                      checkpoint_every=10, resume=False, model_version='0.1', alpha=1e-4, random_state=0):
+    """
+    Train an SGD logistic model over input_path in chunks and write the
+    model.pkl-style artifact to output_path (plus a bundle next to it).
+    Returns the artifact dict.
+    """
+    checkpoint_path = f'{output_path}.checkpoint'
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    fingerprint = training_fingerprint(
+        input_path, SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state),
+        {'sparse': True, 'incremental': True, 'chunk_size': chunk_size, 'epochs': epochs})
+    if not resume and artifact_is_current(output_path, fingerprint):
+        print(f"{output_path} is up to date ({fingerprint}), skipping training")
+        with open(output_path, 'rb') as f:
+            return pickle.load(f)
+    started = time.perf_counter()
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'rb') as f:
+            state = pickle.load(f)
+        print(f"Resuming at epoch {state['epoch'] + 1}, chunk {state['chunks_done']}")
+    else:
+        scan = DatasetScan()
+        with stage('scan'):
+            for chunk in read_chunks(input_path, chunk_size):
+                scan.update(chunk)
+        state = {
+            'encoders': scan.encoders(),
+            'scaling': scan.scaling(),
+            'model': SGDClassifier(loss='log_loss', alpha=alpha, class_weight=scan.class_weight(),
+                                   random_state=random_state),
+            'epoch': 0,
+            'chunks_done': 0,
+        }
+        print(f"Scanned {scan.rows} rows in {time.perf_counter() - started:.1f}s, "
+              f"class counts {scan.class_counts.tolist()}")
+
+    model = state['model']
+    rng = np.random.default_rng(random_state)
+    if 'rng' in state:
+        # continue the shuffling where the checkpoint left off, like an uninterrupted run
+        rng.bit_generator.state = state['rng']
+    while state['epoch'] < epochs:
+        rows = 0
+        with stage(f"epoch_{state['epoch'] + 1}"):
+            for i, chunk in enumerate(read_chunks(input_path, chunk_size)):
+                if i < state['chunks_done']:
+                    continue
+                # SGD converges better when rows are not in file order
+                chunk = chunk.iloc[rng.permutation(len(chunk))]
+                X = build_sparse_features(chunk, state['encoders'], scaling=state['scaling'])
+                model.partial_fit(X, chunk['fraud'].to_numpy(), classes=CLASSES)
+                rows += len(chunk)
+                state['chunks_done'] = i + 1
+                if checkpoint_every and state['chunks_done'] % checkpoint_every == 0:
+                    state['rng'] = rng.bit_generator.state
+                    save_checkpoint(checkpoint_path, state)
+            state['epoch'] += 1
+            state['chunks_done'] = 0
+            state['rng'] = rng.bit_generator.state
+            save_checkpoint(checkpoint_path, state)
+        print(f"Epoch {state['epoch']}/{epochs}: {rows} rows, {time.perf_counter() - started:.1f}s")
+
+    model_data = {
+        'model': fold_scaling(model, feature_columns(state['encoders']), state['scaling']),
+        **state['encoders'],
+        'model_version': model_version,
+        'train_date': datetime.now().isoformat(),
+        'fingerprint': fingerprint,
+    }
+    with stage('pickle'), open(output_path, 'wb') as f:
+        pickle.dump(model_data, f)
+    with stage('export_bundle'):
+        export_bundle(model_data, os.path.splitext(output_path)[0] + '-bundle')
+    os.remove(checkpoint_path)
+    print(f"Saved {output_path} in {time.perf_counter() - started:.1f}s")
+    return model_data
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Train a logistic model over a large CSV in chunks.")
+    parser.add_argument('input', help="transactions CSV, optionally .gz or .bz2 compressed")
+    parser.add_argument('--output', default='model/sgd-model.pkl', help="artifact (default: model/sgd-model.pkl)")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="rows per chunk (default: 100000)")
+    parser.add_argument('--epochs', type=int, default=1, help="passes over the data (default: 1)")
+    parser.add_argument('--checkpoint-every', type=int, default=10, help="chunks between checkpoints (default: 10)")
+    parser.add_argument('--resume', action='store_true', help="continue from the checkpoint next to --output")
+    parser.add_argument('--model-version', default='0.1', help="model_version to record (default: 0.1)")
+    args = parser.parse_args(argv)
+    # stage timings and memory; TRAINING_PROFILE=report.json keeps them (see training_profiler.py)
+    profiler = start_profiling('incremental')
+    profiler.annotate(data_path=args.input, chunk_size=args.chunk_size, epochs=args.epochs)
+    train_incremental(args.input, args.output, args.chunk_size, args.epochs, args.checkpoint_every,
+                      args.resume, args.model_version)
+    profiler.finish()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""Train several model families in parallel
+
+Loads and encodes data/fraud.csv.bz2 once, places the feature matrix and
+labels in shared memory and trains the selected model families at the same
+time in a process pool. Every job gets a core budget: the random forest uses
+it as n_jobs while fitting, the other models as their BLAS/OpenMP thread
+limit. The saved forest scores single rows, so it is stored with n_jobs
+unset and the budget is kept as train_cores in the artifact. Each job
+writes its artifact in the layout of the single-model scripts
+(model/<name>-model.pkl plus model/<name>-model-bundle) with model_version
+and train_date filled in, so the wall time is close to that of the slowest
+model instead of the sum.
+
+    python src/train_models.py
+    python src/train_models.py --models lreg nn --cores randomforest=6
+    python src/train_models.py --warm-start
+"""
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+from threadpoolctl import threadpool_limits
+
+from features import DATA_PATH, load_transactions, fit_encoders, build_features, feature_columns
+from features import numeric_scaling, build_sparse_features, fold_scaling
+from model_bundle import export_bundle
+from training_fingerprint import training_fingerprint, artifact_is_current
+from training_profiler import TrainingProfiler, start_profiling, stage, record
+from warm_start import warm_start
+
+MODEL_VERSION = '0.1'
+
+
+def make_logistic_regression(cores):
+    """Logistic regression as in model_training.py."""
+    return LogisticRegression(max_iter=1000, class_weight="balanced")
+
+
+def make_random_forest(cores):
+    """Random forest as in model_random_forest.py, with one tree builder per core."""
+    return RandomForestClassifier(n_estimators=20, class_weight='balanced', n_jobs=cores)
+
+
+def make_neural_network(cores):
+    """Neural network as in model_neural_network.py."""
+    return MLPClassifier(hidden_layer_sizes=[10, 10], learning_rate="adaptive", tol=1e-6, max_iter=800)
+
+
+# artifact name -> estimator factory taking the job's core budget
+MODEL_FAMILIES = {
+    'lreg': make_logistic_regression,
+    'randomforest': make_random_forest,
+    'nn': make_neural_network,
+}
+
+
+def core_budget(models, requested, cpus=None):
+    """
+    Cores per job: explicit requests first, one core for the other linear
+    models, and everything left over for the random forest.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    budget = {name: requested.get(name, 1) for name in models}
+    if 'randomforest' in models and 'randomforest' not in requested:
+        budget['randomforest'] = max(1, cpus - sum(n for name, n in budget.items() if name != 'randomforest'))
+    return budget
+
+
+class SharedArray:
+    """A NumPy array in a named shared memory block that worker processes attach to."""
+
+    def __init__(self, array):
+        self.shape = array.shape
+        self.dtype = array.dtype.str
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self._shm.name
+        np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)[...] = array
+
+    def spec(self):
+        """Picklable (name, shape, dtype) to attach from another process."""
+        return self.name, self.shape, self.dtype
+
+    def release(self):
+        """Free the shared block; call once all workers are done."""
+        self._shm.close()
+        self._shm.unlink()
+
+
+def attach(spec):
+    """Map a SharedArray in a worker. Returns the shared memory handle and the array."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def train_and_save(name, model, sparse=False, warm_start_path=None, output_dir='model', data_path=DATA_PATH):
+    """
+    Train model in this process and write model/<name>-model.pkl plus its
+    bundle, profiling the run as name. Training is skipped if the artifact
+    was trained from the same inputs. With sparse the model is fitted on
+    build_sparse_features with standardized amount, folded back into the
+    model afterwards; with warm_start_path it continues from that artifact
+    where the schema allows (see warm_start.py).
+    Returns the model data that was saved, None if training was skipped.
+    """
+    path = os.path.join(output_dir, f'{name}-model.pkl')
+    # stage timings and memory; TRAINING_PROFILE=report.json keeps them (see training_profiler.py)
+    profiler = start_profiling(name)
+
+    with stage('fingerprint'):
+        fingerprint = training_fingerprint(data_path, model, {'sparse': sparse}, warm_start_path)
+    if artifact_is_current(path, fingerprint):
+        print(f"{path} is up to date ({fingerprint}), skipping training")
+        profiler.finish()
+        return None
+
+    df = load_transactions(data_path)
+    y = df['fraud']
+    with stage('fit_encoders'):
+        encoders = fit_encoders(df)
+
+    scaling = {}
+    if sparse:
+        columns = feature_columns(encoders)
+        scaling = numeric_scaling(df, ['amount'])
+        with stage('encode'):
+            X = build_sparse_features(df, encoders, scaling=scaling)
+        print(f"{X.shape[0]} rows x {X.shape[1]} columns, {X.nnz} stored values")
+    else:
+        with stage('encode'):
+            X = build_features(df, encoders)
+        print(X.info())
+
+    if warm_start_path:
+        with stage('warm_start'):
+            model, encoders = warm_start(model, encoders, warm_start_path, scaling=scaling)
+    profiler.annotate(data_path=data_path, rows=X.shape[0], columns=X.shape[1], sparse=sparse,
+                      fingerprint=fingerprint)
+    with stage('fit'):
+        model.fit(X, y)
+    if sparse:
+        # score raw amounts like a model trained on the dense DataFrame
+        fold_scaling(model, columns, scaling)
+    print("Model training completed.")
+
+    model_data = {
+        'model': model,
+        **encoders,
+        'model_version': MODEL_VERSION,
+        'fingerprint': fingerprint,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with stage('pickle'), open(path, 'wb') as f:
+        pickle.dump(model_data, f)
+    # memory-mappable copy for fast server startup (see model_bundle.py)
+    with stage('export_bundle'):
+        export_bundle(model_data, os.path.join(output_dir, f'{name}-model-bundle'))
+
+    print("Model and encoders saved successfully!")
+    profiler.finish()
+    return model_data
+
+
+def train_job(name, cores, x_spec, y_spec, columns, encoders, model_version, train_date, fingerprint,
+              output_dir, warm=False):
+    """
+    Train one model family on the shared features and write its artifacts.
+    With warm, continue from the family's previous artifact in output_dir.
+    Returns (name, seconds spent fitting, pickle path, the job's profiler stages).
+    """
+    path = os.path.join(output_dir, f'{name}-model.pkl')
+    profiler = TrainingProfiler(name)
+    x_shm, X = attach(x_spec)
+    y_shm, y = attach(y_spec)
+    try:
+        started = time.perf_counter()
+        model = MODEL_FAMILIES[name](cores)
+        if warm:
+            with profiler.stage('warm_start'):
+                model, encoders = warm_start(model, encoders, path,
+                                             log=lambda message: print(f"{name}: {message}"))
+        with profiler.stage('fit'), threadpool_limits(limits=cores):
+            model.fit(pd.DataFrame(X, columns=columns, copy=False), y)
+        elapsed = time.perf_counter() - started
+        # the budget is for fitting; joblib dispatch would slow down every single-row prediction
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = None
+    finally:
+        del X, y
+        x_shm.close()
+        y_shm.close()
+
+    model_data = {
+        'model': model,
+        **encoders,
+        'model_version': model_version,
+        'train_date': train_date,
+        'fingerprint': fingerprint,
+        'train_cores': cores,
+    }
+    with profiler.stage('pickle'), open(path, 'wb') as f:
+        pickle.dump(model_data, f)
+    with profiler.stage('export_bundle'):
+        export_bundle(model_data, os.path.join(output_dir, f'{name}-model-bundle'))
+    return name, elapsed, path, profiler.stages
+
+
+def train_models(models, cores=None, model_version=MODEL_VERSION, output_dir='model', data_path=DATA_PATH,
+                 warm=False):
+    """
+    Train the given model families concurrently. Returns {name: (fit seconds, pickle path)}
+    for the families that were trained; those whose artifact already has the
+    fingerprint of this run are skipped. With warm, each family continues
+    from its previous artifact where possible (see warm_start.py); the
+    previous artifact is part of the fingerprint, so warm runs always train.
+    """
+    budget = core_budget(models, cores or {})
+    os.makedirs(output_dir, exist_ok=True)
+    fingerprints = {}
+    for name in list(models):
+        path = os.path.join(output_dir, f'{name}-model.pkl')
+        with stage('fingerprint'):
+            fingerprints[name] = training_fingerprint(data_path, MODEL_FAMILIES[name](budget[name]),
+                                                      {'sparse': False}, path if warm else None)
+        if artifact_is_current(path, fingerprints[name]):
+            print(f"{name}: up to date ({fingerprints[name]}), skipping training")
+            models = [other for other in models if other != name]
+    if not models:
+        return {}
+    started = time.perf_counter()
+    df = load_transactions(data_path)
+    with stage('fit_encoders'):
+        encoders = fit_encoders(df)
+    with stage('encode'):
+        X = build_features(df, encoders)
+    print(f"Encoded {X.shape[0]} rows x {X.shape[1]} columns in {time.perf_counter() - started:.1f}s")
+
+    train_date = datetime.now().isoformat()
+    with stage('share'):
+        shared_x = SharedArray(X.to_numpy())
+        shared_y = SharedArray(df['fraud'].to_numpy())
+    del X
+    results = {}
+    try:
+        with stage('train'), ProcessPoolExecutor(max_workers=len(models)) as pool:
+            futures = [pool.submit(train_job, name, budget[name], shared_x.spec(), shared_y.spec(),
+                                   feature_columns(encoders), encoders, model_version, train_date,
+                                   fingerprints[name], output_dir, warm)
+                       for name in models]
+            for future in futures:
+                name, elapsed, path, stages = future.result()
+                results[name] = (elapsed, path)
+                record(stages, f'train/{name}')
+                print(f"{name}: trained in {elapsed:.1f}s on {budget[name]} cores, saved {path}")
+    finally:
+        shared_x.release()
+        shared_y.release()
+    print(f"Trained {len(models)} models in {time.perf_counter() - started:.1f}s")
+    return results
+
+
+def parse_cores(values):
+    """Parse NAME=N core budget arguments."""
+    cores = {}
+    for value in values:
+        name, _, n = value.partition('=')
+        if name not in MODEL_FAMILIES or not n.isdigit() or int(n) < 1:
+            raise argparse.ArgumentTypeError(f"invalid core budget {value!r}, expected NAME=N")
+        cores[name] = int(n)
+    return cores
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Train the fraud model families in parallel.")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_FAMILIES), default=list(MODEL_FAMILIES),
+                        help="model families to train (default: all)")
+    parser.add_argument('--cores', nargs='*', default=[], metavar='NAME=N',
+                        help="cores for a model family (default: 1 each, the rest for randomforest)")
+    parser.add_argument('--model-version', default=MODEL_VERSION, help=f"model_version to record "
+                                                                        f"(default: {MODEL_VERSION})")
+    parser.add_argument('--output-dir', default='model', help="artifact directory (default: model)")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="continue from the previous artifacts in --output-dir where the schema allows")
+    args = parser.parse_args(argv)
+    try:
+        cores = parse_cores(args.cores)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    # stage timings and memory; TRAINING_PROFILE=report.json keeps them (see training_profiler.py)
+    profiler = start_profiling('train_models')
+    train_models(args.models, cores, args.model_version, args.output_dir, warm=args.warm_start)
+    profiler.finish()
+
+
+if __name__ == '__main__':
+    main()
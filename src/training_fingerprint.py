@@ -0,0 +1,85 @@
+"""Fingerprint of the inputs of a training run
+
+A training run is determined by the dataset, the feature pipeline, the
+model's hyperparameters, the artifact it warm-starts from (if any) and the
+versions of the libraries doing the work.
+training_fingerprint hashes all of them into one sha256; the training
+entry points store it in the artifact next to model_version and skip
+training when the artifact they would overwrite already carries the same
+fingerprint. The prediction API reports it from /api/v1/model_version.
+"""
+import hashlib
+import json
+import os
+import pickle
+import platform
+
+import numpy as np
+import pandas as pd
+import scipy
+import sklearn
+
+from dataset_cache import file_digest
+
+# sources whose code defines the model input
+FEATURE_SOURCES = ('features.py', 'feature_vectorizer.py')
+
+# estimator parameters that do not change the fitted model
+IGNORED_PARAMS = ('verbose', 'n_jobs', 'warm_start')
+
+
+def _source_digest():
+    """sha256 over the feature pipeline sources."""
+    digest = hashlib.sha256()
+    src = os.path.dirname(os.path.abspath(__file__))
+    for name in FEATURE_SOURCES:
+        with open(os.path.join(src, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _warm_start_digest(path):
+    """sha256 of the warm-start artifact, None without one (or if it cannot be read, a cold start)."""
+    if not path:
+        return None
+    try:
+        return file_digest(path)
+    except OSError:
+        return None
+
+
+def training_inputs(data_path, model, feature_config=None, warm_start_path=None):
+    """
+    The fingerprinted inputs as a JSON-serializable dict.
+    feature_config holds the feature options of the run (e.g. sparse),
+    warm_start_path the artifact the run continues from.
+    """
+    params = {key: repr(value) for key, value in sorted(model.get_params().items())
+              if key not in IGNORED_PARAMS}
+    return {
+        'data_sha256': file_digest(data_path),
+        'features': {'source_sha256': _source_digest(), **(feature_config or {})},
+        'model': {'class': f'{type(model).__module__}.{type(model).__name__}', 'params': params},
+        'warm_start_sha256': _warm_start_digest(warm_start_path),
+        'versions': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                     'scipy': scipy.__version__, 'scikit-learn': sklearn.__version__},
+    }
+
+
+def training_fingerprint(data_path, model, feature_config=None, warm_start_path=None):
+    """sha256 of training_inputs, prefixed with the algorithm."""
+    inputs = json.dumps(training_inputs(data_path, model, feature_config, warm_start_path), sort_keys=True)
+    return 'sha256:' + hashlib.sha256(inputs.encode('utf-8')).hexdigest()
+
+
+def artifact_is_current(path, fingerprint):
+    """
+    True if the artifact at path was trained from the inputs with this
+    fingerprint, so training it again would reproduce it.
+    """
+    try:
+        with open(path, 'rb') as f:
+            previous = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False
+    return isinstance(previous, dict) and previous.get('fingerprint') == fingerprint
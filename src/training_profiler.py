@@ -0,0 +1,203 @@
+"""Stage-level profiling of training runs
+
+The training entry points split their work into named stages (loading,
+decompressing and parsing the CSV, dropna, encoding, fit, pickling, ...)
+and record the wall time, CPU time and peak resident memory of each:
+
+    profiler = start_profiling('lreg')
+    with stage('fit'):
+        model.fit(X, y)
+    profiler.finish()
+
+Library code calls stage() as well; it nests under the stage that is open
+(load/read_csv) and costs nothing when no profiler is running. finish()
+prints a summary table and, with TRAINING_PROFILE=report.json, writes the
+stages as a JSON report. TRAINING_CPROFILE=train.prof also runs cProfile
+over the whole run and dumps its stats for pstats or snakeviz.
+
+Peak RSS is the high-water mark while the stage ran: on Linux it is reset
+at the start of every stage (/proc/self/clear_refs), elsewhere it is the
+peak of the process so far.
+"""
+import cProfile
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_PATH = os.environ.get('TRAINING_PROFILE')
+CPROFILE_PATH = os.environ.get('TRAINING_CPROFILE')
+REPORT_VERSION = 1
+
+_active = None
+
+
+def _peak_rss():
+    """High-water mark of the resident set size in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def _current_rss():
+    """Resident set size in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _reset_peak_rss():
+    """Restart the high-water mark at the current RSS. Returns False where that is not supported."""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class TrainingProfiler:
+    """Records the cost of the named stages of one training run."""
+
+    def __init__(self, run, cprofile_path=None):
+        self.run = run
+        self.cprofile_path = cprofile_path
+        self.stages = []
+        self.meta = {}
+        self._open = []
+        self._cprofile = None
+        self._started_at = datetime.now().isoformat()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._peak = 0
+        _reset_peak_rss()
+        if cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the block as the stage name, nested under the open stage."""
+        path = '/'.join([entry['name'] for entry in self._open] + [name])
+        # the enclosing stage keeps the peak reached so far, the counter restarts for this one
+        self._carry_peak(_peak_rss())
+        entry = {'name': path, 'peak': 0}
+        self._open.append(entry)
+        rss = _current_rss()
+        exact = _reset_peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._open.pop()
+            peak = max(entry['peak'], _peak_rss())
+            self._carry_peak(peak)
+            self.stages.append({
+                'name': path,
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'peak_rss_mb': round(peak / 2 ** 20, 1),
+                'rss_delta_mb': round((_current_rss() - rss) / 2 ** 20, 1),
+                'peak_exact': exact,
+            })
+
+    def _carry_peak(self, peak):
+        """Fold a peak into the open stages and the run."""
+        for entry in self._open:
+            entry['peak'] = max(entry['peak'], peak)
+        self._peak = max(self._peak, peak)
+
+    def record(self, stages, prefix):
+        """Add stages measured elsewhere (e.g. in a worker process) under prefix."""
+        for entry in stages:
+            self.stages.append({**entry, 'name': f"{prefix}/{entry['name']}"})
+
+    def annotate(self, **meta):
+        """Attach run metadata (dataset path, rows, columns, ...) to the report."""
+        self.meta.update(meta)
+
+    def report(self):
+        """The run as a JSON-serializable dict, stages in completion order."""
+        self._carry_peak(_peak_rss())
+        return {
+            'report_version': REPORT_VERSION,
+            'run': self.run,
+            'started_at': self._started_at,
+            'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                     'cpus': os.cpu_count()},
+            'meta': self.meta,
+            'wall_s': round(time.perf_counter() - self._wall, 6),
+            'cpu_s': round(time.process_time() - self._cpu, 6),
+            'peak_rss_mb': round(self._peak / 2 ** 20, 1),
+            'stages': self.stages,
+        }
+
+    def summary(self):
+        """The report as a text table."""
+        report = self.report()
+        lines = [f"{'stage':<32} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}"]
+        for entry in report['stages']:
+            lines.append(f"{entry['name']:<32} {entry['wall_s']:>9.3f} {entry['cpu_s']:>9.3f} "
+                         f"{entry['peak_rss_mb']:>9.1f}")
+        lines.append(f"{'total':<32} {report['wall_s']:>9.3f} {report['cpu_s']:>9.3f} "
+                     f"{report['peak_rss_mb']:>9.1f}")
+        return '\n'.join(lines)
+
+    def finish(self, path=None):
+        """
+        Stop profiling, print the summary and write the JSON report to path
+        (default: TRAINING_PROFILE) and the cProfile stats. Returns the report.
+        """
+        global _active
+        if _active is self:
+            _active = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        report = self.report()
+        print(self.summary())
+        path = path or PROFILE_PATH
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Profile written to {path}")
+        return report
+
+
+def start_profiling(run, cprofile_path=None):
+    """Start profiling the run in this process; stage() records into it until finish()."""
+    global _active
+    _active = TrainingProfiler(run, cprofile_path or CPROFILE_PATH)
+    return _active
+
+
+def stage(name):
+    """A stage of the running profiler, or a no-op context if none is running."""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def record(stages, prefix):
+    """Add stages measured in another process to the running profiler, if any."""
+    if _active is not None:
+        _active.record(stages, prefix)
@@ -0,0 +1,102 @@
+"""Warm-start retraining from a previously trained artifact
+
+Retraining from scratch on every push is wasteful when only a few rows were
+added. warm_start loads the previous artifact (model/model.pkl layout) and,
+if it was trained on the same schema, continues from its parameters: the
+LogisticRegression solver starts from the previous coef_ and intercept_,
+the MLPClassifier continues training from its weights. The previous
+encoders are reused so the artifact stays byte-compatible with it.
+
+Anything that makes the previous model unusable (missing file, a bare
+model or older artifact without encoders, another model type or
+architecture, changed category sets) falls back to a cold start with a
+message saying why.
+"""
+import copy
+import pickle
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+from features import ENCODED_COLUMNS, feature_columns, unfold_scaling
+
+# estimator parameters that must match for the previous weights to fit the new model
+ARCHITECTURE_PARAMS = {
+    MLPClassifier: ('hidden_layer_sizes', 'activation'),
+    LogisticRegression: (),
+}
+
+
+def schema_mismatch(previous, encoders):
+    """
+    Return why the encoders differ from those of the previous artifact, or None if they match.
+    """
+    if not isinstance(previous, dict):
+        return f"previous artifact is a {type(previous).__name__}, not a model dict"
+    missing = [name for key, _, _ in ENCODED_COLUMNS for name in (f'enc_{key}', f'{key}_cols')
+               if name not in previous]
+    if 'model' not in previous:
+        missing.insert(0, 'model')
+    if missing:
+        return f"previous artifact has no {', '.join(missing)}"
+    for key, column, _ in ENCODED_COLUMNS:
+        old = previous[f'enc_{key}'].categories_[0]
+        new = encoders[f'enc_{key}'].categories_[0]
+        if old.dtype.kind != new.dtype.kind or old.tolist() != new.tolist():
+            added = sorted(set(new.tolist()) - set(old.tolist()))
+            removed = sorted(set(old.tolist()) - set(new.tolist()))
+            return f"{column} categories changed (added {added}, removed {removed})"
+        if list(previous[f'{key}_cols']) != list(encoders[f'{key}_cols']):
+            return f"{column} column names changed"
+    return None
+
+
+def model_mismatch(previous_model, model, n_features):
+    """
+    Return why the previous model cannot initialize model, or None if it can.
+    """
+    if type(model) not in ARCHITECTURE_PARAMS:
+        return f"{type(model).__name__} does not support warm start"
+    if type(previous_model) is not type(model):
+        return f"previous model is a {type(previous_model).__name__}, training a {type(model).__name__}"
+    for param in ARCHITECTURE_PARAMS[type(model)]:
+        if np.ravel(getattr(previous_model, param)).tolist() != np.ravel(getattr(model, param)).tolist():
+            return f"{param} changed from {getattr(previous_model, param)} to {getattr(model, param)}"
+    if getattr(previous_model, 'n_features_in_', None) != n_features:
+        return f"previous model has {getattr(previous_model, 'n_features_in_', None)} inputs, not {n_features}"
+    if list(getattr(previous_model, 'classes_', [])) != [False, True]:
+        return "previous model was not trained on the fraud labels"
+    return None
+
+
+def warm_start(model, encoders, path, scaling=None, log=print):
+    """
+    Prepare model for warm-start training from the artifact at path.
+
+    Returns (model, encoders) to train and save: on success a copy of the
+    previous model with model's parameters and warm_start=True, and the
+    previous encoders; otherwise the unchanged arguments (cold start). With
+    scaling (from features.numeric_scaling) the previous model is converted
+    to take the standardized input of build_sparse_features.
+    """
+    try:
+        with open(path, 'rb') as f:
+            previous = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        log(f"Warm start: cannot load {path} ({e}), cold start")
+        return model, encoders
+
+    reason = schema_mismatch(previous, encoders) or model_mismatch(
+        previous['model'], model, len(feature_columns(encoders)))
+    if reason is not None:
+        log(f"Warm start: {reason}, cold start")
+        return model, encoders
+
+    warm = copy.deepcopy(previous['model'])
+    warm.set_params(**{**model.get_params(), 'warm_start': True})
+    if scaling:
+        unfold_scaling(warm, feature_columns(encoders), scaling)
+    log(f"Warm start from {path} (model_version {previous.get('model_version', 'unknown')}, "
+        f"trained {previous.get('train_date', 'unknown')})")
+    return warm, {key: previous[key] for key in encoders}
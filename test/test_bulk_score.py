@@ -0,0 +1,105 @@
+"""Test cases for the offline bulk scoring CLI"""
+import sys
+import os
+import bz2
+import pickle
+import pytest
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from feature_vectorizer import FeatureVectorizer
+import bulk_score as bulk_score_module
+from bulk_score import bulk_score, main
+
+
+@pytest.fixture(scope='module')
+def model_data():
+    """The deployed model artifact."""
+    with open('model/model.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope='module')
+def sample():
+    """A slice of the dataset with one broken time value."""
+    df = pd.read_csv('data/fraud.csv.bz2', nrows=2500)
+    df.loc[7, 'time'] = 'not a time'
+    return df
+
+
+@pytest.fixture
+def sample_file(sample, tmp_path):
+    """The sample written as a bz2 compressed CSV."""
+    path = str(tmp_path / 'sample.csv.bz2')
+    with bz2.open(path, 'wt') as f:
+        sample.to_csv(f, index=False)
+    return path
+
+
+def expected_probabilities(model_data, df):
+    """Probabilities computed row by row through the serving vectorizer and predict_proba."""
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    result = []
+    for t in df.to_dict('records'):
+        try:
+            row = vectorizer.transform(t['amount'], t['product_category'], t['time'], t['address_state'],
+                                       t['gender'], t['credit_score'])
+        except ValueError:
+            result.append(np.nan)
+            continue
+        result.append(model_data['model'].predict_proba(pd.DataFrame(row, columns=vectorizer.columns))[0, 1])
+    return np.array(result)
+
+
+class TestBulkScore:
+    """Test suite for bulk_score"""
+
+    def test_scores_in_input_order(self, model_data, sample, sample_file, tmp_path):
+        """Output has one probability per input row, in order, across workers"""
+        output = str(tmp_path / 'scores.csv')
+
+        n_rows = bulk_score(sample_file, output, workers=2, chunk_size=300, progress=False)
+
+        scores = pd.read_csv(output)['fraud_probability'].to_numpy()
+        assert n_rows == len(sample)
+        np.testing.assert_allclose(scores, expected_probabilities(model_data, sample), rtol=0, atol=1e-12)
+        assert np.isnan(scores[7])
+
+    def test_cli(self, sample_file, tmp_path):
+        """The command line entry point writes the output file"""
+        output = str(tmp_path / 'scores.csv')
+
+        main([sample_file, output, '--workers', '1', '--chunk-size', '1000', '--quiet'])
+
+        assert len(pd.read_csv(output)) == 2500
+
+    def test_parquet_round_trip(self, model_data, sample, sample_file, tmp_path):
+        """Parquet output holds the same probabilities as the CSV output"""
+        pytest.importorskip('pyarrow')
+        output = str(tmp_path / 'scores.parquet')
+
+        bulk_score(sample_file, output, workers=1, chunk_size=1000, progress=False)
+
+        scores = pd.read_parquet(output)['fraud_probability'].to_numpy()
+        np.testing.assert_allclose(scores, expected_probabilities(model_data, sample), rtol=0, atol=1e-12)
+
+    def test_parquet_without_pyarrow(self, sample_file, tmp_path, monkeypatch):
+        """Parquet output without pyarrow fails before any block is scored"""
+        monkeypatch.setattr(bulk_score_module, 'pq', None)
+
+        with pytest.raises(ValueError, match="requires pyarrow"):
+            bulk_score(sample_file, str(tmp_path / 'scores.parquet'), workers=1, progress=False)
+        with pytest.raises(SystemExit):
+            main([sample_file, str(tmp_path / 'scores.parquet'), '--quiet'])
+
+    def test_empty_input_writes_header(self, sample, tmp_path):
+        """An input without data rows gives an output with the header only"""
+        path = str(tmp_path / 'empty.csv')
+        sample.head(0).to_csv(path, index=False)
+        output = str(tmp_path / 'scores.csv')
+
+        assert bulk_score(path, output, workers=1, progress=False) == 0
+        assert list(pd.read_csv(output).columns) == ['fraud_probability']
@@ -1,4 +1,10 @@
-import pandas as pd
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dataset_cache import load_dataset
 
 
 class TestModelQuality:
@@ -7,8 +13,8 @@ class TestModelQuality:
     def test_data_quality(self):
         """Test that the model data quality is as expected."""
     
-        # Load the dataset
-        df = pd.read_csv('data/fraud.csv.bz2')
+        # Load the dataset (parsed once into the columnar cache)
+        df = load_dataset('data/fraud.csv.bz2')
 
         assert df.shape[0] > 10000, "Dataset should have more than 10,000 rows"
         assert df.shape[1] == 7, "Dataset should have exactly 7 columns"
@@ -0,0 +1,91 @@
+"""Test cases for the columnar dataset cache"""
+import sys
+import os
+import bz2
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import dataset_cache
+from dataset_cache import load_dataset, read_dataset
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A bz2 CSV with a slice of the dataset and one unparseable time."""
+    df = pd.read_csv('data/fraud.csv.bz2', nrows=1000)
+    df.loc[4, 'time'] = 'not a time'
+    path = str(tmp_path / 'sample.csv.bz2')
+    with bz2.open(path, 'wt') as f:
+        df.to_csv(f, index=False)
+    return path
+
+
+class TestDatasetCache:
+    """Test suite for load_dataset"""
+
+    def test_cache_matches_csv(self, source, tmp_path):
+        """Cached loads return the same typed frame as parsing the CSV"""
+        cache_dir = str(tmp_path / 'cache')
+
+        first = load_dataset(source, cache_dir)
+        with patch.object(dataset_cache, 'read_dataset', side_effect=AssertionError("CSV read again")):
+            second = load_dataset(source, cache_dir)
+
+        pd.testing.assert_frame_equal(second, read_dataset(source))
+        pd.testing.assert_frame_equal(first, second)
+        assert isinstance(second['product_category'].dtype, pd.CategoricalDtype)
+        assert second['time'].isna().sum() == 1
+        assert second['credit_score'].dtype == np.int8
+        assert second['amount'].dtype == np.float64
+
+    def test_source_change_rebuilds(self, source, tmp_path):
+        """A changed source file gets a new cache and the stale one is removed"""
+        cache_dir = str(tmp_path / 'cache')
+        load_dataset(source, cache_dir)
+        df = pd.read_csv(source).head(10)
+        with bz2.open(source, 'wt') as f:
+            df.to_csv(f, index=False)
+
+        reloaded = load_dataset(source, cache_dir)
+
+        assert len(reloaded) == 10
+        assert len(os.listdir(cache_dir)) == 1
+
+    def test_corrupt_cache_is_rebuilt(self, source, tmp_path):
+        """An unreadable cache is discarded and written again"""
+        cache_dir = str(tmp_path / 'cache')
+        load_dataset(source, cache_dir)
+        cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        with open(os.path.join(cache_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            f.write('{')
+
+        df = load_dataset(source, cache_dir)
+
+        assert len(df) == 1000
+        assert os.path.isfile(os.path.join(cache_path, 'manifest.json'))
+
+    def test_unwritable_cache_falls_back(self, source, tmp_path):
+        """If the cache cannot be written the CSV is read directly"""
+        blocker = tmp_path / 'file'
+        blocker.write_text('not a directory')
+
+        df = load_dataset(source, str(blocker / 'cache'))
+
+        pd.testing.assert_frame_equal(df, read_dataset(source))
+
+    def test_unreadable_new_cache_falls_back(self, source, tmp_path):
+        """A cache that cannot be read back right after writing returns the parsed frame"""
+        cache_dir = str(tmp_path / 'cache')
+        parsed = read_dataset(source).assign(note=lambda df: [{'row': i} for i in range(len(df))])
+
+        with patch.object(dataset_cache, 'read_dataset', return_value=parsed), \
+                pytest.warns(UserWarning, match="Cannot read the dataset cache"):
+            df = load_dataset(source, cache_dir)
+
+        assert df is parsed
+        assert os.listdir(cache_dir) == []
@@ -0,0 +1,154 @@
+"""Test cases for the precompiled FeatureVectorizer"""
+import sys
+import os
+import pickle
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from sklearn.preprocessing import OneHotEncoder
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction
+from feature_vectorizer import FeatureVectorizer
+
+
+@pytest.fixture(scope='module')
+def model_data():
+    """The deployed model artifact."""
+    with open('model/model.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    """A sample of real transactions from the dataset."""
+    df = pd.read_csv('data/fraud.csv.bz2', nrows=300).dropna()
+    return df.to_dict('records')
+
+
+def fit_strict_encoders():
+    """Encoders that raise on unknown categories, like a handle_unknown='error' artifact."""
+    def fit(values, name):
+        enc = OneHotEncoder(sparse_output=False, handle_unknown='error')
+        enc.fit(np.array(values).reshape(-1, 1))
+        return enc, enc.get_feature_names_out([name])
+    enc_product, product_cols = fit(['category_01', 'category_02'], 'product_category')
+    enc_hour, hour_cols = fit(list(range(24)), 'hour')
+    enc_gender, gender_cols = fit(['f', 'm'], 'gender')
+    enc_state, state_cols = fit(['state_01', 'state_02'], 'address_state')
+    return {'enc_product': enc_product, 'enc_hour': enc_hour, 'enc_gender': enc_gender, 'enc_state': enc_state,
+            'product_cols': product_cols, 'hour_cols': hour_cols, 'gender_cols': gender_cols,
+            'state_cols': state_cols}
+
+
+class TestFeatureVectorizer:
+    """Test suite for FeatureVectorizer"""
+
+    def test_matches_dataframe_path(self, model_data, transactions):
+        """Vectorizer rows are identical to create_input_dataframe output"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+
+        for t in transactions:
+            args = (t['amount'], t['product_category'], t['time'], t['address_state'], t['gender'],
+                    t['credit_score'])
+            expected = fraud_prediction.create_input_dataframe(*args)
+            row = vectorizer.transform(*args)
+
+            assert list(expected.columns) == vectorizer.columns
+            np.testing.assert_array_equal(row, expected.to_numpy(dtype=float))
+
+    def test_columns_match_model(self, model_data):
+        """Column layout is the one the model was fitted on"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+
+        assert vectorizer.columns == list(model_data['model'].feature_names_in_)
+
+    def test_ignored_category_matches_dataframe_path(self, model_data):
+        """Unknown categories with handle_unknown='ignore' encode as all zeros"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+        args = (10.0, 'no_such_category', '2024-01-15T14:30:00', 'state_01', 'f', 5)
+
+        row = vectorizer.transform(*args)
+
+        np.testing.assert_array_equal(row, fraud_prediction.create_input_dataframe(*args).to_numpy(dtype=float))
+
+    def test_transform_encoded_matches_transform(self, model_data, transactions):
+        """Batch scatter gives the same rows as single transforms"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+        args = [(t['amount'], t['product_category'], t['time'], t['address_state'], t['gender'], t['credit_score'])
+                for t in transactions]
+
+        X = vectorizer.transform_encoded([vectorizer.encode(*a) for a in args])
+
+        np.testing.assert_array_equal(X, np.vstack([vectorizer.transform(*a) for a in args]))
+
+    def test_transform_fills_preallocated_row(self, model_data):
+        """A preallocated row is reused and fully overwritten"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+        out = np.full((1, vectorizer.n_features), 7.0)
+
+        row = vectorizer.transform(5.0, 'category_01', '2024-01-15T03:00:00', 'state_01', 'm', 5, out=out)
+
+        assert row is out
+        assert out.sum() == 3 + 5.0
+
+    def test_transform_frame_matches_transform(self, model_data):
+        """Whole-frame encoding equals transform row by row; broken rows are masked out"""
+        vectorizer = FeatureVectorizer.from_model_data(model_data)
+        df = pd.read_csv('data/fraud.csv.bz2', nrows=300)
+        df.loc[3, 'time'] = 'not a time'
+        df.loc[5, 'gender'] = None
+
+        X, valid = vectorizer.transform_frame(df)
+
+        assert not valid[3] and not valid[5]
+        for i in np.flatnonzero(valid):
+            t = df.iloc[i]
+            np.testing.assert_array_equal(X[i], vectorizer.transform(
+                t['amount'], t['product_category'], t['time'], t['address_state'], t['gender'],
+                t['credit_score'])[0])
+
+    def test_transform_frame_masks_rejected_categories(self):
+        """Categories a handle_unknown='error' encoder rejects invalidate the row instead of raising"""
+        vectorizer = FeatureVectorizer.from_model_data(fit_strict_encoders())
+        df = pd.DataFrame({'product_category': ['category_01', 'category_99'], 'address_state': ['state_01'] * 2,
+                           'gender': ['m', 'f'], 'amount': [1.0, 2.0], 'credit_score': [5, 5],
+                           'time': ['2024-01-15 03:00:00'] * 2})
+
+        _, valid = vectorizer.transform_frame(df)
+
+        assert valid.tolist() == [True, False]
+
+    @pytest.mark.parametrize('field, value', [
+        ('product_category', 'category_99'),
+        ('gender', 'x'),
+        ('address_state', 'state_99'),
+        ('time_str', 'not-a-valid-time'),
+    ])
+    def test_errors_match_dataframe_path(self, field, value):
+        """Unknown categories raise the same ValueError as create_input_dataframe"""
+        strict = fit_strict_encoders()
+        vectorizer = FeatureVectorizer.from_model_data(strict)
+        kwargs = {'amount': 1.0, 'product_category': 'category_01', 'time_str': '2024-01-15T14:30:00',
+                  'address_state': 'state_01', 'gender': 'm', 'credit_score': 5}
+        kwargs[field] = value
+
+        with patch.multiple(fraud_prediction, **strict):
+            with pytest.raises(ValueError) as expected:
+                fraud_prediction.create_input_dataframe(**kwargs)
+        with pytest.raises(ValueError) as actual:
+            vectorizer.transform(**kwargs)
+
+        assert str(actual.value) == str(expected.value)
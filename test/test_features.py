@@ -0,0 +1,109 @@
+"""Test cases for the shared training feature pipeline"""
+import sys
+import os
+import pickle
+import pytest
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from features import load_transactions, fit_encoders, build_features
+from features import feature_columns, numeric_scaling, build_sparse_features, fold_scaling
+
+
+@pytest.fixture(scope='module')
+def model_data():
+    """The deployed model artifact."""
+    with open('model/model.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    """The cleaned dataset."""
+    return load_transactions()
+
+
+def concat_features(df, model_data):
+    """The per-encoder transform and concat the training scripts used before the shared pipeline."""
+    X = df.assign(hour=df['time'].dt.hour)
+    parts = [pd.DataFrame(model_data[f'enc_{key}'].transform(X[[column]]), columns=model_data[f'{key}_cols'],
+                          index=X.index)
+             for key, column in (('hour', 'hour'), ('product', 'product_category'), ('gender', 'gender'))]
+    return pd.concat(parts + [X['amount'].to_frame()], axis=1)
+
+
+class TestFeatures:
+    """Test suite for the features module"""
+
+    def test_fit_encoders_matches_model(self, model_data, transactions):
+        """Encoders fitted on the dataset have the categories and columns of the deployed model"""
+        encoders = fit_encoders(transactions)
+
+        for key in ('product', 'hour', 'gender', 'state'):
+            np.testing.assert_array_equal(encoders[f'enc_{key}'].categories_[0],
+                                          model_data[f'enc_{key}'].categories_[0])
+            assert encoders[f'enc_{key}'].categories_[0].dtype == model_data[f'enc_{key}'].categories_[0].dtype
+            np.testing.assert_array_equal(encoders[f'{key}_cols'], model_data[f'{key}_cols'])
+
+    def test_build_features_matches_concat(self, model_data, transactions):
+        """The scattered matrix equals the per-encoder DataFrame concat, columns and index included"""
+        sample = transactions.sample(5000, random_state=1)
+
+        X = build_features(sample, model_data)
+
+        pd.testing.assert_frame_equal(X, concat_features(sample, model_data))
+
+    def test_build_features_rejects_incomplete_rows(self, model_data, transactions):
+        """Rows that cannot be encoded raise instead of being scored as zeros"""
+        sample = transactions.head(10).copy()
+        sample.loc[sample.index[2], 'amount'] = np.nan
+
+        with pytest.raises(ValueError, match="1 rows cannot be encoded"):
+            build_features(sample, model_data)
+
+    def test_sparse_matches_dense(self, model_data, transactions):
+        """The CSR matrix holds exactly the dense model input"""
+        sample = transactions.sample(5000, random_state=2)
+
+        X = build_sparse_features(sample, model_data)
+
+        assert sparse.issparse(X) and X.format == 'csr'
+        assert X.nnz <= 4 * len(sample)
+        np.testing.assert_array_equal(X.toarray(), build_features(sample, model_data).to_numpy())
+
+    def test_sparse_full_feature_set(self, model_data, transactions):
+        """The full set appends the state one-hot and standardized credit_score columns"""
+        sample = transactions.head(1000)
+        scaling = numeric_scaling(sample)
+        columns = feature_columns(model_data, full=True)
+
+        X = build_sparse_features(sample, model_data, full=True, scaling=scaling).toarray()
+
+        assert X.shape == (1000, len(columns))
+        states = X[:, columns.index(model_data['state_cols'][0]):columns.index('credit_score')]
+        np.testing.assert_array_equal(states.sum(axis=1), 1.0)
+        np.testing.assert_allclose(X[:, columns.index('credit_score')].mean(), 0.0, atol=1e-9)
+        np.testing.assert_allclose(X[:, columns.index('amount')].std(), 1.0)
+
+    @pytest.mark.parametrize('model', [
+        LogisticRegression(max_iter=200),
+        MLPClassifier(hidden_layer_sizes=[4], max_iter=20, random_state=0),
+    ])
+    def test_fold_scaling_scores_raw_input(self, model_data, transactions, model):
+        """A model trained on scaled sparse input scores the raw dense input identically after folding"""
+        sample = transactions.sample(3000, random_state=3)
+        scaling = numeric_scaling(sample, ['amount'])
+        X_scaled = build_sparse_features(sample, model_data, scaling=scaling)
+        model.fit(X_scaled, sample['fraud'])
+        expected = model.predict_proba(X_scaled)[:, 1]
+
+        fold_scaling(model, feature_columns(model_data), scaling)
+
+        np.testing.assert_allclose(model.predict_proba(build_features(sample, model_data))[:, 1], expected,
+                                   rtol=1e-9, atol=1e-12)
@@ -0,0 +1,155 @@
+"""Test cases for the ASGI entry point fraud_prediction_asgi.py"""
+import sys
+import os
+import json
+import asyncio
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction_asgi
+
+
+def call(method, path, body=b'', headers=()):
+    """Run one request through the ASGI app and return (status, headers, body)."""
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)] or [b'']
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(fraud_prediction_asgi.app(scope, receive, send))
+    start, response_body = sent[0], b''.join(m.get('body', b'') for m in sent[1:])
+    return start['status'], dict(start['headers']), response_body
+
+
+TRANSACTION = {
+    'amount': 120.5,
+    'product_category': 'category_03',
+    'time': '2024-05-03 06:51:00',
+    'address_state': 'state_31',
+    'gender': 'm',
+    'credit_score': 7,
+}
+
+
+class TestAsgiApp:
+    """Test suite for the ASGI app"""
+
+    def test_predict_matches_flask(self):
+        """The asyncio entry point returns the same prediction as the Flask app"""
+        status, _, body = call('POST', '/api/v1/predict', json.dumps(TRANSACTION).encode())
+
+        flask_client = fraud_prediction_asgi.service.app.test_client()
+        expected = flask_client.post('/api/v1/predict', json=TRANSACTION).get_json()
+        assert status == 200
+        assert json.loads(body) == expected
+
+    def test_predict_validation_error(self):
+        """Validation errors use the same status and message as the Flask app"""
+        status, _, body = call('POST', '/api/v1/predict', json.dumps({'amount': 1.0}).encode())
+
+        assert status == 400
+        assert json.loads(body) == {"error": "Missing required fields"}
+
+    def test_predict_invalid_json(self):
+        """A body that is not JSON is rejected"""
+        status, _, _ = call('POST', '/api/v1/predict', b'{not json')
+
+        assert status == 400
+
+    def test_predict_scoring_error(self, monkeypatch):
+        """A ValueError raised while scoring is a 500 like in the Flask app, not an invalid JSON 400"""
+        def failing(data):
+            raise ValueError("model exploded")
+        monkeypatch.setattr(fraud_prediction_asgi.service, 'predict_transaction', failing)
+
+        status, _, body = call('POST', '/api/v1/predict', json.dumps(TRANSACTION).encode())
+
+        assert status == 500
+        assert json.loads(body) == {"error": "model exploded"}
+
+    def test_predict_batch(self):
+        """The batch route is served as well"""
+        status, _, body = call('POST', '/api/v1/predict_batch',
+                               json.dumps({'transactions': [TRANSACTION, {}]}).encode())
+
+        assert status == 200
+        assert json.loads(body)['n_success'] == 1
+
+    def test_health_and_model_version(self):
+        """GET routes return the service payloads"""
+        status, _, body = call('GET', '/health')
+        assert status == 200
+        assert json.loads(body)['status'] == 'healthy'
+
+        status, _, body = call('GET', '/api/v1/model_version')
+        assert status == 200
+        assert json.loads(body)['model_version'] == fraud_prediction_asgi.service.model_version
+
+    def test_metrics(self):
+        """Prometheus metrics are exposed as text"""
+        status, headers, _ = call('GET', '/metrics')
+
+        assert status == 200
+        assert headers[b'content-type'].startswith(b'text/plain')
+
+    def test_predict_stream_matches_flask(self, monkeypatch):
+        """NDJSON results are streamed chunk by chunk, line for line like the Flask route"""
+        monkeypatch.setattr(fraud_prediction_asgi.service, 'STREAM_CHUNK_SIZE', 2)
+        monkeypatch.setattr(fraud_prediction_asgi.service, 'MAX_LINE_BYTES', 200)
+        lines = [json.dumps(TRANSACTION), '', '{"amount": 1}', 'not json', 'x' * 300, json.dumps(TRANSACTION)]
+        body = '\n'.join(lines).encode()
+
+        status, headers, response_body = call('POST', '/api/v1/predict_stream', body)
+
+        assert status == 200
+        assert headers[b'content-type'] == b'application/x-ndjson'
+        flask_response = fraud_prediction_asgi.service.app.test_client().post('/api/v1/predict_stream', data=body)
+        assert response_body == flask_response.data
+        results = [json.loads(line) for line in response_body.splitlines()]
+        assert [r['line'] for r in results] == [1, 3, 4, 5, 6]
+        assert 'fraud_probability' in results[0] and 'error' in results[3]
+
+    def test_predict_stream_ignores_body_limit(self, monkeypatch):
+        """Stream bodies are limited per line, not as a whole"""
+        monkeypatch.setattr(fraud_prediction_asgi, 'MAX_BODY_BYTES', 10)
+        body = '\n'.join([json.dumps(TRANSACTION)] * 3).encode()
+
+        status, _, response_body = call('POST', '/api/v1/predict_stream', body)
+
+        assert status == 200
+        assert len(response_body.splitlines()) == 3
+
+    def test_unknown_route_and_method(self):
+        """Unknown paths give 404, wrong methods 405"""
+        assert call('GET', '/nope')[0] == 404
+        assert call('GET', '/api/v1/predict')[0] == 405
+
+    def test_body_too_large(self, monkeypatch):
+        """Oversized bodies are rejected"""
+        monkeypatch.setattr(fraud_prediction_asgi, 'MAX_BODY_BYTES', 10)
+
+        assert call('POST', '/api/v1/predict', json.dumps(TRANSACTION).encode())[0] == 413
+
+    def test_cors_for_localhost(self):
+        """API responses allow localhost origins only"""
+        _, headers, _ = call('OPTIONS', '/api/v1/predict', headers=[(b'origin', b'http://localhost:8080')])
+        assert headers[b'access-control-allow-origin'] == b'http://localhost:8080'
+
+        _, headers, _ = call('OPTIONS', '/api/v1/predict', headers=[(b'origin', b'http://evil.example')])
+        assert b'access-control-allow-origin' not in headers
@@ -0,0 +1,80 @@
+"""Test cases for the hot path microbenchmarks"""
+import sys
+import os
+import json
+import pickle
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction
+import hot_path_benchmark
+from hot_path_benchmark import measure, measure_allocations, hot_path_stages, run, compare
+
+
+class TestHotPathBenchmark:
+    """Test suite for hot_path_benchmark"""
+
+    def test_measure(self):
+        """Timing reports ns per call over the requested rounds"""
+        calls = []
+        result = measure(lambda: calls.append(1), warmup=5, repeat=3, number=10)
+
+        assert len(calls) == 35
+        assert result['number'] == 10
+        assert 0 < result['ns_min'] <= result['ns_per_op'] <= result['ns_max']
+
+    def test_measure_autorange(self, monkeypatch):
+        """Without number, a round has as many calls as take round_ns"""
+        clock = [0]
+
+        def call():
+            clock[0] += 1000
+
+        monkeypatch.setattr(hot_path_benchmark.time, 'perf_counter_ns', lambda: clock[0])
+        result = measure(call, warmup=0, repeat=1, round_ns=1_000_000)
+
+        assert result['number'] == 1000
+        assert result['ns_per_op'] == 1000
+
+    def test_measure_allocations(self):
+        """Allocations of a call are reported"""
+        assert measure_allocations(lambda: bytearray(100_000))['alloc_peak_bytes'] >= 100_000
+        assert measure_allocations(lambda: None)['alloc_peak_bytes'] < 1000
+
+    def test_stages_run_against_artifacts(self):
+        """Every stage runs, and run_model swaps in each artifact's model only while it runs"""
+        with open('model/model.pkl', 'rb') as f:
+            artifacts = {'model.pkl': pickle.load(f)}
+        stages = hot_path_stages(fraud_prediction, artifacts)
+        served = fraud_prediction.model
+
+        assert {'json_parse', 'validate', 'encode_hour', 'concat', 'run_model[model.pkl]', 'engine[model.pkl]',
+                'jsonify', 'predict_transaction'} <= set(stages)
+        for fn in stages.values():
+            fn()
+        assert 0 <= stages['run_model[model.pkl]']() <= 1
+        assert stages['validate']()[1] is None
+        assert stages['predict_transaction']()[1] == 200
+        assert fraud_prediction.model is served
+
+    def test_report_and_compare(self):
+        """The report is JSON and compares stage by stage"""
+        report = run(fraud_prediction, {}, warmup=1, repeat=1, number=5, only=['json_parse', 'validate'],
+                     log=lambda message: None)
+        baseline = json.loads(json.dumps(report))
+        baseline['stages']['validate']['ns_per_op'] = report['stages']['validate']['ns_per_op'] * 2
+
+        assert set(report['stages']) == {'json_parse', 'validate'}
+        table = compare(report, baseline).splitlines()
+        assert len(table) == 3
+        assert table[2].split()[3] == '0.50'
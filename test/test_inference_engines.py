@@ -0,0 +1,202 @@
+"""Test cases for the compiled inference engines"""
+import sys
+import os
+import pickle
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine, LogisticScorer, ForestScorer, MLPScorer
+
+
+@pytest.fixture(scope='module')
+def model_data():
+    """The deployed model artifact."""
+    with open('model/model.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope='module')
+def vectorizer(model_data):
+    """Vectorizer compiled from the deployed encoders."""
+    return FeatureVectorizer.from_model_data(model_data)
+
+
+@pytest.fixture(scope='module')
+def encoded(vectorizer):
+    """Encoded sample of real transactions, plus one with an ignored category."""
+    df = pd.read_csv('data/fraud.csv.bz2', nrows=500).dropna()
+    rows = [vectorizer.encode(t['amount'], t['product_category'], t['time'], t['address_state'], t['gender'],
+                              t['credit_score'])
+            for t in df.to_dict('records')]
+    rows.append(vectorizer.encode(25.0, 'unseen_category', '2024-01-01 00:00:00', 'state_01', 'f', 3))
+    return rows
+
+
+def sklearn_probabilities(model, vectorizer, X):
+    """Reference probabilities from predict_proba on a DataFrame."""
+    return model.predict_proba(pd.DataFrame(X, columns=vectorizer.columns))[:, 1]
+
+
+class TestLogisticScorer:
+    """Test suite for the closed-form LogisticRegression scorer"""
+
+    def test_compiles_for_logistic_regression(self, model_data, vectorizer):
+        """The deployed LogisticRegression gets a LogisticScorer"""
+        assert isinstance(compile_engine(model_data['model'], vectorizer), LogisticScorer)
+
+    def test_predict_one_matches_predict_proba(self, model_data, vectorizer, encoded):
+        """Single-row scores agree with sklearn"""
+        engine = compile_engine(model_data['model'], vectorizer)
+        X = vectorizer.transform_encoded(encoded)
+
+        actual = np.array([engine.predict_one(e) for e in encoded])
+
+        np.testing.assert_allclose(actual, sklearn_probabilities(model_data['model'], vectorizer, X),
+                                   rtol=0, atol=1e-12)
+
+    def test_predict_batch_matches_predict_proba(self, model_data, vectorizer, encoded):
+        """Batch scores agree with sklearn"""
+        engine = compile_engine(model_data['model'], vectorizer)
+        X = vectorizer.transform_encoded(encoded)
+
+        np.testing.assert_allclose(engine.predict_batch(X), sklearn_probabilities(model_data['model'], vectorizer, X),
+                                   rtol=0, atol=1e-12)
+
+    def test_extreme_logits(self, model_data, vectorizer):
+        """Huge amounts saturate instead of overflowing"""
+        engine = compile_engine(model_data['model'], vectorizer)
+        encoded = vectorizer.encode(0.0, 'category_01', '2024-01-01 00:00:00', 'state_01', 'f', 3)
+
+        for amount in (1e308, -1e308):
+            p = engine.predict_one(encoded._replace(amount=amount))
+            assert 0.0 <= p <= 1.0
+
+
+@pytest.fixture(scope='module')
+def forest(vectorizer, encoded):
+    """A small forest fitted on the vectorizer layout."""
+    X = pd.DataFrame(vectorizer.transform_encoded(encoded), columns=vectorizer.columns)
+    y = np.random.default_rng(0).random(len(X)) < 0.3
+    return RandomForestClassifier(n_estimators=5, class_weight='balanced', random_state=0).fit(X, y)
+
+
+class TestForestScorer:
+    """Test suite for the flattened RandomForest scorer"""
+
+    def test_compiles_for_random_forest(self, forest, vectorizer):
+        """A RandomForestClassifier gets a ForestScorer"""
+        assert isinstance(compile_engine(forest, vectorizer), ForestScorer)
+
+    def test_predict_batch_identical_to_predict_proba(self, forest, vectorizer, encoded):
+        """Batch traversal reproduces sklearn bit for bit"""
+        engine = compile_engine(forest, vectorizer)
+        X = vectorizer.transform_encoded(encoded)
+
+        np.testing.assert_array_equal(engine.predict_batch(X), sklearn_probabilities(forest, vectorizer, X))
+
+    @pytest.mark.parametrize('lookup', [True, False])
+    def test_predict_one_identical_to_predict_proba(self, forest, vectorizer, encoded, lookup):
+        """Single-row traversal and lookup tables reproduce sklearn bit for bit"""
+        engine = compile_engine(forest, vectorizer, forest_lookup=lookup)
+        X = vectorizer.transform_encoded(encoded)
+
+        actual = np.array([engine.predict_one(e) for e in encoded])
+
+        np.testing.assert_array_equal(actual, sklearn_probabilities(forest, vectorizer, X))
+
+    def test_lookup_at_thresholds(self, forest, vectorizer, encoded):
+        """Amounts exactly on and next to split thresholds land in the right interval"""
+        engine = compile_engine(forest, vectorizer)
+        thresholds = engine.threshold[(engine.feature == vectorizer.amount_col) & ~engine.is_leaf][:20]
+        amounts = np.concatenate([thresholds, np.nextafter(thresholds.astype(np.float32), np.float32(np.inf))])
+        rows = [encoded[0]._replace(amount=float(a)) for a in amounts]
+        X = vectorizer.transform_encoded(rows)
+
+        actual = np.array([engine.predict_one(e) for e in rows])
+
+        np.testing.assert_array_equal(actual, sklearn_probabilities(forest, vectorizer, X))
+
+    def test_precompile(self, forest, vectorizer):
+        """precompile builds a table for every category combination, including ignored ones"""
+        engine = compile_engine(forest, vectorizer)
+
+        engine.precompile()
+
+        v = vectorizer
+        assert len(engine._tables) == (len(v.hour_index) + 1) * (len(v.product_index) + 1) * (len(v.gender_index) + 1)
+
+
+@pytest.fixture(scope='module')
+def mlp(vectorizer, encoded):
+    """A small [10, 10] network fitted on the vectorizer layout."""
+    X = pd.DataFrame(vectorizer.transform_encoded(encoded), columns=vectorizer.columns)
+    y = np.random.default_rng(0).random(len(X)) < 0.3
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        return MLPClassifier(hidden_layer_sizes=[10, 10], max_iter=50, random_state=0).fit(X, y)
+
+
+class TestMLPScorer:
+    """Test suite for the float32 MLP scorer"""
+
+    def test_compiles_for_mlp(self, mlp, vectorizer):
+        """An MLPClassifier gets an MLPScorer"""
+        assert isinstance(compile_engine(mlp, vectorizer), MLPScorer)
+
+    def test_predict_one_within_tolerance(self, mlp, vectorizer, encoded):
+        """Gather-and-sum forward pass agrees with sklearn within 1e-5"""
+        engine = compile_engine(mlp, vectorizer)
+        X = vectorizer.transform_encoded(encoded)
+
+        actual = np.array([engine.predict_one(e) for e in encoded])
+
+        np.testing.assert_allclose(actual, sklearn_probabilities(mlp, vectorizer, X), rtol=0, atol=1e-5)
+
+    def test_predict_batch_within_tolerance(self, mlp, vectorizer, encoded):
+        """Batch forward pass agrees with sklearn within 1e-5"""
+        engine = compile_engine(mlp, vectorizer)
+        X = vectorizer.transform_encoded(encoded)
+
+        np.testing.assert_allclose(engine.predict_batch(X), sklearn_probabilities(mlp, vectorizer, X),
+                                   rtol=0, atol=1e-5)
+
+    @pytest.mark.parametrize('activation', ['tanh', 'logistic', 'identity'])
+    def test_other_activations(self, vectorizer, encoded, activation):
+        """Hidden activations other than relu are supported"""
+        X = pd.DataFrame(vectorizer.transform_encoded(encoded[:100]), columns=vectorizer.columns)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            model = MLPClassifier(hidden_layer_sizes=[4], activation=activation, max_iter=5,
+                                  random_state=0).fit(X, np.arange(100) % 2)
+        engine = compile_engine(model, vectorizer)
+
+        np.testing.assert_allclose([engine.predict_one(e) for e in encoded[:100]],
+                                   model.predict_proba(X)[:, 1], rtol=0, atol=1e-5)
+
+
+class TestCompileEngine:
+    """Test suite for engine selection"""
+
+    def test_unknown_model_falls_back(self, vectorizer):
+        """Unrecognized model types are not compiled"""
+        model = DummyClassifier().fit(np.zeros((4, vectorizer.n_features)), [0, 1, 0, 1])
+
+        assert compile_engine(model, vectorizer) is None
+
+    def test_mismatched_layout_falls_back(self, model_data, vectorizer):
+        """Models fitted on another column layout are not compiled"""
+        model = model_data['model']
+        X = pd.DataFrame(np.zeros((2, 3)), columns=['amount', 'a', 'b'])
+        other = type(model)().fit(X, [0, 1])
+
+        assert compile_engine(other, vectorizer) is None
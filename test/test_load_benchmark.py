@@ -0,0 +1,139 @@
+"""Test cases for the HTTP load benchmark"""
+import sys
+import os
+import json
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import load_benchmark
+from load_benchmark import (sample_payloads, run_closed_loop, run_open_loop, compare, wait_until_healthy, Recorder,
+                            run_benchmark, start_service)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers /health and /api/v1/predict like the service; bodies without amount fail."""
+    protocol_version = 'HTTP/1.1'
+
+    def _answer(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._answer(200, {'status': 'healthy'})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if 'amount' not in request:
+            self._answer(400, {'error': 'Missing required fields'})
+        else:
+            self._answer(200, {'fraud_probability': 0.1})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def url():
+    """A stub service on a free port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+@pytest.fixture(scope='module')
+def payloads():
+    return sample_payloads(50)
+
+
+class TestLoadBenchmark:
+    """Test suite for the load benchmark"""
+
+    def test_sample_payloads(self, payloads):
+        """Payloads are predict requests with every field set"""
+        request = json.loads(payloads[0])
+
+        assert len(payloads) == 50
+        assert set(request) == {'amount', 'product_category', 'time', 'address_state', 'gender', 'credit_score'}
+        assert len(request['time']) == 19
+
+    def test_closed_loop(self, url, payloads):
+        """Closed-loop runs report throughput and latency percentiles"""
+        wait_until_healthy(url, timeout=5)
+        summary = run_closed_loop(url, payloads, concurrency=2, duration=0.5, warmup=0.1)
+
+        assert summary['requests'] > 0
+        assert summary['error_rate'] == 0.0
+        assert summary['throughput_rps'] > 0
+        latency = summary['latency_ms']
+        assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['p99_9'] <= latency['max']
+
+    def test_open_loop_counts_errors(self, url):
+        """Open-loop runs offer the configured rate and count failed requests"""
+        payloads = [b'{"amount": 1.0}', b'{}']
+        summary = run_open_loop(url, payloads, rate=200, duration=0.5, connections=4)
+
+        assert summary['offered_rps'] == 200
+        assert 50 < summary['requests'] < 200
+        assert 0.3 < summary['error_rate'] < 0.7
+
+    def test_summary_window(self):
+        """Only requests that arrived in the measured window count"""
+        recorder = Recorder()
+        for i in range(10):
+            recorder.add(float(i), 0.001 * (i + 1), i != 5)
+        summary = recorder.summary(2.0, 8.0)
+
+        assert summary['requests'] == 6
+        assert summary['errors'] == 1
+        assert summary['throughput_rps'] == pytest.approx(5 / 6.0)
+        assert summary['latency_ms']['max'] == pytest.approx(8.0)
+
+    def test_compare(self):
+        """Latency and throughput regressions beyond the threshold and errors are reported"""
+        def results(p99, throughput, error_rate=0.0):
+            return {'scenarios': {'closed-c8': {'latency_ms': {'p50': 1.0, 'p99': p99},
+                                                'throughput_rps': throughput, 'error_rate': error_rate}}}
+        baseline = results(10.0, 1000.0)
+
+        assert compare(results(12.0, 900.0), baseline, max_regression=0.25) == []
+        assert compare(results(10.0, 1000.0), {}) == []
+        regressions = compare(results(13.0, 700.0, 0.01), baseline, max_regression=0.25)
+        assert len(regressions) == 3
+        assert any('p99 latency' in message for message in regressions)
+        assert any('throughput' in message for message in regressions)
+        assert any('error rate' in message for message in regressions)
+
+    def test_started_service_has_cache_off(self, url, payloads, monkeypatch):
+        """The started service runs without the prediction cache, and the setting is recorded"""
+        started = {}
+
+        class Process:
+            def __init__(self, args, cwd, env):
+                started['env'] = env
+
+            def terminate(self):
+                pass
+
+            def wait(self, timeout):
+                pass
+
+        monkeypatch.setattr(load_benchmark, 'subprocess', SimpleNamespace(Popen=Process))
+        monkeypatch.setattr(load_benchmark, 'wait_until_healthy', lambda *args: None)
+        with start_service('gunicorn', 8091):
+            pass
+        results = run_benchmark(url, concurrency=[1], duration=0.2, warmup=0.0, payloads=payloads, cache_size=0,
+                                log=lambda message: None)
+
+        assert started['env']['PREDICTION_CACHE_SIZE'] == '0'
+        assert results['config']['prediction_cache_size'] == 0
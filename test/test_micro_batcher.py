@@ -0,0 +1,105 @@
+"""Test cases for the MicroBatcher"""
+import sys
+import os
+import threading
+import time
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from prometheus_client import CollectorRegistry, Histogram
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from micro_batcher import MicroBatcher, QueueFullError
+
+
+class RecordingScorer:
+    """score_batch stand-in that doubles its input and records batch sizes."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        return batch * 2.0
+
+
+class TestMicroBatcher:
+    """Test suite for MicroBatcher"""
+
+    def test_each_caller_gets_its_own_result(self):
+        """Results are routed back to the request that produced them"""
+        batcher = MicroBatcher(np.array, RecordingScorer(), window=0.005, max_batch_size=8)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(batcher.submit, [float(i) for i in range(64)]))
+
+        assert results == [2.0 * i for i in range(64)]
+
+    def test_concurrent_requests_are_batched(self):
+        """Requests arriving within the window share a batch call"""
+        scorer = RecordingScorer()
+        batcher = MicroBatcher(np.array, scorer, window=0.05, max_batch_size=64)
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(batcher.submit, [1.0] * 32))
+
+        assert sum(scorer.batch_sizes) == 32
+        assert len(scorer.batch_sizes) < 32
+
+    def test_max_batch_size_is_respected(self):
+        """No batch is larger than max_batch_size"""
+        scorer = RecordingScorer()
+        batcher = MicroBatcher(np.array, scorer, window=0.05, max_batch_size=4)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(batcher.submit, [1.0] * 16))
+
+        assert max(scorer.batch_sizes) <= 4
+
+    def test_errors_reach_every_caller(self):
+        """An exception from score_batch is raised in each waiting request"""
+        def fail(batch):
+            raise RuntimeError("model exploded")
+        batcher = MicroBatcher(np.array, fail, window=0.001)
+
+        with pytest.raises(RuntimeError, match="model exploded"):
+            batcher.submit(1.0)
+
+    def test_queue_full(self):
+        """Requests beyond max_queue_depth are rejected instead of queued"""
+        scoring = threading.Event()
+        release = threading.Event()
+
+        def blocked(batch):
+            scoring.set()
+            release.wait(5)
+            return batch
+        batcher = MicroBatcher(np.array, blocked, window=0.0, max_batch_size=1, max_queue_depth=1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(batcher.submit, 1.0)
+            assert scoring.wait(5)
+            second = pool.submit(batcher.submit, 2.0)
+            while batcher._queue.qsize() == 0:
+                time.sleep(0.001)
+            with pytest.raises(QueueFullError):
+                batcher.submit(3.0)
+            release.set()
+            assert first.result() == 1.0
+            assert second.result() == 2.0
+
+    def test_metrics_are_observed(self):
+        """Batch size and queueing delay histograms are filled"""
+        registry = CollectorRegistry()
+        sizes = Histogram('test_batch_size', 'batch size', registry=registry)
+        delays = Histogram('test_queue_delay_seconds', 'queue delay', registry=registry)
+        batcher = MicroBatcher(np.array, RecordingScorer(), window=0.001,
+                               batch_size_histogram=sizes, queue_delay_histogram=delays)
+
+        for i in range(3):
+            batcher.submit(float(i))
+
+        assert registry.get_sample_value('test_batch_size_sum') == 3
+        assert registry.get_sample_value('test_queue_delay_seconds_count') == 3
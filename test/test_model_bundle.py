@@ -0,0 +1,152 @@
+"""Test cases for the memory-mappable model bundle format"""
+import sys
+import os
+import json
+import pickle
+import subprocess
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine, ForestScorer
+from model_bundle import export_bundle, load_bundle, BundleEncoder, BundleError
+
+
+@pytest.fixture(scope='module')
+def model_data():
+    """The deployed model artifact."""
+    with open('model/model.pkl', 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture
+def bundle_dir(model_data, tmp_path):
+    """The deployed model exported as a bundle."""
+    path = str(tmp_path / 'bundle')
+    export_bundle(model_data, path)
+    return path
+
+
+@pytest.fixture
+def forest_bundle_dir(model_data, tmp_path):
+    """A small random forest on the deployed encoders, exported as a bundle."""
+    vectorizer = FeatureVectorizer.from_model_data(model_data)
+    df = pd.read_csv('data/fraud.csv.bz2', nrows=300).dropna()
+    X, _ = vectorizer.transform_frame(df.assign(time=pd.to_datetime(df['time'])))
+    forest = RandomForestClassifier(n_estimators=3, random_state=0).fit(
+        pd.DataFrame(X, columns=vectorizer.columns), df['fraud'])
+    path = str(tmp_path / 'forest-bundle')
+    export_bundle({**model_data, 'model': forest}, path)
+    return path
+
+
+class TestModelBundle:
+    """Test suite for export_bundle and load_bundle"""
+
+    def test_manifest(self, model_data, bundle_dir):
+        """The manifest carries the version, date, columns and checksums"""
+        with open(os.path.join(bundle_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        assert manifest['engine'] == 'logistic_regression'
+        assert manifest['model_version'] == model_data['model_version']
+        assert manifest['train_date'] == str(model_data['train_date'])
+        assert manifest['columns'] == list(model_data['model'].feature_names_in_)
+        assert manifest['fingerprint'] == model_data.get('fingerprint', 'unknown')
+        assert all(len(entry['sha256']) == 64 for entry in manifest['arrays'].values())
+
+    def test_arrays_are_memory_mapped(self, bundle_dir):
+        """Arrays are opened as read-only memory maps"""
+        bundle = load_bundle(bundle_dir)
+
+        assert all(isinstance(a, np.memmap) and not a.flags.writeable for a in bundle.arrays.values())
+
+    def test_forest_engine_uses_mapped_arrays(self, forest_bundle_dir):
+        """A forest engine scores from the memory-mapped arrays instead of private copies"""
+        bundle = load_bundle(forest_bundle_dir)
+        engine = bundle.engine(FeatureVectorizer.from_model_data(bundle.model_data()))
+        engine.precompile()
+
+        assert isinstance(engine, ForestScorer)
+        assert all(isinstance(a, np.memmap) for a in bundle.arrays.values())
+        for name in ('feature', 'threshold', 'left', 'right', 'value', 'missing_left', 'roots'):
+            assert np.shares_memory(getattr(engine, name), bundle.arrays[name])
+        assert engine._nodes is None
+
+    def test_bundle_scores_like_pickle(self, model_data, bundle_dir):
+        """The engine restored from the bundle matches the one compiled from the pickle"""
+        bundle = load_bundle(bundle_dir)
+        restored_data = bundle.model_data()
+        vectorizer = FeatureVectorizer.from_model_data(restored_data)
+        engine = bundle.engine(vectorizer)
+        reference = compile_engine(model_data['model'], FeatureVectorizer.from_model_data(model_data))
+
+        df = pd.read_csv('data/fraud.csv.bz2', nrows=200).dropna()
+        for t in df.to_dict('records'):
+            encoded = vectorizer.encode(t['amount'], t['product_category'], t['time'], t['address_state'],
+                                        t['gender'], t['credit_score'])
+            assert engine.predict_one(encoded) == reference.predict_one(encoded)
+
+    def test_checksum_mismatch(self, bundle_dir):
+        """A modified array file is rejected"""
+        np.save(os.path.join(bundle_dir, 'coef.npy'), np.zeros(47))
+
+        with pytest.raises(BundleError, match="Checksum mismatch"):
+            load_bundle(bundle_dir)
+
+    def test_missing_bundle(self, tmp_path):
+        """A directory without a manifest is rejected"""
+        with pytest.raises(BundleError):
+            load_bundle(str(tmp_path))
+
+    def test_server_loads_bundle(self, bundle_dir):
+        """fraud_prediction.py serves a bundle without unpickling the model"""
+        code = ("import sys, pickle; sys.path.insert(0, 'src'); "
+                "pickle.load = None; "
+                "import fraud_prediction as fp; "
+                "print(fp.predict_transaction({'amount': 10.0, 'product_category': 'category_01', "
+                "'time': '2024-01-01 10:00:00', 'address_state': 'state_01', 'gender': 'f', 'credit_score': 3}))")
+        result = subprocess.run([sys.executable, '-c', code], env={**os.environ, 'MODEL_BUNDLE': bundle_dir},
+                                capture_output=True, text=True, check=True)
+
+        assert "'fraud_probability'" in result.stdout
+
+    def test_bundle_load_does_not_import_sklearn(self, bundle_dir):
+        """Loading a bundle and restoring its engine leaves scikit-learn unloaded"""
+        code = ("import sys; sys.path.insert(0, 'src'); "
+                "from feature_vectorizer import FeatureVectorizer; "
+                "from model_bundle import load_bundle; "
+                f"bundle = load_bundle({bundle_dir!r}); "
+                "bundle.engine(FeatureVectorizer.from_model_data(bundle.model_data())); "
+                "import fraud_prediction; "
+                "print(sorted(name for name in sys.modules if name.split('.')[0] == 'sklearn'))")
+        result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                                env={**os.environ, 'MODEL_BUNDLE': bundle_dir},
+                                capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == '[]'
+
+
+class TestBundleEncoder:
+    """Test suite for BundleEncoder"""
+
+    def test_transform_matches_one_hot_encoder(self, model_data):
+        """BundleEncoder.transform reproduces the fitted OneHotEncoder"""
+        for name in ('enc_product', 'enc_hour', 'enc_gender', 'enc_state'):
+            encoder = model_data[name]
+            stand_in = BundleEncoder(encoder.categories_[0].tolist(), encoder.handle_unknown)
+            values = np.array(encoder.categories_[0].tolist()[:3]).reshape(-1, 1)
+
+            np.testing.assert_array_equal(stand_in.transform(values), encoder.transform(values))
+
+    def test_unknown_error_message(self):
+        """handle_unknown='error' raises sklearn's message"""
+        encoder = BundleEncoder(['a', 'b'], handle_unknown='error')
+
+        with pytest.raises(ValueError, match=r"Found unknown categories \[np.str_\('x'\)\] in column 0"):
+            encoder.transform(np.array(['x']).reshape(1, -1))
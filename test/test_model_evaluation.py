@@ -0,0 +1,106 @@
+"""Test cases for the model evaluation harness"""
+import sys
+import os
+import pickle
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import precision_recall_curve, average_precision_score, f1_score, recall_score
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from features import load_transactions, fit_encoders, feature_columns, build_sparse_features, fold_scaling
+from model_bundle import export_bundle
+from model_evaluation import threshold_sweep, metrics_at, summarize, load_artifacts, evaluate, holdout_split
+
+
+@pytest.fixture
+def labels_and_scores():
+    """Synthetic labels and rounded scores with ties."""
+    rng = np.random.default_rng(0)
+    y = rng.random(5000) < 0.1
+    return y, np.round(rng.random(5000) * 0.5 + y * 0.3, 3)
+
+
+class TestThresholdSweep:
+    """Test suite for threshold_sweep and metrics_at"""
+
+    def test_curve_matches_sklearn(self, labels_and_scores):
+        """The sweep is sklearn's precision-recall curve"""
+        y, scores = labels_and_scores
+        sweep = threshold_sweep(y, scores)
+        precision, recall, thresholds = precision_recall_curve(y, scores)
+
+        np.testing.assert_allclose(sweep['thresholds'][::-1], thresholds)
+        np.testing.assert_allclose(sweep['precision'][::-1], precision[:-1])
+        np.testing.assert_allclose(sweep['recall'][::-1], recall[:-1])
+        assert summarize(sweep)['average_precision'] == pytest.approx(average_precision_score(y, scores))
+
+    def test_metrics_at_thresholds(self, labels_and_scores):
+        """Metrics read off the sweep equal those of thresholded predictions"""
+        y, scores = labels_and_scores
+        sweep = threshold_sweep(y, scores)
+        metrics = metrics_at(sweep, [0.0, 0.42, 0.5, 2.0])
+        strict = metrics_at(sweep, [0.5], strict=True)
+
+        assert metrics['recall'] == pytest.approx([1.0, recall_score(y, scores >= 0.42),
+                                                   recall_score(y, scores >= 0.5), 0.0])
+        assert metrics['tp'][0] + metrics['fn'][0] == y.sum()
+        assert metrics['tp'][-1] == metrics['fp'][-1] == 0
+        assert strict['f1'][0] == pytest.approx(f1_score(y, scores > 0.5))
+
+    def test_best_f1(self, labels_and_scores):
+        """The best-F1 entry is the maximum over all thresholds"""
+        y, scores = labels_and_scores
+        entry = summarize(threshold_sweep(y, scores))
+
+        best = max(f1_score(y, scores >= t) for t in np.unique(scores))
+        assert entry['best_f1']['f1'] == pytest.approx(best)
+        assert len(entry['sweep']['threshold']) == 101
+
+
+class TestEvaluate:
+    """Test suite for load_artifacts and evaluate"""
+
+    @pytest.fixture
+    def model_dir(self, tmp_path):
+        """A model directory with a served-layout model, a full-layout model, encoders and a bundle."""
+        df = load_transactions()
+        train = df.drop(holdout_split(df).index)[:20000]
+        encoders = fit_encoders(df)
+        y = train['fraud']
+
+        served = LogisticRegression(max_iter=1000, class_weight='balanced')
+        served.fit(build_sparse_features(train, encoders), y)
+        full = LogisticRegression(max_iter=1000, class_weight='balanced')
+        scaling = {'amount': (0.0, 100.0), 'credit_score': (0.0, 100.0)}
+        full.fit(build_sparse_features(train, encoders, full=True, scaling=scaling), y)
+        fold_scaling(full, feature_columns(encoders, full=True), scaling)
+        # shuffled columns: the harness selects them by name
+        order = np.random.default_rng(0).permutation(full.coef_.shape[1])
+        full.coef_ = full.coef_[:, order]
+        full.feature_names_in_ = full.feature_names_in_[order]
+
+        for name, model in (('lreg-model.pkl', served), ('full-model.pkl', full)):
+            with open(tmp_path / name, 'wb') as f:
+                pickle.dump({'model': model, **encoders, 'model_version': '0.1'}, f)
+        with open(tmp_path / 'encoders.pkl', 'wb') as f:
+            pickle.dump(encoders, f)
+        export_bundle({'model': served, **encoders, 'model_version': '0.1'}, str(tmp_path / 'lreg-model-bundle'))
+        return tmp_path
+
+    def test_load_artifacts(self, model_dir):
+        """Model pickles are loaded; encoders and bundles are not artifacts"""
+        assert sorted(load_artifacts(str(model_dir))) == ['full-model.pkl', 'lreg-model.pkl']
+
+    def test_evaluate(self, model_dir, tmp_path):
+        """Both layouts are scored against the shared encoding"""
+        report = evaluate(str(model_dir), output=str(tmp_path / 'report.json'))
+
+        assert os.path.exists(tmp_path / 'report.json')
+        for entry in report['models'].values():
+            default = entry['default']
+            assert entry['model'] == 'LogisticRegression'
+            assert default['tp'] + default['fp'] + default['tn'] + default['fn'] == report['data']['rows']
+            assert default['recall'] >= 0.5
@@ -0,0 +1,96 @@
+"""Test cases for Prometheus multiprocess metrics (PROMETHEUS_MULTIPROC_DIR)"""
+import sys
+import os
+import importlib.util
+import subprocess
+from types import SimpleNamespace
+from prometheus_client import CollectorRegistry, multiprocess, generate_latest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# one worker process: score some requests, then print what its /metrics returns
+WORKER = """
+import sys
+sys.path.insert(0, 'src')
+import fraud_prediction
+client = fraud_prediction.app.test_client()
+transaction = {'amount': 120.5, 'product_category': 'category_03', 'time': '2024-05-03 06:51:00',
+               'address_state': 'state_31', 'gender': 'm', 'credit_score': 7}
+for _ in range(int(sys.argv[1])):
+    assert client.post('/api/v1/predict', json=transaction).status_code == 200
+sys.stdout.write(client.get('/metrics').get_data(as_text=True))
+"""
+
+
+def run_worker(metrics_dir, requests):
+    """Run WORKER in its own process with the shared metrics directory; returns its /metrics output."""
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(metrics_dir)}
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', WORKER, str(requests)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def load_gunicorn_conf():
+    """Execute gunicorn.conf.py as gunicorn does."""
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMultiprocessMetrics:
+    """Test suite for metrics aggregated over worker processes"""
+
+    def test_metrics_are_aggregated_over_processes(self, tmp_path):
+        """/metrics of any worker reports the requests of all workers"""
+        run_worker(tmp_path, 2)
+        output = run_worker(tmp_path, 3)
+
+        assert 'fraud_predictions_total{status="success"} 5.0' in output
+        assert ('fraud_prediction_stage_duration_seconds_count{model_family="lreg",model_version="0.1",'
+                'stage="model_inference"} 5.0') in output
+        assert 'model_version_info{version="0.1"} 1.0' in output
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        assert b'fraud_predictions_total{status="success"} 5.0' in generate_latest(registry)
+
+    def test_gunicorn_conf_clears_metrics_dir(self, tmp_path, monkeypatch):
+        """gunicorn.conf.py removes every file of an earlier run, even if its pid is in use again"""
+        metrics_dir = tmp_path / 'metrics'
+        metrics_dir.mkdir()
+        (metrics_dir / f'counter_{os.getpid()}.db').write_bytes(b'')
+        (metrics_dir / 'counter_999999999.db').write_bytes(b'')
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(metrics_dir))
+
+        conf = load_gunicorn_conf()
+
+        assert conf.metrics_dir == str(metrics_dir)
+        assert os.listdir(metrics_dir) == []
+        conf.on_exit(None)
+        assert metrics_dir.is_dir()
+
+    def test_gunicorn_conf_default_dir_per_instance(self, monkeypatch):
+        """Without PROMETHEUS_MULTIPROC_DIR each master gets its own directory, removed at shutdown"""
+        # set first, so monkeypatch also removes the value gunicorn.conf.py sets afterwards
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', '')
+        monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR')
+
+        conf = load_gunicorn_conf()
+
+        assert conf.metrics_dir.endswith(f'fraud-prediction-metrics-{os.getpid()}')
+        assert os.environ['PROMETHEUS_MULTIPROC_DIR'] == conf.metrics_dir
+        assert os.path.isdir(conf.metrics_dir)
+        conf.on_exit(None)
+        assert not os.path.exists(conf.metrics_dir)
+
+    def test_child_exit_drops_live_gauges(self, tmp_path, monkeypatch):
+        """An exited worker's live gauges are removed, its counters are kept"""
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        conf = load_gunicorn_conf()
+        for name in ('gauge_livemax_4242.db', 'counter_4242.db', f'gauge_livemax_{os.getpid()}.db'):
+            (tmp_path / name).write_bytes(b'')
+
+        conf.child_exit(None, SimpleNamespace(pid=4242))
+
+        assert sorted(os.listdir(tmp_path)) == sorted(['counter_4242.db', f'gauge_livemax_{os.getpid()}.db'])
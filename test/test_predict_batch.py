@@ -0,0 +1,98 @@
+"""Test cases for the /api/v1/predict_batch endpoint of fraud_prediction.py"""
+import sys
+import os
+import pytest
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction
+
+
+def make_transaction(**overrides):
+    """Build a valid transaction payload, optionally overriding fields."""
+    transaction = {
+        'amount': 120.5,
+        'product_category': 'category_03',
+        'time': '2024-05-03 06:51:00',
+        'address_state': 'state_31',
+        'gender': 'm',
+        'credit_score': 7,
+    }
+    transaction.update(overrides)
+    return transaction
+
+
+class TestPredictBatch:
+    """Test suite for the batch prediction endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client."""
+        fraud_prediction.app.config['TESTING'] = True
+        return fraud_prediction.app.test_client()
+
+    def test_batch_matches_single_predictions(self, client):
+        """Each batch probability equals the one returned by /api/v1/predict"""
+        transactions = [make_transaction(amount=a, product_category=f'category_{c:02d}',
+                                         time=f'2024-05-03 {h:02d}:10:00')
+                        for a, c, h in [(3.18, 1, 0), (310.57, 12, 6), (1500.0, 20, 23)]]
+
+        response = client.post('/api/v1/predict_batch', json={'transactions': transactions})
+
+        assert response.status_code == 200
+        results = response.get_json()['results']
+        for transaction, result in zip(transactions, results):
+            single = client.post('/api/v1/predict', json=transaction).get_json()
+            assert result['fraud_probability'] == pytest.approx(single['fraud_probability'], abs=1e-12)
+
+    def test_batch_reports_row_errors_without_failing(self, client):
+        """Invalid rows get an error entry, valid rows are still scored"""
+        transactions = [
+            make_transaction(),
+            make_transaction(time='not-a-valid-time'),
+            {'amount': 10.0},
+            make_transaction(amount='abc'),
+            make_transaction(),
+        ]
+
+        response = client.post('/api/v1/predict_batch', json={'transactions': transactions})
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['n_success'] == 2
+        assert body['n_errors'] == 3
+        assert 'fraud_probability' in body['results'][0]
+        assert 'Invalid time format' in body['results'][1]['error']
+        assert 'Missing required fields' in body['results'][2]['error']
+        assert 'Invalid amount' in body['results'][3]['error']
+        assert 'fraud_probability' in body['results'][4]
+
+    def test_batch_all_rows_invalid(self, client):
+        """A batch without any valid row returns only errors"""
+        response = client.post('/api/v1/predict_batch', json={'transactions': [{'gender': 'm'}]})
+
+        assert response.status_code == 200
+        assert response.get_json()['n_success'] == 0
+
+    def test_batch_requires_transactions(self, client):
+        """A missing or empty transactions list is rejected"""
+        assert client.post('/api/v1/predict_batch', json={}).status_code == 400
+        assert client.post('/api/v1/predict_batch', json={'transactions': []}).status_code == 400
+
+    def test_batch_too_large(self, client, monkeypatch):
+        """Batches above MAX_BATCH_SIZE are rejected"""
+        monkeypatch.setattr(fraud_prediction, 'MAX_BATCH_SIZE', 2)
+
+        response = client.post('/api/v1/predict_batch', json={'transactions': [make_transaction()] * 3})
+
+        assert response.status_code == 413
@@ -0,0 +1,108 @@
+"""Test cases for the /api/v1/predict_stream endpoint of fraud_prediction.py"""
+import sys
+import os
+import io
+import json
+import pytest
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction
+
+TRANSACTION = {
+    'amount': 120.5,
+    'product_category': 'category_03',
+    'time': '2024-05-03 06:51:00',
+    'address_state': 'state_31',
+    'gender': 'm',
+    'credit_score': 7,
+}
+
+
+def observations(histogram):
+    """Number of observations of an unlabelled histogram."""
+    return next(sample.value for metric in histogram.collect() for sample in metric.samples
+                if sample.name.endswith('_count'))
+
+
+class CountingStream(io.BytesIO):
+    """BytesIO that records how far it has been read."""
+
+    def readline(self, size=-1):
+        line = super().readline(size)
+        self.max_position = self.tell()
+        return line
+
+
+class TestPredictStream:
+    """Test suite for NDJSON streaming"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client."""
+        fraud_prediction.app.config['TESTING'] = True
+        return fraud_prediction.app.test_client()
+
+    def test_stream_results(self, client):
+        """Every input line gets a result line, valid ones match /api/v1/predict"""
+        lines = [json.dumps(TRANSACTION), '', '{not json', json.dumps({'amount': 1.0}),
+                 json.dumps(dict(TRANSACTION, amount=5.0))]
+
+        response = client.post('/api/v1/predict_stream', data='\n'.join(lines) + '\n',
+                               content_type='application/x-ndjson')
+
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.data.decode().splitlines()]
+        single = client.post('/api/v1/predict', json=TRANSACTION).get_json()
+        assert [r['line'] for r in results] == [1, 3, 4, 5]
+        assert results[0]['fraud_probability'] == pytest.approx(single['fraud_probability'], abs=1e-12)
+        assert 'Invalid JSON' in results[1]['error']
+        assert 'Missing required fields' in results[2]['error']
+        assert 'fraud_probability' in results[3]
+
+    def test_chunks_timed_separately(self, monkeypatch):
+        """Chunks are recorded in their own histogram, not in the per-request latency"""
+        monkeypatch.setattr(fraud_prediction, 'STREAM_CHUNK_SIZE', 10)
+        body = ''.join(json.dumps(TRANSACTION) + '\n' for _ in range(25)).encode()
+        chunks = observations(fraud_prediction.stream_chunk_latency)
+        requests = observations(fraud_prediction.prediction_latency)
+
+        list(fraud_prediction.predict_ndjson(io.BytesIO(body)))
+
+        assert observations(fraud_prediction.stream_chunk_latency) == chunks + 3
+        assert observations(fraud_prediction.prediction_latency) == requests
+
+    def test_chunks_are_read_lazily(self, monkeypatch):
+        """Input is consumed one chunk at a time as results are pulled"""
+        monkeypatch.setattr(fraud_prediction, 'STREAM_CHUNK_SIZE', 10)
+        body = ''.join(json.dumps(TRANSACTION) + '\n' for _ in range(100)).encode()
+        stream = CountingStream(body)
+
+        output = fraud_prediction.predict_ndjson(stream)
+        first = next(output)
+
+        assert len(first.splitlines()) == 10
+        assert stream.max_position < len(body) / 5
+        assert sum(len(chunk.splitlines()) for chunk in output) == 90
+
+    def test_oversized_line(self, monkeypatch):
+        """Lines above MAX_LINE_BYTES are rejected without stopping the stream"""
+        monkeypatch.setattr(fraud_prediction, 'MAX_LINE_BYTES', 200)
+        body = ('{"pad": "' + 'x' * 1000 + '"}\n' + json.dumps(TRANSACTION) + '\n').encode()
+
+        results = [json.loads(line) for chunk in fraud_prediction.predict_ndjson(io.BytesIO(body))
+                   for line in chunk.splitlines()]
+
+        assert 'longer than' in results[0]['error']
+        assert results[1]['line'] == 2
+        assert 'fraud_probability' in results[1]
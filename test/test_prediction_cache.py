@@ -0,0 +1,84 @@
+"""Test cases for the PredictionCache"""
+import sys
+import os
+from prometheus_client import CollectorRegistry, Counter
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from prediction_cache import PredictionCache
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPredictionCache:
+    """Test suite for PredictionCache"""
+
+    def test_hit_and_miss(self):
+        """Stored values are returned, unknown keys miss"""
+        cache = PredictionCache(max_size=10)
+
+        cache.put(('a', 1.0), 0.25)
+
+        assert cache.get(('a', 1.0)) == 0.25
+        assert cache.get(('b', 1.0)) is None
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when full"""
+        cache = PredictionCache(max_size=2)
+        cache.put('a', 0.1)
+        cache.put('b', 0.2)
+        cache.get('a')
+
+        cache.put('c', 0.3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 0.1
+        assert cache.get('c') == 0.3
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are not returned"""
+        clock = FakeClock()
+        cache = PredictionCache(max_size=10, ttl=5.0, clock=clock)
+        cache.put('a', 0.1)
+
+        clock.now = 4.9
+        assert cache.get('a') == 0.1
+        clock.now = 5.0
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_model_change_invalidates(self):
+        """Entries from another model token are dropped"""
+        cache = PredictionCache(max_size=10)
+        cache.put('a', 0.1, model_token=('0.1', 1))
+
+        assert cache.get('a', model_token=('0.1', 1)) == 0.1
+        assert cache.get('a', model_token=('0.2', 1)) is None
+        assert len(cache) == 0
+
+    def test_counters(self):
+        """Hits, misses and evictions are counted"""
+        registry = CollectorRegistry()
+        hits = Counter('test_cache_hits', 'hits', registry=registry)
+        misses = Counter('test_cache_misses', 'misses', registry=registry)
+        evictions = Counter('test_cache_evictions', 'evictions', registry=registry)
+        cache = PredictionCache(max_size=1, hit_counter=hits, miss_counter=misses, eviction_counter=evictions)
+
+        cache.get('a')
+        cache.put('a', 0.1)
+        cache.get('a')
+        cache.put('b', 0.2)
+
+        assert registry.get_sample_value('test_cache_hits_total') == 1
+        assert registry.get_sample_value('test_cache_misses_total') == 1
+        assert registry.get_sample_value('test_cache_evictions_total') == 1
@@ -0,0 +1,106 @@
+"""Test cases for the per-stage latency histograms of fraud_prediction.py"""
+import sys
+import os
+import asyncio
+import json
+import pytest
+from prometheus_client import REGISTRY
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Clear Prometheus registry to avoid duplicate metrics errors
+collectors = list(REGISTRY._collector_to_names.keys())
+for collector in collectors:
+    try:
+        REGISTRY.unregister(collector)
+    except Exception:
+        pass
+
+import fraud_prediction
+import fraud_prediction_asgi
+
+TRANSACTION = {
+    'amount': 120.5,
+    'product_category': 'category_03',
+    'time': '2024-05-03 06:51:00',
+    'address_state': 'state_31',
+    'gender': 'm',
+    'credit_score': 7,
+}
+
+
+def stage_counts():
+    """Observations per stage of the stage histogram, for the served model."""
+    counts = {}
+    for metric in fraud_prediction.stage_latency.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_count') and sample.labels['model_version'] == fraud_prediction.model_version:
+                counts[sample.labels['stage']] = sample.value
+    return counts
+
+
+class TestStageMetrics:
+    """Test suite for the stage latency histograms"""
+
+    @pytest.fixture
+    def client(self):
+        """Flask test client."""
+        fraud_prediction.app.config['TESTING'] = True
+        return fraud_prediction.app.test_client()
+
+    def test_histogram_buckets(self, monkeypatch):
+        """Buckets come from the environment, sorted, or the default"""
+        monkeypatch.setenv('TEST_BUCKETS', '0.001,0.0001, 0.01')
+        assert fraud_prediction.histogram_buckets('TEST_BUCKETS', (1.0,)) == (0.0001, 0.001, 0.01)
+        monkeypatch.delenv('TEST_BUCKETS')
+        assert fraud_prediction.histogram_buckets('TEST_BUCKETS', [1.0]) == (1.0,)
+        monkeypatch.setenv('TEST_BUCKETS', 'fast')
+        with pytest.raises(ValueError):
+            fraud_prediction.histogram_buckets('TEST_BUCKETS', (1.0,))
+
+    def test_stage_buckets_resolve_sub_millisecond(self):
+        """The default stage buckets resolve microsecond scoring"""
+        assert min(fraud_prediction.STAGE_BUCKETS) <= 0.00001
+        assert fraud_prediction.model_family == 'lreg'
+
+    def test_every_stage_is_recorded(self, client):
+        """A successful request adds one observation to every stage"""
+        before = stage_counts()
+        response = client.post('/api/v1/predict', json=TRANSACTION)
+        after = stage_counts()
+
+        assert response.status_code == 200
+        assert set(after) == set(fraud_prediction.STAGES)
+        assert all(after[stage] == before.get(stage, 0) + 1 for stage in fraud_prediction.STAGES)
+
+    def test_failed_stage_stops_recording(self, client):
+        """A request rejected in encoding records validation but not inference"""
+        before = stage_counts()
+        response = client.post('/api/v1/predict', json={**TRANSACTION, 'time': 'yesterday'})
+        after = stage_counts()
+
+        assert response.status_code == 400
+        assert after['validation'] == before['validation'] + 1
+        assert after['feature_encoding'] == before['feature_encoding']
+        assert after['model_inference'] == before['model_inference']
+        assert after['response_encode'] == before['response_encode'] + 1
+
+    def test_asgi_records_stages(self):
+        """The ASGI entry point records the same stages"""
+        before = stage_counts()
+        messages = [{'type': 'http.request', 'body': json.dumps(TRANSACTION).encode('utf-8'), 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/api/v1/predict', 'headers': []}
+        asyncio.run(fraud_prediction_asgi.app(scope, receive, send))
+        after = stage_counts()
+
+        assert sent[0]['status'] == 200
+        assert all(after[stage] == before.get(stage, 0) + 1 for stage in fraud_prediction.STAGES)
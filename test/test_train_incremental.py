@@ -0,0 +1,98 @@
+"""Test cases for out-of-core incremental training"""
+import sys
+import os
+import bz2
+import pickle
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from sklearn.linear_model import SGDClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from features import fit_encoders, build_features, numeric_scaling
+from feature_vectorizer import FeatureVectorizer
+from inference_engines import compile_engine
+from train_incremental import DatasetScan, read_chunks, train_incremental
+
+
+@pytest.fixture
+def sample(tmp_path):
+    """A bz2 CSV with 5000 rows of the dataset."""
+    path = str(tmp_path / 'sample.csv.bz2')
+    with bz2.open(path, 'wt') as f:
+        pd.read_csv('data/fraud.csv.bz2', nrows=5000).to_csv(f, index=False)
+    return path
+
+
+class TestTrainIncremental:
+    """Test suite for train_incremental"""
+
+    def test_scan_matches_whole_dataset(self, sample):
+        """Chunked statistics equal the ones computed on the loaded dataset"""
+        scan = DatasetScan()
+        for chunk in read_chunks(sample, 700):
+            scan.update(chunk)
+        df = pd.concat(read_chunks(sample, 5000))
+
+        expected = fit_encoders(df)
+        for key, value in scan.encoders().items():
+            if key.startswith('enc_'):
+                np.testing.assert_array_equal(value.categories_[0], expected[key].categories_[0])
+                assert value.categories_[0].dtype == expected[key].categories_[0].dtype
+            else:
+                np.testing.assert_array_equal(value, expected[key])
+        np.testing.assert_allclose(scan.scaling()['amount'], numeric_scaling(df, ['amount'])['amount'])
+        assert scan.rows == len(df)
+        assert scan.class_counts.sum() == len(df)
+
+    def test_artifact_serves_like_model_pkl(self, sample, tmp_path):
+        """The artifact scores raw inputs with predict_proba and the compiled engine"""
+        output = str(tmp_path / 'model' / 'sgd-model.pkl')
+
+        train_incremental(sample, output, chunk_size=1000, epochs=2)
+
+        with open(output, 'rb') as f:
+            model_data = pickle.load(f)
+        assert isinstance(model_data['model'], SGDClassifier)
+        assert model_data['model_version'] == '0.1' and model_data['train_date']
+        assert not os.path.exists(output + '.checkpoint')
+        assert os.path.isdir(str(tmp_path / 'model' / 'sgd-model-bundle'))
+
+        df = pd.concat(read_chunks(sample, 5000)).head(200)
+        X = build_features(df, model_data)
+        expected = model_data['model'].predict_proba(X)[:, 1]
+        engine = compile_engine(model_data['model'], FeatureVectorizer.from_model_data(model_data))
+        np.testing.assert_allclose(engine.predict_batch(X.to_numpy()), expected, rtol=1e-12)
+
+    def test_resume_skips_trained_chunks(self, sample, tmp_path):
+        """--resume continues after the checkpoint and trains the same model as an uninterrupted run"""
+        output = str(tmp_path / 'sgd-model.pkl')
+        calls = []
+        original = SGDClassifier.partial_fit
+
+        def interrupted(self, *args, **kwargs):
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            calls.append(1)
+            return original(self, *args, **kwargs)
+
+        with patch.object(SGDClassifier, 'partial_fit', interrupted):
+            with pytest.raises(KeyboardInterrupt):
+                train_incremental(sample, output, chunk_size=1000, checkpoint_every=2)
+        assert os.path.exists(output + '.checkpoint')
+
+        with patch.object(SGDClassifier, 'partial_fit', autospec=True, side_effect=original) as resumed:
+            train_incremental(sample, output, chunk_size=1000, checkpoint_every=2, resume=True)
+
+        # chunks 1-2 were checkpointed, 3-5 are trained again
+        assert resumed.call_count == 3
+        assert os.path.exists(output)
+        with open(output, 'rb') as f:
+            model = pickle.load(f)['model']
+        reference = train_incremental(sample, str(tmp_path / 'reference.pkl'), chunk_size=1000,
+                                      checkpoint_every=2)['model']
+        np.testing.assert_array_equal(model.coef_, reference.coef_)
+        np.testing.assert_array_equal(model.intercept_, reference.intercept_)
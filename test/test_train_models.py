@@ -0,0 +1,111 @@
+"""Test cases for the parallel training orchestrator"""
+import sys
+import os
+import bz2
+import pickle
+import pytest
+import pandas as pd
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import dataset_cache
+from model_bundle import load_bundle
+from sklearn.linear_model import LogisticRegression
+from train_models import core_budget, parse_cores, train_and_save, train_models
+
+
+@pytest.fixture
+def sample(tmp_path, monkeypatch):
+    """A small bz2 dataset; its columnar cache goes to tmp_path."""
+    monkeypatch.setattr(dataset_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    path = str(tmp_path / 'sample.csv.bz2')
+    with bz2.open(path, 'wt') as f:
+        pd.read_csv('data/fraud.csv.bz2', nrows=3000).to_csv(f, index=False)
+    return path
+
+
+class TestTrainModels:
+    """Test suite for train_models"""
+
+    def test_core_budget(self):
+        """Explicit budgets win, other jobs get one core and the forest the rest"""
+        assert core_budget(['lreg', 'randomforest', 'nn'], {}, cpus=8) == {'lreg': 1, 'randomforest': 6, 'nn': 1}
+        assert core_budget(['lreg', 'randomforest'], {'lreg': 3}, cpus=8) == {'lreg': 3, 'randomforest': 5}
+        assert core_budget(['randomforest', 'nn'], {'randomforest': 2}, cpus=8) == {'randomforest': 2, 'nn': 1}
+        assert core_budget(['lreg', 'randomforest', 'nn'], {}, cpus=1)['randomforest'] == 1
+
+    def test_parse_cores(self):
+        """NAME=N arguments are validated"""
+        assert parse_cores(['randomforest=4', 'nn=2']) == {'randomforest': 4, 'nn': 2}
+        with pytest.raises(Exception, match="invalid core budget"):
+            parse_cores(['forest=4'])
+        with pytest.raises(Exception, match="invalid core budget"):
+            parse_cores(['nn=0'])
+
+    def test_trains_in_pickle_layout(self, sample, tmp_path):
+        """Each family is written as <name>-model.pkl with version, train date and a bundle"""
+        output_dir = str(tmp_path / 'model')
+
+        results = train_models(['lreg', 'randomforest'], {'randomforest': 2}, model_version='9.9',
+                               output_dir=output_dir, data_path=sample)
+
+        assert set(results) == {'lreg', 'randomforest'}
+        train_dates = set()
+        for name in results:
+            with open(os.path.join(output_dir, f'{name}-model.pkl'), 'rb') as f:
+                model_data = pickle.load(f)
+            assert model_data['model_version'] == '9.9'
+            assert list(model_data['model'].feature_names_in_[-1:]) == ['amount']
+            assert {'enc_product', 'enc_hour', 'enc_gender', 'enc_state', 'product_cols', 'hour_cols',
+                    'gender_cols', 'state_cols'} <= set(model_data)
+            train_dates.add(model_data['train_date'])
+            assert load_bundle(os.path.join(output_dir, f'{name}-model-bundle')).manifest['model_version'] == '9.9'
+        assert len(train_dates) == 1
+        assert model_data['model'].n_jobs is None
+        assert model_data['train_cores'] == 2
+
+    def test_warm_start_rerun(self, sample, tmp_path, capfd):
+        """A warm rerun continues the linear model and retrains the forest from scratch"""
+        output_dir = str(tmp_path / 'model')
+        train_models(['lreg', 'randomforest'], output_dir=output_dir, data_path=sample)
+        with bz2.open(sample, 'wt') as f:
+            pd.read_csv('data/fraud.csv.bz2', nrows=3100).to_csv(f, index=False)
+
+        results = train_models(['lreg', 'randomforest'], output_dir=output_dir, data_path=sample, warm=True)
+
+        out = capfd.readouterr().out
+        assert "lreg: Warm start from" in out
+        assert "randomforest: Warm start: RandomForestClassifier does not support warm start, cold start" in out
+        assert set(results) == {'lreg', 'randomforest'}
+
+    def test_unchanged_inputs_skip_training(self, sample, tmp_path, capfd):
+        """Artifacts with the fingerprint of the run are reused, changed hyperparameters retrain"""
+        output_dir = str(tmp_path / 'model')
+        train_models(['lreg', 'randomforest'], output_dir=output_dir, data_path=sample)
+        with open(os.path.join(output_dir, 'lreg-model.pkl'), 'rb') as f:
+            fingerprint = pickle.load(f)['fingerprint']
+        capfd.readouterr()
+
+        assert train_models(['lreg', 'randomforest'], output_dir=output_dir, data_path=sample) == {}
+        assert f"lreg: up to date ({fingerprint}), skipping training" in capfd.readouterr().out
+
+        # the forest's core budget is not a training input
+        assert train_models(['randomforest'], {'randomforest': 3}, output_dir=output_dir, data_path=sample) == {}
+
+    def test_train_and_save(self, sample, tmp_path, capfd):
+        """The single-model helper folds the sparse scaling, writes the artifacts and skips reruns"""
+        output_dir = str(tmp_path / 'model')
+
+        model_data = train_and_save('lreg', LogisticRegression(max_iter=1000), sparse=True,
+                                    output_dir=output_dir, data_path=sample)
+
+        assert list(model_data['model'].feature_names_in_[-1:]) == ['amount']
+        with open(os.path.join(output_dir, 'lreg-model.pkl'), 'rb') as f:
+            assert pickle.load(f)['fingerprint'] == model_data['fingerprint']
+        assert load_bundle(os.path.join(output_dir, 'lreg-model-bundle')).manifest['model_version'] == '0.1'
+        capfd.readouterr()
+
+        assert train_and_save('lreg', LogisticRegression(max_iter=1000), sparse=True,
+                              output_dir=output_dir, data_path=sample) is None
+        assert "is up to date" in capfd.readouterr().out
@@ -0,0 +1,80 @@
+"""Test cases for training input fingerprints"""
+import sys
+import os
+import pickle
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from training_fingerprint import training_fingerprint, training_inputs, artifact_is_current
+
+
+@pytest.fixture
+def data(tmp_path):
+    """A small stand-in data file."""
+    path = tmp_path / 'data.csv'
+    path.write_text('amount,fraud\n1.0,False\n')
+    return str(path)
+
+
+class TestTrainingFingerprint:
+    """Test suite for training_fingerprint"""
+
+    def test_stable_for_same_inputs(self, data):
+        """Equal inputs give equal fingerprints; run-time options are ignored"""
+        fingerprint = training_fingerprint(data, LogisticRegression(max_iter=1000), {'sparse': False})
+
+        assert fingerprint.startswith('sha256:')
+        assert training_fingerprint(data, LogisticRegression(max_iter=1000, verbose=1),
+                                    {'sparse': False}) == fingerprint
+        assert training_fingerprint(data, RandomForestClassifier(n_jobs=4)) == \
+            training_fingerprint(data, RandomForestClassifier(n_jobs=1))
+
+    def test_changes_with_inputs(self, data, tmp_path):
+        """Data, hyperparameters, model class and feature options all change the fingerprint"""
+        base = training_fingerprint(data, LogisticRegression(), {'sparse': False})
+        other = tmp_path / 'other.csv'
+        other.write_text('amount,fraud\n2.0,True\n')
+
+        assert training_fingerprint(str(other), LogisticRegression(), {'sparse': False}) != base
+        assert training_fingerprint(data, LogisticRegression(C=0.5), {'sparse': False}) != base
+        assert training_fingerprint(data, RandomForestClassifier(), {'sparse': False}) != base
+        assert training_fingerprint(data, LogisticRegression(), {'sparse': True}) != base
+
+    def test_changes_with_warm_start_artifact(self, data, tmp_path):
+        """A warm-started run differs from a cold one and from one warm-started from another artifact"""
+        previous = tmp_path / 'previous.pkl'
+        previous.write_bytes(pickle.dumps({'model_version': '0.1'}))
+        cold = training_fingerprint(data, LogisticRegression())
+        warm = training_fingerprint(data, LogisticRegression(), warm_start_path=str(previous))
+
+        assert warm != cold
+        assert training_fingerprint(data, LogisticRegression(), warm_start_path=str(previous)) == warm
+        previous.write_bytes(pickle.dumps({'model_version': '0.2'}))
+        assert training_fingerprint(data, LogisticRegression(), warm_start_path=str(previous)) != warm
+        # a missing artifact means a cold start
+        assert training_fingerprint(data, LogisticRegression(), warm_start_path=str(tmp_path / 'missing')) == cold
+
+    def test_inputs_record_versions_and_sources(self, data):
+        """The hashed inputs include library versions and the feature pipeline source"""
+        inputs = training_inputs(data, LogisticRegression())
+
+        assert {'numpy', 'pandas', 'scipy', 'scikit-learn', 'python'} <= set(inputs['versions'])
+        assert len(inputs['features']['source_sha256']) == 64
+        assert inputs['model']['class'].endswith('LogisticRegression')
+
+    def test_artifact_is_current(self, data, tmp_path):
+        """Only an artifact carrying the same fingerprint is current"""
+        fingerprint = training_fingerprint(data, LogisticRegression())
+        path = str(tmp_path / 'model.pkl')
+
+        assert not artifact_is_current(path, fingerprint)
+        with open(path, 'wb') as f:
+            pickle.dump({'model_version': '0.1'}, f)
+        assert not artifact_is_current(path, fingerprint)
+        with open(path, 'wb') as f:
+            pickle.dump({'model_version': '0.1', 'fingerprint': fingerprint}, f)
+        assert artifact_is_current(path, fingerprint)
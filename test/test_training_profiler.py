@@ -0,0 +1,80 @@
+"""Test cases for the training stage profiler"""
+import sys
+import os
+import json
+import time
+import pstats
+import numpy as np
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import training_profiler
+from training_profiler import TrainingProfiler, start_profiling, stage, record
+
+
+class TestTrainingProfiler:
+    """Test suite for TrainingProfiler"""
+
+    def test_stages_are_nested_and_timed(self):
+        """Nested stages get path names and are reported in completion order"""
+        profiler = TrainingProfiler('test')
+        with profiler.stage('load'):
+            with profiler.stage('read_csv'):
+                time.sleep(0.02)
+        with profiler.stage('fit'):
+            sum(range(200000))
+
+        report = profiler.report()
+        names = [entry['name'] for entry in report['stages']]
+        stages = {entry['name']: entry for entry in report['stages']}
+
+        assert names == ['load/read_csv', 'load', 'fit']
+        assert stages['load/read_csv']['wall_s'] >= 0.02
+        assert stages['load']['wall_s'] >= stages['load/read_csv']['wall_s']
+        assert stages['fit']['cpu_s'] > 0
+        assert report['wall_s'] >= sum(stages[name]['wall_s'] for name in ('load', 'fit'))
+
+    def test_peak_rss_of_a_stage(self):
+        """A stage that allocates has a higher peak than the RSS it started from"""
+        profiler = TrainingProfiler('test')
+        with profiler.stage('outer'):
+            with profiler.stage('allocate'):
+                block = np.ones(64 * 2 ** 20 // 8)
+                del block
+            with profiler.stage('idle'):
+                pass
+
+        stages = {entry['name']: entry for entry in profiler.report()['stages']}
+        if stages['outer/allocate']['peak_exact']:
+            assert stages['outer/allocate']['peak_rss_mb'] - stages['outer/idle']['peak_rss_mb'] > 32
+        # the enclosing stage keeps the peak of its children
+        assert stages['outer']['peak_rss_mb'] >= stages['outer/allocate']['peak_rss_mb']
+        assert profiler.report()['peak_rss_mb'] >= stages['outer']['peak_rss_mb']
+
+    def test_stage_without_profiler_is_a_no_op(self):
+        """Library code can call stage() and record() when nothing is profiled"""
+        assert training_profiler._active is None
+        with stage('load'):
+            pass
+        record([{'name': 'fit'}], 'worker')
+
+    def test_finish_writes_reports(self, tmp_path, capsys):
+        """finish writes the JSON report and the cProfile stats and prints the summary"""
+        report_path = str(tmp_path / 'profile' / 'report.json')
+        cprofile_path = str(tmp_path / 'train.prof')
+        profiler = start_profiling('lreg', cprofile_path=cprofile_path)
+        with stage('fit'):
+            sorted(range(10000), reverse=True)
+        record([{'name': 'fit', 'wall_s': 1.0, 'cpu_s': 1.0, 'peak_rss_mb': 1.0}], 'train/nn')
+        profiler.annotate(rows=10)
+        report = profiler.finish(report_path)
+
+        with open(report_path, encoding='utf-8') as f:
+            assert json.load(f) == report
+        assert report['run'] == 'lreg'
+        assert report['meta'] == {'rows': 10}
+        assert [entry['name'] for entry in report['stages']] == ['fit', 'train/nn/fit']
+        assert pstats.Stats(cprofile_path).total_calls > 0
+        assert 'train/nn/fit' in capsys.readouterr().out
+        assert training_profiler._active is None
@@ -0,0 +1,138 @@
+"""Test cases for warm-start retraining"""
+import sys
+import os
+import pickle
+import pytest
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from features import load_transactions, fit_encoders, build_features, build_sparse_features, numeric_scaling
+from warm_start import warm_start
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    """A slice of the cleaned dataset."""
+    return load_transactions().head(6000)
+
+
+@pytest.fixture(scope='module')
+def previous(transactions, tmp_path_factory):
+    """A logistic regression artifact trained on all but the last 60 rows."""
+    old = transactions.head(5940)
+    encoders = fit_encoders(old)
+    model = LogisticRegression(max_iter=1000, class_weight='balanced')
+    model.fit(build_features(old, encoders), old['fraud'])
+    path = str(tmp_path_factory.mktemp('model') / 'model.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump({'model': model, **encoders, 'model_version': '0.1', 'train_date': '2026-01-01'}, f)
+    return path, model, encoders
+
+
+class TestWarmStart:
+    """Test suite for warm_start"""
+
+    def test_continues_from_previous_coefficients(self, transactions, previous):
+        """Same schema: the solver starts from the previous solution and converges faster"""
+        path, old_model, _ = previous
+        encoders = fit_encoders(transactions)
+        X, y = build_features(transactions, encoders), transactions['fraud']
+        messages = []
+
+        model, used_encoders = warm_start(LogisticRegression(max_iter=1000, class_weight='balanced'), encoders,
+                                          path, log=messages.append)
+
+        assert model.warm_start and model is not old_model
+        np.testing.assert_array_equal(model.coef_, old_model.coef_)
+        assert used_encoders['enc_product'] is not encoders['enc_product']
+        assert messages[0].startswith("Warm start from")
+        cold = LogisticRegression(max_iter=1000, class_weight='balanced').fit(X, y)
+        model.fit(X, y)
+        assert model.n_iter_[0] < cold.n_iter_[0]
+        np.testing.assert_allclose(model.predict_proba(X), cold.predict_proba(X), atol=0.02)
+
+    def test_changed_categories_cold_start(self, transactions, previous):
+        """A new category falls back to a cold start and says why"""
+        path = previous[0]
+        changed = transactions.copy()
+        changed['product_category'] = changed['product_category'].astype(str)
+        changed.loc[changed.index[0], 'product_category'] = 'category_99'
+        encoders = fit_encoders(changed)
+        model = LogisticRegression()
+        messages = []
+
+        result = warm_start(model, encoders, path, log=messages.append)
+
+        assert result == (model, encoders)
+        assert "product_category categories changed (added ['category_99']" in messages[0]
+        assert messages[0].endswith("cold start")
+
+    @pytest.mark.parametrize('model, reason', [
+        (MLPClassifier(hidden_layer_sizes=[10, 10]), "previous model is a LogisticRegression"),
+    ])
+    def test_other_model_cold_start(self, transactions, previous, model, reason):
+        """Another model family falls back to a cold start"""
+        messages = []
+
+        result = warm_start(model, fit_encoders(transactions), previous[0], log=messages.append)
+
+        assert result[0] is model
+        assert reason in messages[0]
+
+    def test_missing_artifact_cold_start(self, transactions, tmp_path):
+        """A missing artifact falls back to a cold start"""
+        messages = []
+        model = LogisticRegression()
+
+        assert warm_start(model, fit_encoders(transactions), str(tmp_path / 'none.pkl'),
+                          log=messages.append)[0] is model
+        assert "cannot load" in messages[0]
+
+    @pytest.mark.parametrize('artifact, reason', [
+        (LogisticRegression(), "previous artifact is a LogisticRegression, not a model dict"),
+        ({'model': LogisticRegression(), 'model_version': '0.0'}, "previous artifact has no enc_product"),
+    ])
+    def test_artifact_without_encoders_cold_start(self, transactions, tmp_path, artifact, reason):
+        """A bare model pickle or an artifact without encoders falls back to a cold start"""
+        path = str(tmp_path / 'model.pkl')
+        with open(path, 'wb') as f:
+            pickle.dump(artifact, f)
+        messages = []
+        model = LogisticRegression()
+
+        assert warm_start(model, fit_encoders(transactions), path, log=messages.append)[0] is model
+        assert reason in messages[0]
+
+    def test_sparse_scaling_unfolded(self, transactions, previous):
+        """With scaling the previous model scores standardized sparse input like the raw input"""
+        path, old_model, _ = previous
+        encoders = fit_encoders(transactions)
+        scaling = numeric_scaling(transactions, ['amount'])
+
+        model, encoders = warm_start(LogisticRegression(), encoders, path, scaling=scaling, log=lambda m: None)
+
+        X_sparse = build_sparse_features(transactions, encoders, scaling=scaling)
+        np.testing.assert_allclose(model.decision_function(X_sparse),
+                                   old_model.decision_function(build_features(transactions, encoders)),
+                                   rtol=1e-9, atol=1e-9)
+
+    def test_mlp_continues_training(self, transactions, tmp_path):
+        """An MLP artifact with the same architecture continues from its weights"""
+        encoders = fit_encoders(transactions)
+        X, y = build_features(transactions, encoders), transactions['fraud']
+        old = MLPClassifier(hidden_layer_sizes=[4], max_iter=5, random_state=0).fit(X, y)
+        path = str(tmp_path / 'nn-model.pkl')
+        with open(path, 'wb') as f:
+            pickle.dump({'model': old, **encoders}, f)
+
+        model, _ = warm_start(MLPClassifier(hidden_layer_sizes=[4], max_iter=5), encoders, path,
+                              log=lambda m: None)
+        wider, _ = warm_start(MLPClassifier(hidden_layer_sizes=[8]), encoders, path, log=lambda m: None)
+
+        np.testing.assert_array_equal(model.coefs_[0], old.coefs_[0])
+        assert model.warm_start and model.max_iter == 5
+        assert not hasattr(wider, 'coefs_')